@@ -1,8 +1,10 @@
+import os
+
 from flask import Flask, redirect, url_for
 from config import Config
 from extensions import db, migrate, csrf
 
-from routes import bp_dashboard, bp_projects, bp_sos, bp_indicators, bp_activities, bp_reports, bp_testscore
+from routes import bp_dashboard, bp_projects, bp_sos, bp_indicators, bp_activities, bp_reports, bp_testscore, bp_jobs
 
 # Import route modules so handlers register on blueprints (required)
 from routes import dashboard as _dashboard_routes  # noqa: F401
@@ -12,14 +14,25 @@ from routes import indicators as _ind_routes     # noqa: F401
 from routes import activities as _act_routes     # noqa: F401
 from routes import reports as _rep_routes        # noqa: F401
 from routes import testscore as _ts_routes        # noqa: F401
+from routes import jobs as _job_routes            # noqa: F401
+
+from services import cache, db_engine, logframe_import, profiling, reaper, rollups
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
     db.init_app(app)
+    db_engine.init_app(app)
+    profiling.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
+    rollups.init_app(app)
+    logframe_import.init_app(app)
+    cache.init_app(app)
+    reaper.init_app(app)
 
     app.register_blueprint(bp_dashboard)
     app.register_blueprint(bp_projects)
@@ -28,6 +41,7 @@ def create_app():
     app.register_blueprint(bp_activities)
     app.register_blueprint(bp_reports)
     app.register_blueprint(bp_testscore)
+    app.register_blueprint(bp_jobs)
 
     @app.get("/")
     def index():
@@ -36,4 +50,9 @@ def create_app():
     return app
 
 if __name__ == "__main__":
-    create_app().run(debug=True)
+    app = create_app()
+    # With the reloader this module also runs in the watching parent; sweep
+    # only in the child that serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        reaper.start_sweeper(app)
+    app.run(debug=True)
@@ -0,0 +1,73 @@
+"""DOCX activities table: row-by-row python-docx vs services.docx_tables.add_table.
+
+    python benchmarks/bench_docx_tables.py --rows 5000
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+
+from services.docx_tables import add_table  # noqa: E402
+
+HEADER = ["Date", "Activity Code", "Title", "SO", "Indicator", "Status", "Location", "Male", "Female", "Total"]
+
+
+def _rows(n: int):
+    for i in range(n):
+        male, female = i % 37, i % 41
+        yield (f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"A{i}", f"Community session {i}", f"SO{i % 4 + 1}",
+               f"SO{i % 4 + 1}_IND{i % 3 + 1}", "completed", "Ward 3", male, female, male + female)
+
+
+def build_row_by_row(n: int) -> bytes:
+    doc = Document()
+    t = doc.add_table(rows=1, cols=len(HEADER))
+    for cell, text in zip(t.rows[0].cells, HEADER):
+        cell.text = text
+    for r in _rows(n):
+        cells = t.add_row().cells
+        for cell, v in zip(cells, r):
+            cell.text = str(v)
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+def build_bulk(n: int) -> bytes:
+    doc = Document()
+    add_table(doc, HEADER, _rows(n))
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+def _time(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    fn(n)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--skip-legacy-above", type=int, default=5000,
+                        help="don't time the row-by-row writer above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'row-by-row (s)':>15} {'bulk (s)':>10} {'speedup':>8}")
+    for n in args.rows:
+        bulk = _time(build_bulk, n)
+        legacy = _time(build_row_by_row, n) if n <= args.skip_legacy_above else None
+        if legacy is None:
+            print(f"{n:>8} {'-':>15} {bulk:>10.2f} {'-':>8}")
+        else:
+            print(f"{n:>8} {legacy:>15.2f} {bulk:>10.2f} {legacy / bulk:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
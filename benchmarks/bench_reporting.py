@@ -0,0 +1,218 @@
+"""Reporting benchmarks on seeded synthetic data, saved as JSON for comparison between commits.
+
+For each row count, a logframe database with that many activities and a
+test score CSV with that many participants are generated (benchmarks/
+synthetic.py), then each scenario is timed ``--repeat`` times with the
+report cache cleared before every run:
+
+* dashboard_home: GET /dashboard/
+* period_data: reports._get_period_data() for the largest project, whole period
+* export_docx / export_xlsx: period data plus the DOCX / XLSX writer
+* testscore_analysis: analysis of the score CSV with gender and a school breakdown
+
+    python benchmarks/bench_reporting.py --rows 1000 100000
+    python benchmarks/bench_reporting.py --rows 1000000 --scenarios dashboard_home period_data
+    python benchmarks/bench_reporting.py --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import DAYS, START, generate_logframe, generate_scores  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SCENARIOS = ("dashboard_home", "period_data", "export_docx", "export_xlsx", "testscore_analysis")
+
+
+def _commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _make_app(db_path: str):
+    from app import create_app
+
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SQLALCHEMY_BINDS": {},
+        "TESTING": True,
+    })
+
+
+def _scenarios(app, score_csv: str):
+    """``{name: callable}`` for one prepared dataset."""
+    from sqlalchemy import func, select
+
+    from extensions import db
+    from models import Activity, StrategicObjective
+    from routes import reports, testscore
+    from services.cache import report_cache
+
+    with app.app_context():
+        project_id = db.session.execute(
+            select(StrategicObjective.project_id)
+            .join(Activity, Activity.strategic_objective_id == StrategicObjective.id)
+            .group_by(StrategicObjective.project_id)
+            .order_by(func.count(Activity.id).desc())
+            .limit(1)
+        ).scalar()
+    start, end = START, START.fromordinal(START.toordinal() + DAYS - 1)
+    client = app.test_client()
+
+    def dashboard_home():
+        response = client.get("/dashboard/")
+        assert response.status_code == 200, response.status_code
+
+    def period_data():
+        with app.app_context():
+            reports._get_period_data(project_id, start, end)
+
+    def export_docx():
+        with app.app_context():
+            reports._write_period_docx(reports._get_period_data(project_id, start, end), BytesIO())
+
+    def export_xlsx():
+        with app.app_context(), tempfile.TemporaryFile() as out:
+            reports._write_period_xlsx(reports._get_period_data(project_id, start, end), out)
+
+    def testscore_analysis():
+        breakdowns = testscore.parse_breakdowns("school")
+        with app.app_context():
+            summary = testscore.summarize_csv_chunked(score_csv, disaggregate=True, breakdowns=breakdowns)
+            testscore._analysis_result(*summary, breakdowns=breakdowns)
+
+    def cold(fn):
+        def run():
+            report_cache.clear()
+            fn()
+        return run
+
+    return {name: cold(fn) for name, fn in locals().items() if name in SCENARIOS}
+
+
+def run_scale(rows: int, scenarios, repeat: int, seed: int, data_dir: str, projects: int = 10) -> dict:
+    db_path = os.path.join(data_dir, f"logframe-{rows}-{projects}p-{seed}.db")
+    score_csv = os.path.join(data_dir, f"scores-{rows}-{seed}.csv")
+    setup = {}
+    if not os.path.exists(db_path):
+        t0 = time.perf_counter()
+        generate_logframe(f"sqlite:///{db_path}", rows, projects=projects, seed=seed)
+        setup["logframe_s"] = round(time.perf_counter() - t0, 3)
+    if "testscore_analysis" in scenarios and not os.path.exists(score_csv):
+        t0 = time.perf_counter()
+        generate_scores(score_csv, rows, seed=seed)
+        setup["scores_s"] = round(time.perf_counter() - t0, 3)
+
+    app = _make_app(db_path)
+    fns = _scenarios(app, score_csv)
+    results = {}
+    for name in scenarios:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fns[name]()
+            times.append(time.perf_counter() - t0)
+        results[name] = {
+            "runs": [round(t, 4) for t in times],
+            "min": round(min(times), 4),
+            "median": round(statistics.median(times), 4),
+        }
+        print(f"{rows:>9} {name:<20} min {min(times):>8.3f}s  median {statistics.median(times):>8.3f}s", flush=True)
+    return {"setup": setup, "scenarios": results}
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Print median old vs new per scale/scenario; the number of regressions beyond ``threshold``."""
+    regressions = 0
+    print(f"\nvs {old['meta']['commit']} ({old['meta']['timestamp']})")
+    print(f"{'rows':>9} {'scenario':<20} {'old (s)':>9} {'new (s)':>9} {'ratio':>7}")
+    for rows, scale in new["results"].items():
+        for name, res in scale["scenarios"].items():
+            before = old["results"].get(rows, {}).get("scenarios", {}).get(name)
+            if before is None:
+                continue
+            ratio = res["median"] / before["median"] if before["median"] else float("inf")
+            flag = ""
+            if ratio > threshold:
+                flag = "  slower"
+                regressions += 1
+            elif ratio < 1 / threshold:
+                flag = "  faster"
+            print(f"{rows:>9} {name:<20} {before['median']:>9.3f} {res['median']:>9.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000],
+                        help="activities (and score rows) per dataset, e.g. 1000 100000 1000000")
+    parser.add_argument("--projects", type=int, default=10,
+                        help="projects the activities are spread over (the period scenarios use the largest)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep generated datasets here and reuse them (default: temporary)")
+    parser.add_argument("--out", help="result JSON path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result JSON to compare medians against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="median ratio above which a scenario counts as a regression")
+    args = parser.parse_args()
+
+    commit = _commit()
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_reporting_")
+    os.makedirs(data_dir, exist_ok=True)
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "projects": args.projects,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    try:
+        for rows in args.rows:
+            report["results"][str(rows)] = run_scale(rows, args.scenarios, args.repeat, args.seed, data_dir,
+                                                     args.projects)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            sys.exit(f"{regressions} scenario(s) slower than {args.threshold}x")
+
+
+if __name__ == "__main__":
+    main()
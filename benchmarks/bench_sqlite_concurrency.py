@@ -0,0 +1,165 @@
+"""Concurrent reports and data entry on SQLite: default settings vs services.db_engine pragmas.
+
+Writer threads insert an activity with attendance and commit (data entry);
+reader threads run the period report's reach aggregate (report generation).
+Each configuration gets its own freshly seeded database file.
+
+    python benchmarks/bench_sqlite_concurrency.py --activities 50000 --readers 4 --writers 2 --seconds 10
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from config import Config  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Activity, ActivityAttendance, Project, StrategicObjective  # noqa: E402
+from services.db_engine import install_pragmas, sqlite_pragmas  # noqa: E402
+
+START = date(2024, 1, 1)
+
+
+def _seed(engine, n_activities: int, n_sos: int = 8):
+    db.metadata.create_all(engine)
+    rnd = random.Random(0)
+    with engine.begin() as conn:
+        project_id = conn.execute(insert(Project).values(name="Bench", goal="g")).inserted_primary_key[0]
+        conn.execute(insert(StrategicObjective), [
+            {"project_id": project_id, "so_code": f"SO{i + 1}", "title": f"SO {i + 1}"} for i in range(n_sos)
+        ])
+        conn.execute(insert(Activity), [
+            {"strategic_objective_id": i % n_sos + 1, "title": f"Activity {i}", "status": "completed",
+             "activity_date": START + timedelta(days=rnd.randrange(730))}
+            for i in range(n_activities)
+        ])
+        conn.execute(insert(ActivityAttendance), [
+            {"activity_id": i + 1, "male_count": rnd.randrange(50), "female_count": rnd.randrange(50)}
+            for i in range(n_activities)
+        ])
+    return n_sos
+
+
+def _report_query():
+    # Reach by SO over a year, as in the period report
+    return (
+        select(Activity.strategic_objective_id,
+               func.count(Activity.id),
+               func.coalesce(func.sum(ActivityAttendance.male_count), 0),
+               func.coalesce(func.sum(ActivityAttendance.female_count), 0))
+        .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
+        .where(Activity.activity_date.between(START, START + timedelta(days=365)))
+        .group_by(Activity.strategic_objective_id)
+    )
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {"read": [], "write": []}
+        self.errors = {"read": 0, "write": 0}
+
+    def record(self, kind, seconds=None):
+        with self.lock:
+            if seconds is None:
+                self.errors[kind] += 1
+            else:
+                self.latencies[kind].append(seconds)
+
+
+def _reader(engine, stats, stop):
+    q = _report_query()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(q).all()
+            stats.record("read", time.perf_counter() - t0)
+        except OperationalError:
+            stats.record("read")
+
+
+def _writer(engine, stats, stop, n_sos, seed):
+    rnd = random.Random(seed)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                activity_id = conn.execute(insert(Activity).values(
+                    strategic_objective_id=rnd.randrange(n_sos) + 1, title="New activity", status="completed",
+                    activity_date=START + timedelta(days=rnd.randrange(730)),
+                )).inserted_primary_key[0]
+                conn.execute(insert(ActivityAttendance).values(
+                    activity_id=activity_id, male_count=rnd.randrange(50), female_count=rnd.randrange(50),
+                ))
+            stats.record("write", time.perf_counter() - t0)
+        except OperationalError:
+            stats.record("write")
+
+
+def _percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(label, pragmas, args, workdir):
+    path = os.path.join(workdir, f"{label}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    install_pragmas(engine, pragmas)
+    n_sos = _seed(engine, args.activities)
+
+    stats, stop = _Stats(), threading.Event()
+    threads = [threading.Thread(target=_reader, args=(engine, stats, stop)) for _ in range(args.readers)]
+    threads += [threading.Thread(target=_writer, args=(engine, stats, stop, n_sos, i)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    row = [label]
+    for kind in ("read", "write"):
+        lat = stats.latencies[kind]
+        row += [len(lat) / args.seconds, _percentile(lat, 0.5) * 1000, _percentile(lat, 0.95) * 1000,
+                stats.errors[kind]]
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--activities", type=int, default=50000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    tuned = sqlite_pragmas({k: getattr(Config, k) for k in dir(Config) if k.startswith("SQLITE_")})
+    workdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+    try:
+        results = [run("default", {}, args, workdir), run("tuned", tuned, args, workdir)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"tuned pragmas: {', '.join(f'{k}={v}' for k, v in tuned.items())}")
+    print(f"{'':>8} {'reads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}"
+          f" {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for label, rps, rp50, rp95, rerr, wps, wp50, wp95, werr in results:
+        print(f"{label:>8} {rps:>8.1f} {rp50:>8.1f} {rp95:>8.1f} {rerr:>7}"
+              f" {wps:>9.1f} {wp50:>8.1f} {wp95:>8.1f} {werr:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Seeded synthetic data for benchmarks: a logframe database and a test score sheet.
+
+The same arguments always produce the same rows, so timings from different
+commits are comparable.
+
+    python benchmarks/synthetic.py logframe /tmp/bench.db --activities 100000
+    python benchmarks/synthetic.py scores /tmp/scores.csv --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from extensions import db  # noqa: E402
+from models import Activity, ActivityAttendance, Indicator, Project, StrategicObjective  # noqa: E402
+from services.db_engine import install_pragmas  # noqa: E402
+from services.rollups import rebuild_reach_rollups  # noqa: E402
+
+START = date(2024, 1, 1)
+DAYS = 730
+STATUSES = np.array(["planned", "ongoing", "completed"])
+LOCATIONS = np.array(["Ward 1", "Ward 2", "Ward 3", "Ward 4", "Ward 5", "Central"])
+CREATED = datetime(2024, 1, 1)
+
+# Rows per executemany() call
+BATCH_SIZE = 20_000
+
+
+def _insert(conn, model, columns: dict):
+    """Insert the rows given as equal-length column arrays, in batches."""
+    names = list(columns)
+    values = [np.asarray(columns[n], dtype=object) for n in names]
+    n = len(values[0])
+    for i in range(0, n, BATCH_SIZE):
+        chunk = [v[i:i + BATCH_SIZE] for v in values]
+        conn.execute(insert(model), [dict(zip(names, row)) for row in zip(*chunk)])
+
+
+def generate_logframe(url: str, activities: int, projects: int = 10, sos_per_project: int = 4,
+                      indicators_per_so: int = 3, attendance_ratio: float = 0.8, seed: int = 0) -> dict:
+    """Create the schema at ``url`` (an empty database) and fill it; returns the row counts.
+
+    Activities are spread uniformly over the SOs and two years from ``START``;
+    two thirds are linked to one of their SO's indicators and
+    ``attendance_ratio`` of them have attendance. The reach rollups are
+    rebuilt at the end.
+    """
+    rng = np.random.default_rng(seed)
+    engine = create_engine(url)
+    # Throwaway data: skip fsyncs while loading
+    install_pragmas(engine, {"journal_mode": "WAL", "synchronous": "OFF"})
+    db.metadata.create_all(engine)
+
+    n_sos = projects * sos_per_project
+    n_ind = n_sos * indicators_per_so
+    project_ids = np.arange(1, projects + 1)
+    so_ids = np.arange(1, n_sos + 1)
+    ind_ids = np.arange(1, n_ind + 1)
+    so_project = (so_ids - 1) // sos_per_project + 1
+    so_code = (so_ids - 1) % sos_per_project + 1
+    ind_so = (ind_ids - 1) // indicators_per_so + 1
+    ind_code = (ind_ids - 1) % indicators_per_so + 1
+
+    act_ids = np.arange(1, activities + 1)
+    act_so = rng.integers(1, n_sos + 1, activities)
+    act_ind = (act_so - 1) * indicators_per_so + rng.integers(1, indicators_per_so + 1, activities)
+    linked = rng.random(activities) < 2 / 3
+    act_date = np.datetime64(START) + rng.integers(0, DAYS, activities).astype("timedelta64[D]")
+
+    has_att = rng.random(activities) < attendance_ratio
+    att_activity = act_ids[has_att]
+    n_att = len(att_activity)
+
+    with engine.begin() as conn:
+        _insert(conn, Project, {
+            "id": project_ids,
+            "name": [f"Project {i}" for i in project_ids],
+            "goal": ["Synthetic benchmark project"] * projects,
+            "donor": ["Donor"] * projects,
+            "start_date": [START] * projects,
+            "end_date": [START + timedelta(days=DAYS - 1)] * projects,
+            "created_at": [CREATED + timedelta(minutes=int(i)) for i in project_ids],
+        })
+        _insert(conn, StrategicObjective, {
+            "id": so_ids,
+            "project_id": so_project,
+            "so_code": [f"SO{c}" for c in so_code],
+            "title": [f"Strategic objective {c} of project {p}" for c, p in zip(so_code, so_project)],
+            "created_at": [CREATED + timedelta(minutes=int(i)) for i in so_ids],
+        })
+        _insert(conn, Indicator, {
+            "id": ind_ids,
+            "strategic_objective_id": ind_so,
+            "indicator_code": [f"SO{(s - 1) % sos_per_project + 1}_IND{c}" for s, c in zip(ind_so, ind_code)],
+            "statement": ["# of people reached"] * n_ind,
+            "indicator_type": ["Output"] * n_ind,
+            "unit": ["# persons"] * n_ind,
+            "gender_disaggregation": [True] * n_ind,
+            "baseline": [0.0] * n_ind,
+            "target": rng.integers(100, 5000, n_ind).astype(float),
+            "created_at": [CREATED + timedelta(minutes=int(i)) for i in ind_ids],
+        })
+        _insert(conn, Activity, {
+            "id": act_ids,
+            "strategic_objective_id": act_so,
+            "indicator_id": np.where(linked, act_ind, None),
+            "activity_code": [f"A{i}" for i in act_ids],
+            "title": [f"Community session {i}" for i in act_ids],
+            "activity_date": act_date.astype(object),
+            "location": LOCATIONS[rng.integers(0, len(LOCATIONS), activities)],
+            "status": STATUSES[rng.integers(0, len(STATUSES), activities)],
+            "created_at": [CREATED] * activities,
+        })
+        _insert(conn, ActivityAttendance, {
+            "id": np.arange(1, n_att + 1),
+            "activity_id": att_activity,
+            "male_count": rng.integers(0, 60, n_att),
+            "female_count": rng.integers(0, 60, n_att),
+            "created_at": [CREATED] * n_att,
+        })
+        rebuild_reach_rollups(conn)
+    engine.dispose()
+    return {"projects": projects, "sos": n_sos, "indicators": n_ind, "activities": activities, "attendance": n_att}
+
+
+def generate_scores(path: str, rows: int, items: int = 5, seed: int = 0):
+    """Write a test score CSV: gender, school, district, pre/post_test and ``items`` pre_q/post_q pairs."""
+    rng = np.random.default_rng(seed)
+    pre = np.clip(rng.normal(55, 15, rows), 0, 100).round(1)
+    post = np.clip(pre + rng.normal(8, 10, rows), 0, 100).round(1)
+    df = pd.DataFrame({
+        "participant_id": np.arange(1, rows + 1),
+        "gender": np.array(["M", "F"])[rng.integers(0, 2, rows)],
+        "school": [f"School {i}" for i in rng.integers(1, 41, rows)],
+        "district": [f"District {i}" for i in rng.integers(1, 6, rows)],
+        "pre_test": pre,
+        "post_test": post,
+    })
+    for q in range(1, items + 1):
+        df[f"pre_q{q}"] = rng.integers(0, 11, rows)
+        df[f"post_q{q}"] = np.minimum(df[f"pre_q{q}"] + rng.integers(-1, 4, rows), 10)
+    df.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="kind", required=True)
+    lf = sub.add_parser("logframe", help="SQLite database with projects, SOs, indicators, activities, attendance")
+    lf.add_argument("path")
+    lf.add_argument("--activities", type=int, default=100_000)
+    lf.add_argument("--projects", type=int, default=10)
+    lf.add_argument("--sos", type=int, default=4, help="SOs per project")
+    lf.add_argument("--indicators", type=int, default=3, help="indicators per SO")
+    lf.add_argument("--attendance-ratio", type=float, default=0.8)
+    lf.add_argument("--seed", type=int, default=0)
+    sc = sub.add_parser("scores", help="test score CSV")
+    sc.add_argument("path")
+    sc.add_argument("--rows", type=int, default=100_000)
+    sc.add_argument("--items", type=int, default=5)
+    sc.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.kind == "logframe":
+        if os.path.exists(args.path):
+            parser.error(f"{args.path} already exists")
+        counts = generate_logframe(f"sqlite:///{os.path.abspath(args.path)}", args.activities, args.projects,
+                                   args.sos, args.indicators, args.attendance_ratio, args.seed)
+        print(", ".join(f"{n} {k}" for k, n in counts.items()))
+    else:
+        generate_scores(args.path, args.rows, args.items, args.seed)
+        print(f"{args.rows} score rows")
+    print(f"written to {args.path} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
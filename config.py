@@ -1,6 +1,89 @@
 import os
 
+
+def _engine_options():
+    """Pool settings from the environment; unset ones keep SQLAlchemy's defaults."""
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0") == "1"}
+    for key, env in (("pool_size", "DB_POOL_SIZE"), ("max_overflow", "DB_MAX_OVERFLOW"),
+                     ("pool_timeout", "DB_POOL_TIMEOUT"), ("pool_recycle", "DB_POOL_RECYCLE")):
+        if os.getenv(env):
+            options[key] = int(os.getenv(env))
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///ngo_reporting.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options()
+    # Optional engine for dashboard/report reads (services.db_engine.read_only):
+    # a replica, or e.g. sqlite:///file:ngo_reporting.db?mode=ro&uri=true
+    SQLALCHEMY_BINDS = (
+        {"read": {"url": os.getenv("READ_DATABASE_URL"), **_engine_options()}}
+        if os.getenv("READ_DATABASE_URL") else {}
+    )
+
+    # PRAGMAs run on every new SQLite connection (services.db_engine).
+    # WAL lets reports read while data entry writes; NORMAL sync is durable
+    # in WAL mode except for the last commits on power loss. Sizes in bytes
+    # (cache: KiB when negative, as in SQLite); busy timeout in milliseconds.
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)))
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+    SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+    # In-process cache for dashboard/report payloads (entries; seconds)
+    REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+    REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", "300"))
+
+    # Background export jobs: "thread" or "process" pool
+    EXPORT_JOB_EXECUTOR = os.getenv("EXPORT_JOB_EXECUTOR", "thread")
+    EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+    EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR")  # default: <app root>/exports
+    # Seconds between refreshes of a process's queued/running jobs; jobs not
+    # refreshed for 3 intervals are failed as interrupted
+    EXPORT_JOB_HEARTBEAT = int(os.getenv("EXPORT_JOB_HEARTBEAT", "30"))
+
+    # Per-request SQL profiling (services.profiling): Server-Timing header,
+    # JSON log line and /_debug/perf. Statements run this many times in one
+    # request are flagged as likely N+1 queries.
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "0") == "1"
+    QUERY_PROFILING_REPEAT = int(os.getenv("QUERY_PROFILING_REPEAT", "5"))
+    QUERY_PROFILING_HISTORY = int(os.getenv("QUERY_PROFILING_HISTORY", "100"))
+
+    # Rows per page of the activity, indicator and SO lists
+    LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+
+    # Test score charts are cached by content; least recently used PNGs are
+    # evicted past this size (0 = unbounded)
+    CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    # Chart rendering processes (services.chart_render); 0 renders in the
+    # request thread
+    CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "0"))
+
+    # Artefact reaper: files older than these many seconds are deleted by
+    # `flask reaper sweep` (0 = keep forever). `flask reaper run` (and
+    # `python app.py`) sweep every REAPER_INTERVAL seconds.
+    REAPER_UPLOAD_MAX_AGE = int(os.getenv("REAPER_UPLOAD_MAX_AGE", str(7 * 24 * 3600)))
+    REAPER_UPLOAD_MAX_BYTES = int(os.getenv("REAPER_UPLOAD_MAX_BYTES", str(500 * 1024 * 1024)))
+    REAPER_PARSED_MAX_BYTES = int(os.getenv("REAPER_PARSED_MAX_BYTES", str(500 * 1024 * 1024)))
+    REAPER_CHART_MAX_AGE = int(os.getenv("REAPER_CHART_MAX_AGE", str(30 * 24 * 3600)))
+    REAPER_REPORT_MAX_AGE = int(os.getenv("REAPER_REPORT_MAX_AGE", str(24 * 3600)))
+    REAPER_EXPORT_MAX_AGE = int(os.getenv("REAPER_EXPORT_MAX_AGE", str(24 * 3600)))
+    REAPER_INTERVAL = int(os.getenv("REAPER_INTERVAL", "0"))
+
+    # Test score CSVs at least this large are analysed in chunks of
+    # TESTSCORE_CHUNK_ROWS rows instead of being loaded whole
+    TESTSCORE_STREAM_MIN_BYTES = int(os.getenv("TESTSCORE_STREAM_MIN_BYTES", str(20 * 1024 * 1024)))
+    TESTSCORE_CHUNK_ROWS = int(os.getenv("TESTSCORE_CHUNK_ROWS", "200000"))
+
+    # Batch analysis: worker processes (0 = CPU count) and files per batch
+    TESTSCORE_BATCH_WORKERS = int(os.getenv("TESTSCORE_BATCH_WORKERS", "0"))
+    TESTSCORE_BATCH_MAX_FILES = int(os.getenv("TESTSCORE_BATCH_MAX_FILES", "500"))
+    # Size limits for batch datasets, zip members counted uncompressed (0 = none)
+    TESTSCORE_BATCH_MAX_FILE_BYTES = int(os.getenv("TESTSCORE_BATCH_MAX_FILE_BYTES", str(100 * 1024 * 1024)))
+    TESTSCORE_BATCH_MAX_TOTAL_BYTES = int(os.getenv("TESTSCORE_BATCH_MAX_TOTAL_BYTES", str(500 * 1024 * 1024)))
+    # Largest request body Flask accepts (uploads included); larger ones get a 413
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(200 * 1024 * 1024)))
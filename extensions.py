@@ -1,7 +1,24 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 
-db = SQLAlchemy()
+# Bind key of the optional read-only engine (READ_DATABASE_URL)
+READ_BIND = "read"
+
+
+class RoutingSession(Session):
+    """Runs queries on the read engine while ``info["read_only"]`` is set
+    (see ``services.db_engine.read_only``). Flushes always go to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("read_only") and not self._flushing:
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 csrf = CSRFProtect()
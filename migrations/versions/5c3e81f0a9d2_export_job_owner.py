@@ -0,0 +1,28 @@
+"""export job owner and heartbeat
+
+Revision ID: 5c3e81f0a9d2
+Revises: 733101691216
+Create Date: 2026-10-17 19:05:31.412870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3e81f0a9d2'
+down_revision = '733101691216'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('export_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('export_jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
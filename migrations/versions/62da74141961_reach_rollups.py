@@ -0,0 +1,67 @@
+"""reach rollup tables
+
+Revision ID: 62da74141961
+Revises: 7bd4724db372
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '62da74141961'
+down_revision = '7bd4724db372'
+branch_labels = None
+depends_on = None
+
+
+def _counters():
+    return [
+        sa.Column('activity_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('attendance_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('male_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('female_count', sa.Integer(), nullable=False, server_default='0'),
+    ]
+
+
+_BACKFILL = """
+INSERT INTO {table} ({key}, activity_count, attendance_count, male_count, female_count)
+SELECT {expr}, COUNT(a.id), COUNT(att.id),
+       COALESCE(SUM(att.male_count), 0), COALESCE(SUM(att.female_count), 0)
+FROM activities a
+LEFT JOIN activity_attendance att ON att.activity_id = a.id
+GROUP BY {expr}
+"""
+
+
+def upgrade():
+    op.create_table('rollup_reach_by_so',
+    sa.Column('strategic_objective_id', sa.Integer(), autoincrement=False, nullable=False),
+    *_counters(),
+    sa.PrimaryKeyConstraint('strategic_objective_id')
+    )
+    op.create_table('rollup_reach_by_status',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    *_counters(),
+    sa.PrimaryKeyConstraint('status')
+    )
+    op.create_table('rollup_reach_by_month',
+    sa.Column('month', sa.String(length=7), nullable=False),
+    *_counters(),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+    # Backfill from existing data (SQLite date bucketing, as in the dashboard)
+    op.execute(_BACKFILL.format(table='rollup_reach_by_so', key='strategic_objective_id',
+                                expr='a.strategic_objective_id'))
+    op.execute(_BACKFILL.format(table='rollup_reach_by_status', key='status',
+                                expr="COALESCE(a.status, '')"))
+    op.execute(_BACKFILL.format(table='rollup_reach_by_month', key='month',
+                                expr="strftime('%Y-%m', a.activity_date)"))
+
+
+def downgrade():
+    op.drop_table('rollup_reach_by_month')
+    op.drop_table('rollup_reach_by_status')
+    op.drop_table('rollup_reach_by_so')
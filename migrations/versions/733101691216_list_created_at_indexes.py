@@ -0,0 +1,33 @@
+"""created_at indexes for paginated SO and indicator lists
+
+Revision ID: 733101691216
+Revises: 97968c9a14e6
+Create Date: 2026-10-17 16:12:44.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '733101691216'
+down_revision = '97968c9a14e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (created_at, id) keyset order: SQLite indexes carry the rowid id
+    with op.batch_alter_table('strategic_objectives', schema=None) as batch_op:
+        batch_op.create_index('ix_sos_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('indicators', schema=None) as batch_op:
+        batch_op.create_index('ix_indicators_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('indicators', schema=None) as batch_op:
+        batch_op.drop_index('ix_indicators_created_at')
+
+    with op.batch_alter_table('strategic_objectives', schema=None) as batch_op:
+        batch_op.drop_index('ix_sos_created_at')
@@ -0,0 +1,33 @@
+"""composite indexes for report and dashboard queries
+
+Revision ID: 890b69950b15
+Revises: 62da74141961
+Create Date: 2026-10-17 10:03:51.640127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '890b69950b15'
+down_revision = '62da74141961'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # strategic_objectives(project_id), indicators(strategic_objective_id) and
+    # activity_attendance(activity_id) are already covered by the leading
+    # columns of their unique constraints.
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.create_index('ix_activities_so_date', ['strategic_objective_id', 'activity_date'], unique=False)
+        batch_op.create_index('ix_activities_indicator_date', ['indicator_id', 'activity_date'], unique=False)
+        batch_op.create_index('ix_activities_activity_date', ['activity_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.drop_index('ix_activities_activity_date')
+        batch_op.drop_index('ix_activities_indicator_date')
+        batch_op.drop_index('ix_activities_so_date')
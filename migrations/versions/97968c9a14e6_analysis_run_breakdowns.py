@@ -0,0 +1,34 @@
+"""analysis run breakdowns
+
+Revision ID: 97968c9a14e6
+Revises: e4d0f2d35614
+Create Date: 2026-10-17 15:21:08.403517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '97968c9a14e6'
+down_revision = 'e4d0f2d35614'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dimensions', sa.String(length=255), server_default='', nullable=False))
+        batch_op.add_column(sa.Column('breakdowns', sa.Text(), nullable=True))
+        batch_op.drop_constraint('uq_analysis_run_content', type_='unique')
+        batch_op.create_unique_constraint('uq_analysis_run_content', ['content_hash', 'disaggregate', 'dimensions', 'analysis_version'])
+
+
+def downgrade():
+    # Runs with breakdowns would collide on the narrower key
+    op.execute("DELETE FROM analysis_runs WHERE dimensions != ''")
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_analysis_run_content', type_='unique')
+        batch_op.create_unique_constraint('uq_analysis_run_content', ['content_hash', 'disaggregate', 'analysis_version'])
+        batch_op.drop_column('breakdowns')
+        batch_op.drop_column('dimensions')
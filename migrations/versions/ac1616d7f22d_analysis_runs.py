@@ -0,0 +1,36 @@
+"""analysis runs table
+
+Revision ID: ac1616d7f22d
+Revises: 287d7df6e63d
+Create Date: 2026-10-17 12:41:18.336027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ac1616d7f22d'
+down_revision = '287d7df6e63d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analysis_runs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('disaggregate', sa.Boolean(), nullable=False),
+    sa.Column('analysis_version', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('overall', sa.Text(), nullable=False),
+    sa.Column('gender_rows', sa.Text(), nullable=True),
+    sa.Column('narrative', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash', 'disaggregate', 'analysis_version', name='uq_analysis_run_content')
+    )
+
+
+def downgrade():
+    op.drop_table('analysis_runs')
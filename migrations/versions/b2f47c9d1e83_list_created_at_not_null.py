@@ -0,0 +1,39 @@
+"""backfill and require created_at on SOs and indicators
+
+Revision ID: b2f47c9d1e83
+Revises: 5c3e81f0a9d2
+Create Date: 2026-10-17 19:48:12.650193
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f47c9d1e83'
+down_revision = '5c3e81f0a9d2'
+branch_labels = None
+depends_on = None
+
+# Rows without a creation time sort as the oldest
+BACKFILL = datetime(1970, 1, 1)
+
+TABLES = ('strategic_objectives', 'indicators')
+
+
+def upgrade():
+    # The list pages seek on (created_at, id); a NULL created_at never
+    # matches the seek, so such rows only ever showed on the first page
+    for name in TABLES:
+        table = sa.table(name, sa.column('created_at', sa.DateTime()))
+        op.execute(table.update().where(table.c.created_at.is_(None)).values(created_at=BACKFILL))
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for name in reversed(TABLES):
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
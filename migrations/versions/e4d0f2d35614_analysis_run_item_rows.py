@@ -0,0 +1,26 @@
+"""analysis run item rows column
+
+Revision ID: e4d0f2d35614
+Revises: e72334780257
+Create Date: 2026-10-17 14:02:31.774180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4d0f2d35614'
+down_revision = 'e72334780257'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_rows', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.drop_column('item_rows')
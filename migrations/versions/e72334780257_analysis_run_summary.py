@@ -0,0 +1,26 @@
+"""analysis run summary column
+
+Revision ID: e72334780257
+Revises: ac1616d7f22d
+Create Date: 2026-10-17 13:20:44.517209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e72334780257'
+down_revision = 'ac1616d7f22d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('analysis_runs', schema=None) as batch_op:
+        batch_op.drop_column('summary')
@@ -35,7 +35,7 @@ class StrategicObjective(db.Model):
     title = db.Column(db.String(250), nullable=False)
     description = db.Column(db.Text)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     indicators = db.relationship(
         "Indicator",
@@ -53,6 +53,8 @@ class StrategicObjective(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("project_id", "so_code", name="uq_project_so_code"),
+        # newest-first list pages (keyset on created_at, id)
+        db.Index("ix_sos_created_at", "created_at"),
     )
 
 
@@ -74,7 +76,7 @@ class Indicator(db.Model):
     baseline = db.Column(db.Float, default=0)
     target = db.Column(db.Float)  # optional at MVP
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     __table_args__ = (
         db.UniqueConstraint(
@@ -82,6 +84,8 @@ class Indicator(db.Model):
             "indicator_code",
             name="uq_so_indicator_code"
         ),
+        # newest-first list pages (keyset on created_at, id)
+        db.Index("ix_indicators_created_at", "created_at"),
     )
 
 
@@ -118,6 +122,15 @@ class Activity(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # period reports: SO(s) of a project + date range
+        db.Index("ix_activities_so_date", "strategic_objective_id", "activity_date"),
+        # indicator summary: indicator join + date range
+        db.Index("ix_activities_indicator_date", "indicator_id", "activity_date"),
+        # month bucketing / date-ordered lists across all projects
+        db.Index("ix_activities_activity_date", "activity_date"),
+    )
+
 
 class ActivityAttendance(db.Model):
     __tablename__ = "activity_attendance"
@@ -137,3 +150,93 @@ class ActivityAttendance(db.Model):
     __table_args__ = (
         db.UniqueConstraint("activity_id", name="uq_attendance_activity"),
     )
+
+
+# ---------------------------------------------------------------------------
+# Reach rollups (maintained by services/rollups.py, read by the dashboard)
+# ---------------------------------------------------------------------------
+
+class SOReachRollup(db.Model):
+    __tablename__ = "rollup_reach_by_so"
+    strategic_objective_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    male_count = db.Column(db.Integer, nullable=False, default=0)
+    female_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatusReachRollup(db.Model):
+    __tablename__ = "rollup_reach_by_status"
+    status = db.Column(db.String(20), primary_key=True)  # "" when Activity.status is NULL
+
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    male_count = db.Column(db.Integer, nullable=False, default=0)
+    female_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class MonthlyReachRollup(db.Model):
+    __tablename__ = "rollup_reach_by_month"
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM of Activity.activity_date
+
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    male_count = db.Column(db.Integer, nullable=False, default=0)
+    female_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ExportJob(db.Model):
+    __tablename__ = "export_jobs"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+
+    kind = db.Column(db.String(40), nullable=False)    # e.g. period_docx, testscore_pdf
+    params = db.Column(db.Text, nullable=False)        # JSON
+
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued|running|done|failed
+    error = db.Column(db.Text)
+
+    result_path = db.Column(db.String(500))
+    download_name = db.Column(db.String(200))
+    mimetype = db.Column(db.String(120))
+
+    # Submitting process (host:pid:nonce) and its last sign of life, see services.jobs
+    owner = db.Column(db.String(120))
+    heartbeat_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_export_jobs_status_created", "status", "created_at"),
+    )
+
+
+class AnalysisRun(db.Model):
+    """Stored test score analysis, reused when the same file is uploaded again."""
+    __tablename__ = "analysis_runs"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 of the uploaded bytes
+    disaggregate = db.Column(db.Boolean, nullable=False, default=False)
+    # Breakdown spec, e.g. "school,school*gender" ("" for none)
+    dimensions = db.Column(db.String(255), nullable=False, default="", server_default="")
+    analysis_version = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(255))
+
+    overall = db.Column(db.Text, nullable=False)  # JSON
+    gender_rows = db.Column(db.Text)              # JSON list, NULL when not disaggregated
+    item_rows = db.Column(db.Text)                # JSON list, NULL without pre_x/post_x item pairs
+    breakdowns = db.Column(db.Text)               # JSON list of tables, NULL without breakdowns
+    narrative = db.Column(db.Text, nullable=False, default="")
+    # Mergeable pre/post moments (services.score_stats.dump_summary), so runs
+    # can be combined without re-reading their files
+    summary = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("content_hash", "disaggregate", "dimensions", "analysis_version",
+                            name="uq_analysis_run_content"),
+    )
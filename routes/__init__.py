@@ -8,3 +8,4 @@ bp_indicators = Blueprint("indicators", __name__, url_prefix="/indicators")
 bp_activities = Blueprint("activities", __name__, url_prefix="/activities")
 bp_reports    = Blueprint("reports", __name__, url_prefix="/reports")
 bp_testscore  = Blueprint("testscore", __name__, url_prefix="/testscore")
+bp_jobs       = Blueprint("jobs", __name__, url_prefix="/jobs")
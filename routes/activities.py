@@ -1,9 +1,12 @@
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
 from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 from extensions import db
 from models import StrategicObjective, Activity, Indicator, ActivityAttendance, Project
 from routes import bp_activities
+from services.attendance_import import import_attendance, read_sheet
+from services.pagination import keyset_page, page_size
 
 def activity_reach(activity_id: int):
     row = (db.session.query(
@@ -19,19 +22,44 @@ def list_activities():
     project_id = request.args.get("project_id", type=int)
     so_id = request.args.get("so_id", type=int)
 
-    projects = Project.query.order_by(Project.created_at.desc()).all()
-    sos = StrategicObjective.query.order_by(StrategicObjective.created_at.desc()).all()
-
-    q = Activity.query.join(StrategicObjective, Activity.strategic_objective_id == StrategicObjective.id)
+    # The SO join also fills a.strategic_objective (shown per row)
+    q = (Activity.query
+         .join(StrategicObjective, Activity.strategic_objective_id == StrategicObjective.id)
+         .options(contains_eager(Activity.strategic_objective)))
     if project_id:
         q = q.filter(StrategicObjective.project_id == project_id)
     if so_id:
         q = q.filter(Activity.strategic_objective_id == so_id)
 
-    activities = q.order_by(Activity.activity_date.desc()).all()
+    after = request.args.get("after")
+    page = keyset_page(q, Activity.activity_date, Activity.id, after,
+                       page_size(request.args, current_app.config.get("LIST_PAGE_SIZE", 50)))
+    filters = {"project_id": project_id, "so_id": so_id}
+
+    if request.args.get("format") == "json":
+        return jsonify({
+            "items": [{
+                "id": a.id,
+                "activity_code": a.activity_code,
+                "title": a.title,
+                "activity_date": a.activity_date.isoformat() if a.activity_date else None,
+                "status": a.status,
+                "strategic_objective_id": a.strategic_objective_id,
+                "so_code": a.strategic_objective.so_code,
+            } for a in page.items],
+            "next_cursor": page.next_cursor,
+            "next_url": url_for("activities.list_activities", **filters, after=page.next_cursor, format="json")
+                        if page.has_next else None,
+        })
+
+    projects = Project.query.order_by(Project.created_at.desc()).all()
+    sos = StrategicObjective.query.order_by(StrategicObjective.created_at.desc()).all()
     return render_template("activities/list.html",
-                           activities=activities, projects=projects, sos=sos,
-                           project_id=project_id, so_id=so_id)
+                           activities=page.items, projects=projects, sos=sos,
+                           project_id=project_id, so_id=so_id,
+                           next_url=url_for("activities.list_activities", **filters, after=page.next_cursor)
+                                    if page.has_next else None,
+                           first_url=url_for("activities.list_activities", **filters) if after else None)
 
 @bp_activities.get("/create")
 def create_activity_form():
@@ -126,3 +154,27 @@ def upsert_attendance(activity_id):
     db.session.commit()
     flash("Attendance saved.", "success")
     return redirect(url_for("activities.view_activity", activity_id=a.id))
+
+@bp_activities.route("/attendance/import", methods=["GET", "POST"])
+def import_attendance_sheet():
+    projects = Project.query.order_by(Project.created_at.desc()).all()
+    if request.method == "GET":
+        return render_template("activities/import_attendance.html", projects=projects, result=None)
+
+    file = request.files.get("sheet")
+    project_id = request.form.get("project_id", type=int)
+    if not file or not file.filename or not file.filename.lower().endswith((".csv", ".xlsx")):
+        flash("Please upload a CSV or Excel file.", "error")
+        return redirect(url_for("activities.import_attendance_sheet"))
+
+    try:
+        df = read_sheet(file.filename, file.read())
+    except Exception as e:
+        flash(str(e) or "Could not read the sheet.", "error")
+        return redirect(url_for("activities.import_attendance_sheet"))
+
+    result = import_attendance(df, project_id=project_id)
+    if result.saved:
+        flash(f"Attendance saved for {result.saved} activities.", "success")
+    return render_template("activities/import_attendance.html", projects=projects, result=result,
+                           project_id=project_id)
@@ -7,15 +7,22 @@ from models import (
     StrategicObjective,
     Indicator,
     Activity,
-    ActivityAttendance
+    SOReachRollup,
+    StatusReachRollup,
+    MonthlyReachRollup,
 )
 from routes import bp_dashboard
+from services.cache import report_cache
+from services.db_engine import read_only
 
 
+# Aggregates read from the reach rollup tables (services/rollups.py) rather
+# than scanning activities/activity_attendance on every page load.
+
 def _total_reach():
     row = db.session.query(
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
+        func.coalesce(func.sum(StatusReachRollup.male_count), 0).label("male"),
+        func.coalesce(func.sum(StatusReachRollup.female_count), 0).label("female"),
     ).one()
     male = int(row.male or 0)
     female = int(row.female or 0)
@@ -26,13 +33,12 @@ def _reach_by_so(limit: int = 10):
     rows = (db.session.query(
         StrategicObjective.so_code,
         StrategicObjective.title,
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
+        SOReachRollup.male_count.label("male"),
+        SOReachRollup.female_count.label("female"),
     )
-    .join(Activity, Activity.strategic_objective_id == StrategicObjective.id)
-    .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
-    .group_by(StrategicObjective.id)
-    .order_by((func.coalesce(func.sum(ActivityAttendance.male_count), 0) + func.coalesce(func.sum(ActivityAttendance.female_count), 0)).desc())
+    .join(SOReachRollup, SOReachRollup.strategic_objective_id == StrategicObjective.id)
+    .filter(SOReachRollup.activity_count > 0)
+    .order_by((SOReachRollup.male_count + SOReachRollup.female_count).desc())
     .limit(limit)
     .all())
 
@@ -49,32 +55,28 @@ def _reach_by_so(limit: int = 10):
 
 
 def _activity_status_counts():
-    rows = (db.session.query(Activity.status, func.count(Activity.id))
-            .group_by(Activity.status)
+    rows = (db.session.query(StatusReachRollup.status, StatusReachRollup.activity_count)
+            .filter(StatusReachRollup.activity_count > 0)
             .all())
     data = {"planned": 0, "ongoing": 0, "completed": 0}
     for status, count in rows:
-        if status in data:
-            data[status] = int(count)
-        else:
-            data[status] = int(count)
+        # rollup stores NULL status as ""
+        data[status or None] = int(count)
     return data
 
 
 def _monthly_reach_last_n_months(n: int = 6):
-    # SQLite friendly: group by YYYY-MM from Activity.activity_date
+    # keep last n months present in data (months with at least one attendance row)
     rows = (db.session.query(
-        func.strftime("%Y-%m", Activity.activity_date).label("ym"),
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
+        MonthlyReachRollup.month.label("ym"),
+        MonthlyReachRollup.male_count.label("male"),
+        MonthlyReachRollup.female_count.label("female"),
     )
-    .join(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
-    .group_by("ym")
-    .order_by("ym")
+    .filter(MonthlyReachRollup.attendance_count > 0)
+    .order_by(MonthlyReachRollup.month.desc())
+    .limit(n)
     .all())
-
-    # keep last n months present in data
-    rows = rows[-n:] if len(rows) > n else rows
+    rows.reverse()
 
     labels, totals = [], []
     for r in rows:
@@ -84,21 +86,51 @@ def _monthly_reach_last_n_months(n: int = 6):
     return labels, totals
 
 
-@bp_dashboard.get("/")
-def dashboard_home():
+def _dashboard_payload():
     # High-level counts
     total_projects = Project.query.count()
     total_sos = StrategicObjective.query.count()
     total_indicators = Indicator.query.count()
-    total_activities = Activity.query.count()
 
     male, female, total_reach = _total_reach()
 
     # KPI: completion rate
     status_counts = _activity_status_counts()
+    total_activities = sum(status_counts.values())
     completed = status_counts.get("completed", 0)
     completion_rate = round((completed / total_activities) * 100, 1) if total_activities else 0.0
 
+    # Charts
+    so_labels, so_male, so_female, so_total = _reach_by_so(limit=10)
+    monthly_labels, monthly_total = _monthly_reach_last_n_months(6)
+
+    stats = {
+        "projects": total_projects,
+        "sos": total_sos,
+        "indicators": total_indicators,
+        "activities": total_activities,
+        "male": male,
+        "female": female,
+        "total_reach": total_reach,
+        "completion_rate": completion_rate,
+        "status_counts": status_counts,
+    }
+    charts = {
+        "so_labels": so_labels,
+        "so_male": so_male,
+        "so_female": so_female,
+        "so_total": so_total,
+        "monthly_labels": monthly_labels,
+        "monthly_total": monthly_total,
+    }
+    return stats, charts
+
+
+@bp_dashboard.get("/")
+@read_only()
+def dashboard_home():
+    stats, charts = report_cache.get_or_set(("dashboard",), _dashboard_payload)
+
     # Recent lists
     recent_activities = (
         Activity.query.order_by(Activity.activity_date.desc(), Activity.id.desc())
@@ -111,31 +143,10 @@ def dashboard_home():
         .all()
     )
 
-    # Charts
-    so_labels, so_male, so_female, so_total = _reach_by_so(limit=10)
-    monthly_labels, monthly_total = _monthly_reach_last_n_months(6)
-
     return render_template(
         "dashboard/index.html",
-        stats={
-            "projects": total_projects,
-            "sos": total_sos,
-            "indicators": total_indicators,
-            "activities": total_activities,
-            "male": male,
-            "female": female,
-            "total_reach": total_reach,
-            "completion_rate": completion_rate,
-            "status_counts": status_counts,
-        },
-        charts={
-            "so_labels": so_labels,
-            "so_male": so_male,
-            "so_female": so_female,
-            "so_total": so_total,
-            "monthly_labels": monthly_labels,
-            "monthly_total": monthly_total,
-        },
+        stats=stats,
+        charts=charts,
         recent_activities=recent_activities,
         recent_projects=recent_projects,
     )
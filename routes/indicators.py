@@ -1,26 +1,58 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
+from sqlalchemy.orm import contains_eager, joinedload
 from extensions import db
 from models import StrategicObjective, Indicator, Project
 from routes import bp_indicators
+from services.pagination import keyset_page, page_size
 
 @bp_indicators.get("/")
 def list_indicators():
     project_id = request.args.get("project_id", type=int)
     so_id = request.args.get("so_id", type=int)
 
-    projects = Project.query.order_by(Project.created_at.desc()).all()
-    sos = StrategicObjective.query.order_by(StrategicObjective.created_at.desc()).all()
-
-    q = Indicator.query.join(StrategicObjective, Indicator.strategic_objective_id == StrategicObjective.id)
+    # The SO join also fills i.strategic_objective (shown per row)
+    q = (Indicator.query
+         .join(StrategicObjective, Indicator.strategic_objective_id == StrategicObjective.id)
+         .options(contains_eager(Indicator.strategic_objective)))
     if project_id:
         q = q.filter(StrategicObjective.project_id == project_id)
     if so_id:
         q = q.filter(Indicator.strategic_objective_id == so_id)
 
-    indicators = q.order_by(Indicator.created_at.desc()).all()
+    after = request.args.get("after")
+    page = keyset_page(q, Indicator.created_at, Indicator.id, after,
+                       page_size(request.args, current_app.config.get("LIST_PAGE_SIZE", 50)))
+    filters = {"project_id": project_id, "so_id": so_id}
+
+    if request.args.get("format") == "json":
+        return jsonify({
+            "items": [{
+                "id": i.id,
+                "indicator_code": i.indicator_code,
+                "statement": i.statement,
+                "indicator_type": i.indicator_type,
+                "unit": i.unit,
+                "baseline": i.baseline,
+                "target": i.target,
+                "gender_disaggregation": bool(i.gender_disaggregation),
+                "strategic_objective_id": i.strategic_objective_id,
+                "so_code": i.strategic_objective.so_code,
+            } for i in page.items],
+            "next_cursor": page.next_cursor,
+            "next_url": url_for("indicators.list_indicators", **filters, after=page.next_cursor, format="json")
+                        if page.has_next else None,
+        })
+
+    projects = Project.query.order_by(Project.created_at.desc()).all()
+    # The SO filter shows each SO's project name
+    sos = (StrategicObjective.query.options(joinedload(StrategicObjective.project))
+           .order_by(StrategicObjective.created_at.desc()).all())
     return render_template("indicators/list.html",
-                          indicators=indicators, projects=projects, sos=sos,
-                          project_id=project_id, so_id=so_id)
+                          indicators=page.items, projects=projects, sos=sos,
+                          project_id=project_id, so_id=so_id,
+                          next_url=url_for("indicators.list_indicators", **filters, after=page.next_cursor)
+                                   if page.has_next else None,
+                          first_url=url_for("indicators.list_indicators", **filters) if after else None)
 
 @bp_indicators.get("/create")
 def create_indicator_form():
@@ -0,0 +1,36 @@
+import os
+from flask import render_template, redirect, url_for, flash, jsonify, send_file
+from extensions import db
+from models import ExportJob
+from routes import bp_jobs
+from services.jobs import job_status
+
+def _get_job_or_404(job_id: str) -> ExportJob:
+    return db.get_or_404(ExportJob, job_id)
+
+@bp_jobs.get("/<job_id>")
+def view_job(job_id):
+    job = _get_job_or_404(job_id)
+    return render_template("jobs/view.html", job=job)
+
+@bp_jobs.get("/<job_id>/status")
+def job_status_json(job_id):
+    job = _get_job_or_404(job_id)
+    return jsonify(job_status(job))
+
+@bp_jobs.get("/<job_id>/download")
+def download_job(job_id):
+    job = _get_job_or_404(job_id)
+    if job.status != "done" or not job.result_path:
+        flash("This export is not ready for download.", "error")
+        return redirect(url_for("jobs.view_job", job_id=job.id))
+    if not os.path.exists(job.result_path):
+        flash("This export has expired. Please generate it again.", "error")
+        return redirect(url_for("jobs.view_job", job_id=job.id))
+
+    return send_file(
+        job.result_path,
+        as_attachment=True,
+        download_name=job.download_name,
+        mimetype=job.mimetype,
+    )
@@ -3,6 +3,7 @@ from flask import render_template, request, redirect, url_for, flash
 from extensions import db
 from models import Project
 from routes import bp_projects
+from services.logframe_import import LogframeError, import_logframe, read_workbook
 
 @bp_projects.get("/")
 def list_projects():
@@ -77,3 +78,31 @@ def delete_project(project_id):
     db.session.commit()
     flash("Project deleted.", "success")
     return redirect(url_for("projects.list_projects"))
+
+@bp_projects.route("/import", methods=["GET", "POST"])
+def import_logframe_workbook():
+    projects = Project.query.order_by(Project.created_at.desc()).all()
+    if request.method == "GET":
+        return render_template("projects/import.html", projects=projects, errors=None)
+
+    file = request.files.get("workbook")
+    project_id = request.form.get("project_id", type=int)
+    if not file or not file.filename or not file.filename.lower().endswith(".xlsx"):
+        flash("Please upload an Excel (.xlsx) workbook.", "error")
+        return redirect(url_for("projects.import_logframe_workbook"))
+
+    try:
+        result = import_logframe(read_workbook(file.read()), project_id=project_id)
+    except LogframeError as e:
+        db.session.rollback()
+        flash(f"Nothing was imported: {e}", "error")
+        return render_template("projects/import.html", projects=projects, errors=e.errors,
+                               project_id=project_id)
+    except Exception:
+        db.session.rollback()
+        flash("Could not read the workbook.", "error")
+        return redirect(url_for("projects.import_logframe_workbook"))
+
+    flash(f"Imported {result.sos} SOs, {result.indicators} indicators and {result.activities} activities.",
+          "success")
+    return redirect(url_for("projects.view_project", project_id=result.project_id))
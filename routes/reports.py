@@ -1,10 +1,18 @@
+import tempfile
 from datetime import datetime
 from io import BytesIO
-from flask import render_template, request, send_file
-from sqlalchemy import func
+from flask import render_template, request, send_file, redirect, url_for, flash, abort
+from sqlalchemy import String, select, type_coerce, union_all
+from sqlalchemy.orm import aliased
 from extensions import db
 from models import Project, StrategicObjective, Indicator, Activity, ActivityAttendance
 from routes import bp_reports
+from services.cache import report_cache
+from services.db_engine import read_only
+from services.jobs import export_job, submit
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 def _parse_dates(start: str, end: str):
     start_d = datetime.strptime(start, "%Y-%m-%d").date()
@@ -13,119 +21,193 @@ def _parse_dates(start: str, end: str):
 
 def _get_period_data(project_id: int, start_d, end_d):
     project = Project.query.get_or_404(project_id)
-
-    # SO reach summary
-    so_rows = (db.session.query(
-        StrategicObjective.id,
-        StrategicObjective.so_code,
-        StrategicObjective.title,
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
+    summary = report_cache.get_or_set(
+        ("period", project_id, start_d, end_d),
+        lambda: _period_summary(project_id, start_d, end_d),
     )
-    .join(Activity, Activity.strategic_objective_id == StrategicObjective.id)
-    .join(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
-    .filter(
-        StrategicObjective.project_id == project_id,
-        Activity.activity_date >= start_d,
-        Activity.activity_date <= end_d
+    return {
+        "project": project,
+        "start": start_d,
+        "end": end_d,
+        **summary,
+    }
+
+def _period_rows(project_id: int, start_d, end_d):
+    """Every activity in the period that belongs to the project, either via its
+    own SO or via its linked indicator's SO, with its attendance (if any).
+
+    The SO / indicator / activity summaries are derived from these rows.
+    """
+    so_ids = db.session.scalars(
+        select(StrategicObjective.id).where(StrategicObjective.project_id == project_id)
+    ).all()
+    indicator_ids = db.session.scalars(
+        select(Indicator.id)
+        .join(StrategicObjective, Indicator.strategic_objective_id == StrategicObjective.id)
+        .where(StrategicObjective.project_id == project_id)
+    ).all()
+    if not so_ids:
+        return []
+
+    IndicatorSO = aliased(StrategicObjective)
+    in_period = (Activity.activity_date >= start_d, Activity.activity_date <= end_d)
+
+    def rows(*where):
+        return (
+            select(
+                Activity.id.label("activity_id"),
+                type_coerce(Activity.activity_date, String).label("activity_date"),
+                Activity.activity_code,
+                Activity.title,
+                Activity.status,
+                Activity.location,
+                StrategicObjective.id.label("so_id"),
+                StrategicObjective.so_code,
+                StrategicObjective.title.label("so_title"),
+                StrategicObjective.project_id.label("so_project_id"),
+                Indicator.id.label("indicator_id"),
+                Indicator.indicator_code,
+                Indicator.statement,
+                IndicatorSO.project_id.label("indicator_project_id"),
+                ActivityAttendance.id.label("attendance_id"),
+                ActivityAttendance.male_count,
+                ActivityAttendance.female_count,
+            )
+            .join(StrategicObjective, Activity.strategic_objective_id == StrategicObjective.id)
+            .outerjoin(Indicator, Activity.indicator_id == Indicator.id)
+            .outerjoin(IndicatorSO, Indicator.strategic_objective_id == IndicatorSO.id)
+            .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
+            .where(*where, *in_period)
+        )
+
+    # One branch per composite index: the project's own activities seek
+    # ix_activities_so_date, activities of other projects' SOs linked to
+    # one of its indicators seek ix_activities_indicator_date. A single
+    # OR over both project ids can only range-scan the date index.
+    query = union_all(
+        rows(Activity.strategic_objective_id.in_(so_ids)),
+        rows(Activity.indicator_id.in_(indicator_ids), Activity.strategic_objective_id.not_in(so_ids)),
     )
-    .group_by(StrategicObjective.id)
-    .order_by(StrategicObjective.so_code.asc())
-    .all())
+    query = query.order_by(query.selected_columns.activity_date, query.selected_columns.activity_id)
+    # Core execution with positional tuples: no ORM row wrapping, and the date
+    # is read as stored since it is only ever rendered as text.
+    return db.session.connection().execute(query).tuples()
+
+def _period_summary(project_id: int, start_d, end_d):
+    so_acc = {}    # so_id -> [so_code, title, male, female]
+    ind_acc = {}   # indicator_id -> [indicator_code, statement, male, female]
+    activities = []
+
+    for (_, activity_date, activity_code, title, status, location,
+         so_id, so_code, so_title, so_project_id,
+         indicator_id, indicator_code, statement, indicator_project_id,
+         attendance_id, male, female) in _period_rows(project_id, start_d, end_d):
+        male = int(male or 0)
+        female = int(female or 0)
+
+        if so_project_id == project_id:
+            activities.append({
+                "date": str(activity_date),
+                "code": activity_code,
+                "title": title,
+                "so_code": so_code,
+                "indicator_code": indicator_code,
+                "status": status,
+                "location": location,
+                "male": male,
+                "female": female,
+                "total": male + female,
+            })
+
+        # SO / indicator reach only counts activities that have attendance
+        if attendance_id is None:
+            continue
+        if so_project_id == project_id:
+            acc = so_acc.setdefault(so_id, [so_code, so_title, 0, 0])
+            acc[2] += male
+            acc[3] += female
+        if indicator_project_id == project_id:
+            acc = ind_acc.setdefault(indicator_id, [indicator_code, statement, 0, 0])
+            acc[2] += male
+            acc[3] += female
 
     so_summary = [{
-        "so_code": r.so_code,
-        "title": r.title,
-        "male": int(r.male),
-        "female": int(r.female),
-        "total": int(r.male + r.female),
-    } for r in so_rows]
-
-    # Indicator reach summary (computed from linked activities)
-    ind_rows = (db.session.query(
-        Indicator.id,
-        Indicator.indicator_code,
-        Indicator.statement,
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
-    )
-    .join(StrategicObjective, Indicator.strategic_objective_id == StrategicObjective.id)
-    .join(Activity, Activity.indicator_id == Indicator.id)
-    .join(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
-    .filter(
-        StrategicObjective.project_id == project_id,
-        Activity.activity_date >= start_d,
-        Activity.activity_date <= end_d
-    )
-    .group_by(Indicator.id)
-    .order_by(Indicator.indicator_code.asc())
-    .all())
+        "so_code": code,
+        "title": title,
+        "male": male,
+        "female": female,
+        "total": male + female,
+    } for _, (code, title, male, female) in sorted(so_acc.items(), key=lambda kv: (kv[1][0], kv[0]))]
 
     ind_summary = [{
-        "code": r.indicator_code,
-        "statement": r.statement,
-        "male": int(r.male),
-        "female": int(r.female),
-        "total": int(r.male + r.female),
-    } for r in ind_rows]
-
-    # Activities list in period + reach (LEFT JOIN attendance)
-    act_rows = (db.session.query(
-        Activity.id,
-        Activity.activity_date,
-        Activity.activity_code,
-        Activity.title,
-        Activity.status,
-        Activity.location,
-        StrategicObjective.so_code.label("so_code"),
-        Indicator.indicator_code.label("indicator_code"),
-        func.coalesce(func.sum(ActivityAttendance.male_count), 0).label("male"),
-        func.coalesce(func.sum(ActivityAttendance.female_count), 0).label("female"),
-    )
-    .join(StrategicObjective, Activity.strategic_objective_id == StrategicObjective.id)
-    .outerjoin(Indicator, Activity.indicator_id == Indicator.id)
-    .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
-    .filter(
-        StrategicObjective.project_id == project_id,
-        Activity.activity_date >= start_d,
-        Activity.activity_date <= end_d
-    )
-    .group_by(Activity.id, StrategicObjective.so_code, Indicator.indicator_code)
-    .order_by(Activity.activity_date.asc())
-    .all())
-
-    activities = []
-    for r in act_rows:
-        male = int(r.male)
-        female = int(r.female)
-        activities.append({
-            "date": str(r.activity_date),
-            "code": r.activity_code,
-            "title": r.title,
-            "so_code": r.so_code,
-            "indicator_code": r.indicator_code,
-            "status": r.status,
-            "location": r.location,
-            "male": male,
-            "female": female,
-            "total": male + female,
-        })
+        "code": code,
+        "statement": statement,
+        "male": male,
+        "female": female,
+        "total": male + female,
+    } for _, (code, statement, male, female) in sorted(ind_acc.items(), key=lambda kv: (kv[1][0], kv[0]))]
 
     return {
-        "project": project,
-        "start": start_d,
-        "end": end_d,
         "so_summary": so_summary,
         "ind_summary": ind_summary,
         "activities": activities,
     }
 
+def _period_filename(data, ext: str) -> str:
+    return f"period_report_{data['project'].id}_{data['start']}_to_{data['end']}.{ext}"
+
+def _period_tables(data):
+    """(title, header, rows factory) for each table of the DOCX/XLSX exports."""
+    return [
+        ("SO Summary", ["SO", "Title", "Male", "Female", "Total"],
+         lambda: ((r["so_code"], r["title"], r["male"], r["female"], r["total"])
+                  for r in data["so_summary"])),
+        ("Indicator Summary", ["Indicator", "Statement", "Male", "Female", "Total"],
+         lambda: ((r["code"], r["statement"], r["male"], r["female"], r["total"])
+                  for r in data["ind_summary"])),
+        ("Activities", ["Date", "Activity Code", "Title", "SO", "Indicator", "Status", "Location", "Male", "Female", "Total"],
+         lambda: ((a["date"], a["code"] or "", a["title"], a["so_code"], a["indicator_code"] or "",
+                   a["status"], a["location"] or "", a["male"], a["female"], a["total"])
+                  for a in data["activities"])),
+    ]
+
+def _write_period_xlsx(data, fileobj):
+    """Write the period workbook with openpyxl's write-only worksheets.
+
+    Write-only sheets emit <cols> before the first row, so column widths are
+    measured from the row values first, then the rows are streamed out; no
+    cell objects are ever kept in memory.
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    for title, header, rows in _period_tables(data):
+        ws = wb.create_sheet(title)
+
+        widths = [len(h) for h in header]
+        for row in rows():
+            for i, v in enumerate(row):
+                n = 0 if v is None else len(str(v))
+                if n > widths[i]:
+                    widths[i] = n
+        for i, w in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(w + 2, 60)
+
+        ws.append(header)
+        for row in rows():
+            ws.append(row)
+
+    wb.save(fileobj)
+
 @bp_reports.get("/")
+@read_only()
 def report_home():
     projects = Project.query.order_by(Project.created_at.desc()).all()
     return render_template("reports/home.html", projects=projects)
 
 @bp_reports.get("/period")
+@read_only()
 def report_period():
     project_id = request.args.get("project_id", type=int)
     start = request.args.get("start")
@@ -147,6 +229,7 @@ def report_period():
     )
 
 @bp_reports.get("/period/export/docx")
+@read_only()
 def export_period_docx():
     project_id = request.args.get("project_id", type=int)
     start = request.args.get("start")
@@ -158,93 +241,51 @@ def export_period_docx():
     start_d, end_d = _parse_dates(start, end)
     data = _get_period_data(project_id, start_d, end_d)
 
+    bio = BytesIO()
+    _write_period_docx(data, bio)
+    bio.seek(0)
+
+    filename = _period_filename(data, "docx")
+    return send_file(
+        bio,
+        as_attachment=True,
+        download_name=filename,
+        mimetype=DOCX_MIMETYPE
+    )
+
+def _write_period_docx(data, fileobj):
     from docx import Document
+    from services.docx_tables import add_table
 
     doc = Document()
     doc.add_heading("Period Report", level=1)
     doc.add_paragraph(f"Project: {data['project'].name}")
     doc.add_paragraph(f"Period: {data['start']} to {data['end']}")
 
+    (_, so_header, so_rows), (_, ind_header, ind_rows), (_, act_header, act_rows) = _period_tables(data)
+
     doc.add_heading("Reach by Strategic Objective", level=2)
     if not data["so_summary"]:
         doc.add_paragraph("No attendance found in this period.")
     else:
-        t = doc.add_table(rows=1, cols=5)
-        hdr = t.rows[0].cells
-        hdr[0].text = "SO"
-        hdr[1].text = "Title"
-        hdr[2].text = "Male"
-        hdr[3].text = "Female"
-        hdr[4].text = "Total"
-        for r in data["so_summary"]:
-            row = t.add_row().cells
-            row[0].text = r["so_code"]
-            row[1].text = r["title"]
-            row[2].text = str(r["male"])
-            row[3].text = str(r["female"])
-            row[4].text = str(r["total"])
+        add_table(doc, so_header, so_rows())
 
     doc.add_heading("Reach by Indicator", level=2)
     if not data["ind_summary"]:
         doc.add_paragraph("No linked-indicator attendance found in this period.")
     else:
-        t = doc.add_table(rows=1, cols=5)
-        hdr = t.rows[0].cells
-        hdr[0].text = "Indicator"
-        hdr[1].text = "Statement"
-        hdr[2].text = "Male"
-        hdr[3].text = "Female"
-        hdr[4].text = "Total"
-        for r in data["ind_summary"]:
-            row = t.add_row().cells
-            row[0].text = r["code"]
-            row[1].text = r["statement"]
-            row[2].text = str(r["male"])
-            row[3].text = str(r["female"])
-            row[4].text = str(r["total"])
+        add_table(doc, ind_header, ind_rows())
 
     doc.add_heading("Activities in Period", level=2)
     if not data["activities"]:
         doc.add_paragraph("No activities found in this period.")
     else:
-        t = doc.add_table(rows=1, cols=10)
-        hdr = t.rows[0].cells
-        hdr[0].text = "Date"
-        hdr[1].text = "Activity Code"
-        hdr[2].text = "Title"
-        hdr[3].text = "SO"
-        hdr[4].text = "Indicator"
-        hdr[5].text = "Status"
-        hdr[6].text = "Location"
-        hdr[7].text = "Male"
-        hdr[8].text = "Female"
-        hdr[9].text = "Total"
-        for a in data["activities"]:
-            row = t.add_row().cells
-            row[0].text = a["date"]
-            row[1].text = a["code"] or ""
-            row[2].text = a["title"]
-            row[3].text = a["so_code"]
-            row[4].text = a["indicator_code"] or ""
-            row[5].text = a["status"]
-            row[6].text = a["location"] or ""
-            row[7].text = str(a["male"])
-            row[8].text = str(a["female"])
-            row[9].text = str(a["total"])
+        add_table(doc, act_header, act_rows())
 
-    bio = BytesIO()
-    doc.save(bio)
-    bio.seek(0)
-
-    filename = f"period_report_{data['project'].id}_{data['start']}_to_{data['end']}.docx"
-    return send_file(
-        bio,
-        as_attachment=True,
-        download_name=filename,
-        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    )
+    doc.save(fileobj)
 
 @bp_reports.get("/period/export/xlsx")
+@read_only()
 def export_period_xlsx():
     project_id = request.args.get("project_id", type=int)
     start = request.args.get("start")
@@ -256,48 +297,46 @@ def export_period_xlsx():
     start_d, end_d = _parse_dates(start, end)
     data = _get_period_data(project_id, start_d, end_d)
 
-    from openpyxl import Workbook
-    from openpyxl.utils import get_column_letter
-
-    wb = Workbook()
-
-    ws1 = wb.active
-    ws1.title = "SO Summary"
-    ws1.append(["SO", "Title", "Male", "Female", "Total"])
-    for r in data["so_summary"]:
-        ws1.append([r["so_code"], r["title"], r["male"], r["female"], r["total"]])
-
-    ws2 = wb.create_sheet("Indicator Summary")
-    ws2.append(["Indicator", "Statement", "Male", "Female", "Total"])
-    for r in data["ind_summary"]:
-        ws2.append([r["code"], r["statement"], r["male"], r["female"], r["total"]])
-
-    ws3 = wb.create_sheet("Activities")
-    ws3.append(["Date", "Activity Code", "Title", "SO", "Indicator", "Status", "Location", "Male", "Female", "Total"])
-    for a in data["activities"]:
-        ws3.append([
-            a["date"], a["code"] or "", a["title"], a["so_code"], a["indicator_code"] or "",
-            a["status"], a["location"] or "", a["male"], a["female"], a["total"]
-        ])
-
-    for ws in (ws1, ws2, ws3):
-        for col in range(1, ws.max_column + 1):
-            max_len = 0
-            col_letter = get_column_letter(col)
-            for cell in ws[col_letter]:
-                v = "" if cell.value is None else str(cell.value)
-                if len(v) > max_len:
-                    max_len = len(v)
-            ws.column_dimensions[col_letter].width = min(max_len + 2, 60)
+    # Written to a temporary file and streamed back from disk, so memory
+    # stays flat regardless of how many activities are in the period.
+    out = tempfile.TemporaryFile()
+    _write_period_xlsx(data, out)
+    out.seek(0)
 
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-
-    filename = f"period_report_{data['project'].id}_{data['start']}_to_{data['end']}.xlsx"
+    filename = _period_filename(data, "xlsx")
     return send_file(
-        bio,
+        out,
         as_attachment=True,
         download_name=filename,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mimetype=XLSX_MIMETYPE
     )
+
+@export_job("period_docx", "docx")
+@read_only()
+def _period_docx_job(params, fileobj):
+    start_d, end_d = _parse_dates(params["start"], params["end"])
+    data = _get_period_data(params["project_id"], start_d, end_d)
+    _write_period_docx(data, fileobj)
+    return _period_filename(data, "docx"), DOCX_MIMETYPE
+
+@export_job("period_xlsx", "xlsx")
+@read_only()
+def _period_xlsx_job(params, fileobj):
+    start_d, end_d = _parse_dates(params["start"], params["end"])
+    data = _get_period_data(params["project_id"], start_d, end_d)
+    _write_period_xlsx(data, fileobj)
+    return _period_filename(data, "xlsx"), XLSX_MIMETYPE
+
+@bp_reports.post("/period/export/<fmt>/job")
+def queue_period_export(fmt):
+    if fmt not in ("docx", "xlsx"):
+        abort(404)
+    project_id = request.form.get("project_id", type=int)
+    start = request.form.get("start")
+    end = request.form.get("end")
+    if not project_id or not start or not end:
+        flash("Project, start and end are required.", "error")
+        return redirect(url_for("reports.report_period"))
+
+    job = submit(f"period_{fmt}", {"project_id": project_id, "start": start, "end": end})
+    return redirect(url_for("jobs.view_job", job_id=job.id))
@@ -1,19 +1,42 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import Project, StrategicObjective
 from routes import bp_sos
+from services.pagination import keyset_page, page_size
 
 @bp_sos.get("/")
 def list_sos():
     project_id = request.args.get("project_id", type=int)
-    projects = Project.query.order_by(Project.created_at.desc()).all()
 
-    q = StrategicObjective.query
+    # s.project.name is shown per row
+    q = StrategicObjective.query.options(joinedload(StrategicObjective.project))
     if project_id:
         q = q.filter_by(project_id=project_id)
 
-    sos = q.order_by(StrategicObjective.created_at.desc()).all()
-    return render_template("sos/list.html", sos=sos, projects=projects, project_id=project_id)
+    after = request.args.get("after")
+    page = keyset_page(q, StrategicObjective.created_at, StrategicObjective.id, after,
+                       page_size(request.args, current_app.config.get("LIST_PAGE_SIZE", 50)))
+
+    if request.args.get("format") == "json":
+        return jsonify({
+            "items": [{
+                "id": s.id,
+                "so_code": s.so_code,
+                "title": s.title,
+                "project_id": s.project_id,
+                "project_name": s.project.name,
+            } for s in page.items],
+            "next_cursor": page.next_cursor,
+            "next_url": url_for("sos.list_sos", project_id=project_id, after=page.next_cursor, format="json")
+                        if page.has_next else None,
+        })
+
+    projects = Project.query.order_by(Project.created_at.desc()).all()
+    return render_template("sos/list.html", sos=page.items, projects=projects, project_id=project_id,
+                           next_url=url_for("sos.list_sos", project_id=project_id, after=page.next_cursor)
+                                    if page.has_next else None,
+                           first_url=url_for("sos.list_sos", project_id=project_id) if after else None)
 
 @bp_sos.get("/create")
 def create_so_form():
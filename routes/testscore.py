@@ -1,17 +1,29 @@
+import hashlib
+import json
 import os
 import uuid
 import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import click
 
 from io import BytesIO
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, session, send_file
+from flask import render_template, request, redirect, url_for, flash, session, send_file, abort, jsonify
 
 from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from extensions import db
+from models import AnalysisRun
 from routes import bp_testscore
+from services.chart_cache import cached_png
+from services.chart_render import chart_kinds, render_png
+from services.parsed_cache import ParsedUpload, parsed_upload
+from services.score_stats import (
+    CellSummaries, GainSums, PairSample, ScoreSummary, dump_summary, load_summary, merge_groups, summarize_groups,
+)
+from services.testscore_batch import analyze_paths, expand_uploads, save_upload
+from services.jobs import export_job, submit
 from typing import Union
 
 # File handling
@@ -26,6 +38,17 @@ def _base_dirs():
     os.makedirs(charts, exist_ok=True)
     return uploads, charts
 
+def _parsed_dir():
+    # Columnar copies of parsed uploads (services.parsed_cache)
+    return os.path.join(current_app.root_path, "uploads", "testscore_parsed")
+
+def _file_hash(filepath: str) -> str:
+    h = hashlib.sha256()
+    with open(filepath, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -36,83 +59,272 @@ def read_dataset(filepath: str) -> pd.DataFrame:
     return pd.read_excel(filepath)
 
 def analyze_data(df: pd.DataFrame, disaggregate: bool = False):
-    # Normalize columns
-    cols = {c.strip().lower(): c for c in df.columns}
-    if "pre_test" not in cols or "post_test" not in cols:
-        raise ValueError("Dataset must contain 'pre_test' and 'post_test' columns.")
-
-    pre = df[cols["pre_test"]]
-    post = df[cols["post_test"]]
-
-    overall = {
-        "n": int(len(df)),
-        "mean_pre": float(np.nanmean(pre)),
-        "mean_post": float(np.nanmean(post)),
-        "gain": float(np.nanmean(post) - np.nanmean(pre)),
-        "pct_gain": float(((np.nanmean(post) - np.nanmean(pre)) / np.nanmean(pre)) * 100) if np.nanmean(pre) != 0 else 0.0,  # Fixed condition
-    }  # Ensure the dictionary is properly closed
+    return summary_results(*summarize_data(df, disaggregate))
+
+# Participants kept (uniformly sampled) for slopegraphs
+SLOPEGRAPH_SAMPLE = 1000
+
+def summarize_data(df: pd.DataFrame, disaggregate: bool = False, breakdowns=()):
+    """``(ScoreSummary, {gender: ScoreSummary} or None)`` for a loaded dataset."""
+    pre_col, post_col, gcol = _analysis_columns(df.columns, disaggregate)
+    item_pre, item_post, item_labels = _gain_pairs(df.columns)
+    dims = _breakdown_columns(df.columns, _with_default_breakdowns(df.columns, breakdowns))
+    return _summarize(
+        df[pre_col].to_numpy(), df[post_col].to_numpy(), df[gcol] if gcol else None,
+        item_labels, _score_block(df, item_pre), _score_block(df, item_post),
+        [(name, df[col]) for name, col in dims],
+    )
 
+def _summarize(pre, post, gender, item_labels, item_pre, item_post, dims=None):
+    items = GainSums.of(item_labels, item_pre, item_post) if item_labels else None
+    overall = ScoreSummary.of(pre, post, items)
+    groups = None
+    if gender is not None:
+        labels, codes = _gender_codes(gender)
+        groups = summarize_groups(codes, labels, pre, post, item_labels, item_pre, item_post)
+    overall.sample = PairSample.of(pre, post, SLOPEGRAPH_SAMPLE)
+    if dims:
+        # One pass at the finest grain; every breakdown table is rolled up from these cells
+        coded = [_dimension_codes(col) for _, col in dims]
+        overall.cells = CellSummaries.of(
+            [name for name, _ in dims], [c for _, c in coded], [lab for lab, _ in coded], pre, post
+        )
+    return overall, groups
+
+def summary_results(overall: ScoreSummary, groups):
+    """The ``(overall, gender_df)`` pair shown in reports, from summaries."""
     gender_df = None
+    if groups is not None:
+        gender_df = pd.DataFrame(
+            [(label, s.rows, s.pre.mean, s.post.mean) for label, s in sorted(groups.items())],
+            columns=["gender", "n", "mean_pre", "mean_post"],
+        )
+        gender_df["gain"] = gender_df["mean_post"] - gender_df["mean_pre"]
+    return overall.metrics(), gender_df
 
+def _analysis_columns(header, disaggregate: bool):
+    cols = {c.strip().lower(): c for c in header}
+    if "pre_test" not in cols or "post_test" not in cols:
+        raise ValueError("Dataset must contain 'pre_test' and 'post_test' columns.")
+    gcol = None
     if disaggregate:
         # accept 'gender' or 'gend' columns (as in your analyzer)
         gcol = cols.get("gender") or cols.get("gend")
         if not gcol:
             raise ValueError("To disaggregate by gender, dataset must include 'gender' (or 'gend') column.")
+    return cols["pre_test"], cols["post_test"], gcol
+
+def _gain_pairs(header):
+    """``(pre columns, post columns, labels)`` of the ``pre_x`` / ``post_x`` item pairs.
+
+    ``pre_test`` / ``post_test`` (the overall score) is not an item.
+    """
+    cols = {c.strip().lower(): c for c in header}
+    pairs = [
+        (cols[name], cols[f"post_{name[4:]}"], name[4:])
+        for name in cols
+        if name.startswith("pre_") and name != "pre_test" and f"post_{name[4:]}" in cols
+    ]
+    return [p[0] for p in pairs], [p[1] for p in pairs], [p[2] for p in pairs]
+
+def _score_block(df: pd.DataFrame, cols) -> np.ndarray:
+    """(rows x len(cols)) float64 block of score columns; non-numeric values become NaN."""
+    block = df[cols]
+    if not all(dt.kind in "iuf" for dt in block.dtypes):
+        block = block.apply(pd.to_numeric, errors="coerce")
+    return block.to_numpy(dtype=np.float64)
+
+def parse_breakdowns(text: str):
+    """Grouping sets from a spec like ``"school, class, school*gender"``.
+
+    Each comma-separated entry is one breakdown table; ``*`` crosses columns.
+    Names are matched case-insensitively, like pre_test/post_test.
+    """
+    sets = []
+    for entry in (text or "").split(","):
+        dims = tuple(dict.fromkeys(d.strip().lower() for d in entry.split("*") if d.strip()))
+        if dims and dims not in sets:
+            sets.append(dims)
+    if len(_breakdown_key(sets)) > 255:
+        raise ValueError("Too many breakdowns requested.")
+    return sets
+
+def _breakdown_key(breakdowns) -> str:
+    # Stored with runs, so each set of breakdowns of a file is its own run
+    return ",".join("*".join(dims) for dims in breakdowns)
+
+# Breakdown table added to the analysis of every sheet that has a class column
+DEFAULT_BREAKDOWN = ("class",)
+
+def _with_default_breakdowns(header, breakdowns):
+    """``breakdowns`` plus ``DEFAULT_BREAKDOWN`` when the sheet has that column and it was not asked for."""
+    names = {c.strip().lower() for c in header}
+    if all(d in names for d in DEFAULT_BREAKDOWN) and DEFAULT_BREAKDOWN not in breakdowns:
+        return [*breakdowns, DEFAULT_BREAKDOWN]
+    return breakdowns
+
+def _breakdown_columns(header, breakdowns):
+    """``(name, column)`` for every column named in ``breakdowns``, once each."""
+    cols = {c.strip().lower(): c for c in header}
+    names = list(dict.fromkeys(d for dims in breakdowns for d in dims))
+    missing = [n for n in names if n not in cols]
+    if missing:
+        raise ValueError(f"Breakdown column(s) not found in dataset: {', '.join(missing)}.")
+    return [(n, cols[n]) for n in names]
+
+def _dimension_codes(col: pd.Series):
+    """Labels and per-row codes of a breakdown column; missing values become "Missing"."""
+    g = col.astype("category").cat
+    names = np.append(g.categories.astype(str).str.strip().to_numpy(object), "Missing")
+    labels, label_idx = np.unique(names, return_inverse=True)
+    return labels.tolist(), label_idx[g.codes.to_numpy()]
+
+def _gender_codes(col: pd.Series):
+    """Group labels and per-row codes for a gender column.
+
+    Labels are stripped and title-cased; missing values become "Nan" (what
+    ``astype(str).str.title()`` gives). Only the distinct categories are
+    normalised, not every row.
+    """
+    g = col.astype("category").cat
+    names = np.append(g.categories.astype(str).str.strip().str.title().to_numpy(object), "Nan")
+    labels, label_idx = np.unique(names, return_inverse=True)
+    # code -1 (missing) picks the trailing "Nan"
+    return labels.tolist(), label_idx[g.codes.to_numpy()]
+
+def summarize_csv_chunked(filepath: str, disaggregate: bool = False, chunksize: int = 200_000, breakdowns=()):
+    """``summarize_data(read_dataset(filepath))`` for a CSV, in bounded memory.
+
+    Only the score (gender and breakdown) columns are read, ``chunksize`` rows
+    at a time, as float64 / categorical; each chunk's summary is merged into
+    the total. Most of the memory saved comes from ``usecols``; the scores
+    stay float64 so the result does not depend on which path read the file.
+    """
+    header = pd.read_csv(filepath, nrows=0).columns
+    pre_col, post_col, gcol = _analysis_columns(header, disaggregate)
+    item_pre, item_post, item_labels = _gain_pairs(header)
+    dims = _breakdown_columns(header, _with_default_breakdowns(header, breakdowns))
+    dim_cols = [col for _, col in dims]
+    usecols = list(dict.fromkeys([pre_col, post_col] + ([gcol] if gcol else []) + dim_cols + item_pre + item_post))
+    dtype = {pre_col: "float64", post_col: "float64"}
+    for col in ([gcol] if gcol else []) + dim_cols:
+        dtype[col] = "category"
+
+    overall = ScoreSummary()
+    groups = {} if gcol else None
+    for chunk in pd.read_csv(filepath, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        o, g = _summarize(
+            chunk[pre_col].to_numpy(), chunk[post_col].to_numpy(), chunk[gcol] if gcol else None,
+            item_labels, _score_block(chunk, item_pre), _score_block(chunk, item_post),
+            [(name, chunk[col]) for name, col in dims],
+        )
+        overall.merge(o)
+        if gcol:
+            merge_groups(groups, g)
+    return overall, groups
+
+def analyze_csv_chunked(filepath: str, disaggregate: bool = False, chunksize: int = 200_000):
+    return summary_results(*summarize_csv_chunked(filepath, disaggregate, chunksize))
+
+def summarize_parsed(parsed: ParsedUpload, disaggregate: bool = False, breakdowns=()):
+    """``summarize_data`` on a cached upload, reading the score columns straight from its blocks."""
+    pre_col, post_col, gcol = _analysis_columns(parsed.columns, disaggregate)
+    item_pre, item_post, item_labels = _gain_pairs(parsed.columns)
+    dims = _breakdown_columns(parsed.columns, _with_default_breakdowns(parsed.columns, breakdowns))
+    return _summarize(
+        parsed.numeric(pre_col), parsed.numeric(post_col), parsed.series(gcol) if gcol else None,
+        item_labels, parsed.numeric_block(item_pre), parsed.numeric_block(item_post),
+        [(name, parsed.series(col)) for name, col in dims],
+    )
 
-        tmp = df.copy()
-        tmp["_gender"] = tmp[gcol].astype(str).str.strip().str.title()
-        gender_df = tmp.groupby("_gender").agg(
-            n=(" _gender".strip(), "count"),
-            mean_pre=(cols["pre_test"], "mean"),
-            mean_post=(cols["post_test"], "mean"),
-        ).reset_index()
-
-        gender_df["gain"] = gender_df["mean_post"] - gender_df["mean_pre"]
-        # Convert to python-native types for safe templating
-        gender_df = gender_df.rename(columns={"_gender": "gender"})
+def summarize_file(filepath: str, disaggregate: bool = False, breakdowns=()):
+    """Summarise an uploaded file.
+
+    Large CSVs are streamed instead of loaded whole; everything else is parsed
+    once and then read back from the columnar cache.
+    """
+    cfg = current_app.config
+    if (filepath.rsplit(".", 1)[1].lower() == "csv"
+            and os.path.getsize(filepath) >= cfg.get("TESTSCORE_STREAM_MIN_BYTES", 0)):
+        return summarize_csv_chunked(filepath, disaggregate, chunksize=cfg.get("TESTSCORE_CHUNK_ROWS", 200_000),
+                                     breakdowns=breakdowns)
+    parsed = parsed_upload(_parsed_dir(), _file_hash(filepath), filepath, read_dataset)
+    return summarize_parsed(parsed, disaggregate, breakdowns)
+
+def analyze_file(filepath: str, disaggregate: bool = False):
+    return summary_results(*summarize_file(filepath, disaggregate))
+
+# Bump when the chart drawing code changes, so cached PNGs are not reused
+CHART_STYLE_VERSION = 2
+
+def _num(v):
+    # NaN is not valid JSON; Chart.js draws null as a gap
+    return None if v is None or v != v else float(v)
+
+def _grouped_bars(chart_id: str, title: str, labels, rows) -> dict:
+    return {
+        "id": chart_id, "kind": "grouped_bars", "title": title, "ylabel": "Score",
+        "labels": [str(label) for label in labels],
+        "series": [["Pre-test", [_num(r["mean_pre"]) for r in rows]],
+                   ["Post-test", [_num(r["mean_post"]) for r in rows]]],
+    }
+
+def chart_specs(overall: dict, gender_rows, breakdowns, sample: PairSample = None):
+    """Charts of an analysis as plain data.
+
+    The report page draws them with Chart.js; exports draw the same specs with
+    ``services.chart_render``.
+    """
+    specs = [{
+        "id": "overall", "kind": "bars", "title": "Average Scores (Overall)", "ylabel": "Score",
+        "labels": ["Pre-test", "Post-test"], "values": [_num(overall["mean_pre"]), _num(overall["mean_post"])],
+    }]
+    if gender_rows:
+        specs.append(_grouped_bars("gender", "Average Scores by Gender",
+                                   [r["gender"] for r in gender_rows], gender_rows))
+    for table in breakdowns or []:
+        if len(table["dims"]) == 1:
+            dim = table["dims"][0]
+            specs.append(_grouped_bars(f"by_{dim}", f"Average Scores by {dim.title()}",
+                                       [r["labels"][0] for r in table["rows"]], table["rows"]))
+
+    groups = [("Overall", overall)] + [(r["gender"], r) for r in gender_rows or []]
+    specs.append({
+        "id": "dumbbell", "kind": "dumbbell", "title": "Knowledge Gap (Pre → Post)", "xlabel": "Mean Score",
+        "labels": [str(label) for label, _ in groups],
+        "pre": [_num(r["mean_pre"]) for _, r in groups],
+        "post": [_num(r["mean_post"]) for _, r in groups],
+    })
+
+    if sample is not None and sample.pre.size:
+        specs.append({
+            "id": "slopegraph", "kind": "slopegraph", "ylabel": "Score",
+            "title": f"Individual Journeys (Slopegraph, {sample.pre.size} of {overall['n']})",
+            "pre": sample.pre.tolist(), "post": sample.post.tolist(),
+        })
+    return specs
+
+def _chart_path(spec: dict) -> str:
+    """File of the PNG for a chart spec; identical specs reuse the cached PNG."""
+    uploads, charts = _base_dirs()
+    spec = {"figsize": (6.2, 3.4), "dpi": 160, **spec, "style": CHART_STYLE_VERSION}
+    workers = current_app.config.get("CHART_RENDER_WORKERS", 0)
 
-    return overall, gender_df
+    def render(path):
+        with open(path, "wb") as fh:
+            fh.write(render_png(spec["kind"], spec, workers))
 
-def _save_chart(fig, charts_dir: str, prefix: str) -> str:
-    name = f"{prefix}_{uuid.uuid4().hex}.png"
-    out = os.path.join(charts_dir, name)
-    fig.tight_layout()
-    fig.savefig(out, dpi=160)
-    plt.close(fig)
-    # Return web path for templates
-    return f"/static/charts/testscore/{name}"
+    name = cached_png(charts, spec["id"], spec, render,
+                      max_bytes=current_app.config.get("CHART_CACHE_MAX_BYTES", 0))
+    return os.path.join(charts, name)
 
-def generate_chart(mean_pre: float, mean_post: float) -> str:
-    uploads, charts = _base_dirs()
-    fig = plt.figure(figsize=(5.5, 3.2))
-    ax = fig.add_subplot(111)
-    ax.bar(["Pre-test", "Post-test"], [mean_pre, mean_post])
-    ax.set_title("Average Scores (Overall)")
-    ax.set_ylabel("Score")
-    return _save_chart(fig, charts, "overall")
-
-def generate_gender_chart(gender_df: pd.DataFrame) -> str:
-    uploads, charts = _base_dirs()
-    fig = plt.figure(figsize=(6.2, 3.4))
-    ax = fig.add_subplot(111)
-    labels = gender_df["gender"].tolist()
-    pre = gender_df["mean_pre"].tolist()
-    post = gender_df["mean_post"].tolist()
-
-    x = np.arange(len(labels))
-    w = 0.35
-    ax.bar(x - w/2, pre, width=w, label="Pre-test")
-    ax.bar(x + w/2, post, width=w, label="Post-test")
-    ax.set_xticks(x)
-    ax.set_xticklabels(labels)
-    ax.set_ylabel("Score")
-    ax.set_title("Average Scores by Gender")
-    ax.legend()
-    return _save_chart(fig, charts, "gender")
+def _export_charts(charts):
+    """``(title, PNG path)`` of the charts the server can draw, for reports."""
+    kinds = chart_kinds()
+    return [(spec["title"], _chart_path(spec)) for spec in charts or [] if spec["kind"] in kinds]
 
 # def generate_narrative(overall: dict, gender_df: pd.DataFrame | None) -> str:
-def generate_narrative(overall: dict, gender_df: Union[pd.DataFrame, None]) -> str:
+def generate_narrative(overall: dict, gender_df: Union[pd.DataFrame, None], item_rows=None) -> str:
     lines = []
     lines.append(f"A total of {overall['n']} participants completed both the pre-test and post-test.")
     lines.append(f"The average pre-test score was {overall['mean_pre']:.2f}, while the average post-test score was {overall['mean_post']:.2f}.")
@@ -125,8 +337,142 @@ def generate_narrative(overall: dict, gender_df: Union[pd.DataFrame, None]) -> s
                 f"{r['gender']}: pre {float(r['mean_pre']):.2f} → post {float(r['mean_post']):.2f} (gain {float(r['gain']):.2f})"
             )
         lines.append("Disaggregated by gender, performance changed as follows: " + "; ".join(parts) + ".")
+
+    scored = [r for r in item_rows or [] if r["n"]]
+    if scored:
+        low = min(scored, key=lambda r: r["gain"])
+        high = max(scored, key=lambda r: r["gain"])
+        lines.append(
+            f"Across {len(scored)} item(s), mean gains ranged from {low['gain']:.2f} ({low['metric']}) "
+            f"to {high['gain']:.2f} ({high['metric']})."
+        )
     return "\n".join(lines)
 
+def summary_items(overall: ScoreSummary, groups):
+    """Per-item rows for reports (None without pre_x/post_x pairs); ``groups`` holds each group's gain."""
+    if overall.items is None:
+        return None
+    rows = overall.items.metrics()
+    for label, s in sorted((groups or {}).items()):
+        gains = {r["metric"]: r["gain"] for r in s.items.metrics()} if s.items is not None else {}
+        for r in rows:
+            r.setdefault("groups", {})[label] = gains.get(r["metric"], float("nan"))
+    return rows
+
+def summary_breakdowns(overall: ScoreSummary, breakdowns):
+    """One table per grouping set (None without breakdowns), rolled up from ``overall.cells``.
+
+    The ``DEFAULT_BREAKDOWN`` table is included whenever the cells have its columns.
+    """
+    if overall.cells is None:
+        return None
+    breakdowns = _with_default_breakdowns(overall.cells.dims, breakdowns)
+    return [
+        {
+            "dims": list(dims),
+            "rows": [{"labels": list(labels), **s.metrics()}
+                     for labels, s in sorted(overall.cells.rollup(dims).items())],
+        }
+        for dims in breakdowns
+    ]
+
+def analyze_upload(filepath: str, disaggregate: bool = False, breakdowns=()) -> dict:
+    """Everything stored for an analysis run of one file."""
+    return _analysis_result(*summarize_file(filepath, disaggregate, breakdowns), breakdowns=breakdowns)
+
+def _analysis_result(overall_summary: ScoreSummary, groups, breakdowns=()) -> dict:
+    overall, gender_df = summary_results(overall_summary, groups)
+    item_rows = summary_items(overall_summary, groups)
+
+    return {
+        "overall": overall,
+        "gender_rows": gender_df.to_dict(orient="records") if gender_df is not None else None,
+        "item_rows": item_rows,
+        "breakdowns": summary_breakdowns(overall_summary, breakdowns),
+        "narrative": generate_narrative(overall, gender_df, item_rows),
+        "summary": dump_summary(overall_summary, groups),
+    }
+
+# Bump when analyze_data/generate_narrative output changes, so stored runs are recomputed
+ANALYSIS_VERSION = 6
+
+# Keys used before runs were stored in the DB; dropped from old sessions
+_LEGACY_SESSION_KEYS = ("testscore_overall", "testscore_gender", "testscore_narrative",
+                        "testscore_overall_chart", "testscore_gender_chart")
+
+def _find_run(content_hash: str, disaggregate: bool, breakdowns=()):
+    return AnalysisRun.query.filter_by(
+        content_hash=content_hash, disaggregate=disaggregate, dimensions=_breakdown_key(breakdowns),
+        analysis_version=ANALYSIS_VERSION,
+    ).first()
+
+def _save_run(content_hash: str, disaggregate: bool, filename: str, result: dict, breakdowns=()):
+    run = AnalysisRun(
+        id=uuid.uuid4().hex,
+        content_hash=content_hash,
+        disaggregate=disaggregate,
+        dimensions=_breakdown_key(breakdowns),
+        analysis_version=ANALYSIS_VERSION,
+        filename=filename,
+        overall=json.dumps(result["overall"]),
+        gender_rows=json.dumps(result["gender_rows"]) if result["gender_rows"] is not None else None,
+        item_rows=json.dumps(result["item_rows"]) if result["item_rows"] is not None else None,
+        breakdowns=json.dumps(result["breakdowns"]) if result["breakdowns"] is not None else None,
+        narrative=result["narrative"],
+        summary=result["summary"],
+    )
+    db.session.add(run)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The same file was analysed concurrently; use the stored run
+        db.session.rollback()
+        run = _find_run(content_hash, disaggregate, breakdowns)
+    return run
+
+def _run_results(run: AnalysisRun):
+    gender_rows = json.loads(run.gender_rows) if run.gender_rows else None
+    return json.loads(run.overall), gender_rows, run.narrative
+
+def _run_items(run: AnalysisRun):
+    return json.loads(run.item_rows) if run.item_rows else None
+
+def _run_breakdowns(run: AnalysisRun):
+    return json.loads(run.breakdowns) if run.breakdowns else None
+
+def _run_charts(run: AnalysisRun):
+    overall, gender_rows, _ = _run_results(run)
+    sample = load_summary(run.summary)[0].sample if run.summary else None
+    return chart_specs(overall, gender_rows, _run_breakdowns(run), sample)
+
+def _report_extras(run: AnalysisRun) -> dict:
+    """Keyword arguments of the report writers beyond the overall results."""
+    return {"item_rows": _run_items(run), "breakdowns": _run_breakdowns(run), "charts": _run_charts(run)}
+
+def _use_run(run: AnalysisRun):
+    # store for export
+    for key in _LEGACY_SESSION_KEYS:
+        session.pop(key, None)
+    session["testscore_run"] = run.id
+
+def _current_run():
+    run_id = session.get("testscore_run")
+    return db.session.get(AnalysisRun, run_id) if run_id else None
+
+def _render_run(run: AnalysisRun):
+    overall, gender_rows, narrative = _run_results(run)
+
+    # Charts are drawn in the browser from run_charts()
+    return render_template(
+        "testscore/report.html",
+        overall=overall,
+        gender_rows=gender_rows,
+        item_rows=_run_items(run),
+        breakdowns=_run_breakdowns(run),
+        narrative=narrative,
+        charts_url=url_for("testscore.run_charts", run_id=run.id),
+    )
+
 @bp_testscore.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
@@ -137,55 +483,244 @@ def index():
             flash("Please upload a valid CSV or Excel file.", "error")
             return redirect(url_for("testscore.index"))
 
-        uploads_dir, charts_dir = _base_dirs()
-        safe_name = f"{uuid.uuid4().hex}_{file.filename}"
-        filepath = os.path.join(uploads_dir, safe_name)
-        file.save(filepath)
-
         try:
-            df = read_dataset(filepath)
-            overall, gender_df = analyze_data(df, disaggregate=disaggregate)
-
-            overall_chart_path = generate_chart(overall["mean_pre"], overall["mean_post"])
-            gender_chart_path = None
-            if gender_df is not None and not gender_df.empty:
-                gender_chart_path = generate_gender_chart(gender_df)
-
-            narrative = generate_narrative(overall, gender_df)
-
-            # store for export
-            session["testscore_overall"] = overall
-            session["testscore_gender"] = gender_df.to_dict(orient="records") if gender_df is not None else None
-            session["testscore_narrative"] = narrative
-            session["testscore_overall_chart"] = overall_chart_path
-            session["testscore_gender_chart"] = gender_chart_path
-
-            return render_template(
-                "testscore/report.html",
-                overall=overall,
-                gender_rows=session["testscore_gender"],
-                narrative=narrative,
-                overall_chart_path=overall_chart_path,
-                gender_chart_path=gender_chart_path,
-            )
-
-        except Exception as e:
+            breakdowns = parse_breakdowns(request.form.get("breakdowns"))
+        except ValueError as e:
             flash(str(e), "error")
             return redirect(url_for("testscore.index"))
 
+        data = file.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+        run = _find_run(content_hash, disaggregate, breakdowns)
+
+        if run is None:
+            uploads_dir, charts_dir = _base_dirs()
+            filepath = save_upload(uploads_dir, file.filename, data)
+
+            try:
+                result = analyze_upload(filepath, disaggregate=disaggregate, breakdowns=breakdowns)
+            except Exception as e:
+                flash(str(e), "error")
+                return redirect(url_for("testscore.index"))
+
+            run = _save_run(content_hash, disaggregate, file.filename, result, breakdowns)
+
+        _use_run(run)
+        return _render_run(run)
+
     return render_template("testscore/index.html")
 
+@bp_testscore.get("/runs/<run_id>")
+def view_run(run_id):
+    run = db.get_or_404(AnalysisRun, run_id)
+    _use_run(run)
+    return _render_run(run)
+
+@bp_testscore.get("/runs/<run_id>/charts")
+def run_charts(run_id):
+    run = db.get_or_404(AnalysisRun, run_id)
+    return jsonify({"run_id": run.id, "charts": _run_charts(run)})
+
+def run_batch(datasets, disaggregate: bool, workers: int = None, breakdowns=()):
+    """Analyse ``(filename, bytes)`` datasets, reusing stored runs.
+
+    Returns ``(entries, combined)``: one ``(filename, run, error)`` per dataset
+    (``run`` is None when the file failed) and the run for all successful
+    files together, or None if none succeeded.
+    """
+    uploads_dir, charts_dir = _base_dirs()
+    entries = []
+    pending = {}  # content hash -> (filename, saved path)
+    for filename, data in datasets:
+        content_hash = hashlib.sha256(data).hexdigest()
+        run = _find_run(content_hash, disaggregate, breakdowns)
+        if run is None and content_hash not in pending:
+            pending[content_hash] = (filename, save_upload(uploads_dir, filename, data))
+        entries.append((filename, content_hash, run))
+
+    hashes = list(pending)
+    outcomes = analyze_paths([pending[h][1] for h in hashes], disaggregate, workers, breakdowns)
+    new_runs, errors = {}, {}
+    for content_hash, (result, error) in zip(hashes, outcomes):
+        if error is None:
+            new_runs[content_hash] = _save_run(content_hash, disaggregate, pending[content_hash][0], result,
+                                               breakdowns)
+        else:
+            errors[content_hash] = error
+
+    rows = []
+    for filename, content_hash, run in entries:
+        run = run or new_runs.get(content_hash)
+        rows.append((filename, run, errors.get(content_hash)))
+
+    runs = list({r.id: r for _, r, _ in rows if r is not None}.values())
+    return rows, _combined_run(runs, disaggregate, breakdowns) if runs else None
+
+def _share_cell_dims(summaries):
+    """Roll each summary's cells up to the columns all of them have, so they merge.
+
+    Files of a batch can only differ in the ``DEFAULT_BREAKDOWN`` columns (a
+    file missing a requested column fails), so the combined run keeps the
+    class table only if every file has a class column.
+    """
+    dims = None
+    for o in summaries:
+        have = o.cells.dims if o.cells is not None else []
+        dims = list(have) if dims is None else [d for d in dims if d in have]
+    for o in summaries:
+        if o.cells is not None and o.cells.dims != dims:
+            o.cells = CellSummaries(dims, o.cells.rollup(dims)) if dims else None
+
+def _combined_run(runs, disaggregate: bool, breakdowns=()):
+    """Run for the union of ``runs``, merged from their stored summaries."""
+    members = sorted({r.content_hash for r in runs})
+    content_hash = hashlib.sha256(("batch\n" + "\n".join(members)).encode("utf-8")).hexdigest()
+    run = _find_run(content_hash, disaggregate, breakdowns)
+    if run is not None:
+        return run
+
+    summaries = [load_summary(r.summary) for r in runs]
+    _share_cell_dims([o for o, _ in summaries])
+    overall = ScoreSummary()
+    groups = {} if disaggregate else None
+    for o, g in summaries:
+        overall.merge(o)
+        if groups is not None and g:
+            merge_groups(groups, g)
+
+    result = _analysis_result(overall, groups, breakdowns)
+    return _save_run(content_hash, disaggregate, f"Combined ({len(members)} files)", result, breakdowns)
+
+@bp_testscore.route("/batch", methods=["GET", "POST"])
+def batch():
+    if request.method == "POST":
+        try:
+            disaggregate = request.form.get("disaggregate") == "yes"
+            uploads = [(f.filename, f.read()) for f in request.files.getlist("datasets") if f and f.filename]
+        except RequestEntityTooLarge:
+            limit = current_app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+            flash(f"The upload is larger than {limit} MB; split it into smaller batches.", "error")
+            return redirect(url_for("testscore.batch"))
+
+        cfg = current_app.config
+        try:
+            breakdowns = parse_breakdowns(request.form.get("breakdowns"))
+            datasets, skipped = expand_uploads(
+                uploads, allowed_file, max_files=cfg.get("TESTSCORE_BATCH_MAX_FILES", 0),
+                max_file_bytes=cfg.get("TESTSCORE_BATCH_MAX_FILE_BYTES", 0),
+                max_total_bytes=cfg.get("TESTSCORE_BATCH_MAX_TOTAL_BYTES", 0),
+            )
+        except ValueError as e:
+            flash(str(e), "error")
+            return redirect(url_for("testscore.batch"))
+
+        if not datasets:
+            flash("Please upload CSV or Excel files, or a zip of them.", "error")
+            return redirect(url_for("testscore.batch"))
+
+        rows, combined = run_batch(datasets, disaggregate, current_app.config.get("TESTSCORE_BATCH_WORKERS") or None,
+                                   breakdowns)
+        if combined is not None:
+            _use_run(combined)
+
+        return render_template(
+            "testscore/batch.html",
+            rows=[(filename, run, error, _run_results(run)[0] if run else None) for filename, run, error in rows],
+            combined=combined,
+            combined_overall=_run_results(combined)[0] if combined else None,
+            skipped=skipped,
+        )
+
+    return render_template("testscore/batch.html", rows=None)
+
+@bp_testscore.cli.command("batch")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--disaggregate", is_flag=True, help="Break results down by gender.")
+@click.option("--breakdowns", default="", help='Breakdown tables, e.g. "school, class, school*gender".')
+@click.option("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+@click.option("--out", type=click.Path(file_okay=False), help="Write a Word report per file and a combined one here.")
+def batch_command(paths, disaggregate, breakdowns, workers, out):
+    """Analyse many test score files (CSV, XLSX or zips of them)."""
+    try:
+        breakdowns = parse_breakdowns(breakdowns)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--breakdowns")
+
+    uploads = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            uploads.append((os.path.basename(path), fh.read()))
+    datasets, skipped = expand_uploads(uploads, allowed_file)
+    for name in skipped:
+        click.echo(f"skipped {name}", err=True)
+
+    rows, combined = run_batch(datasets, disaggregate, workers, breakdowns)
+
+    for filename, run, error in rows + [("Combined", combined, None)]:
+        if run is None:
+            click.echo(f"{filename}: {error or 'no results'}")
+            continue
+        overall = _run_results(run)[0]
+        click.echo(f"{filename}: n={overall['n']} pre={overall['mean_pre']:.2f} "
+                   f"post={overall['mean_post']:.2f} gain={overall['gain']:.2f} ({overall['pct_gain']:.1f}%)")
+
+    if out:
+        os.makedirs(out, exist_ok=True)
+        reports = [(f"{i:03d}_{filename.rsplit('.', 1)[0]}", run) for i, (filename, run, _) in enumerate(rows, 1)]
+        reports.append(("combined", combined))
+        for stem, run in reports:
+            if run is None:
+                continue
+            overall, gender_rows, narrative = _run_results(run)
+            with open(os.path.join(out, f"{stem}.docx"), "wb") as fh:
+                _write_word_report(overall, narrative, gender_rows, fh, **_report_extras(run))
+        click.echo(f"Reports written to {out}")
+
 @bp_testscore.post("/export/word")
 def export_word():
-    overall = session.get("testscore_overall")
-    narrative = session.get("testscore_narrative", "")
-    gender_rows = session.get("testscore_gender")
-
-    if not overall:
+    run = _current_run()
+    if run is None:
         flash("Nothing to export yet. Run an analysis first.", "error")
         return redirect(url_for("testscore.index"))
+    overall, gender_rows, narrative = _run_results(run)
 
+    bio = BytesIO()
+    _write_word_report(overall, narrative, gender_rows, bio, **_report_extras(run))
+    bio.seek(0)
+    return send_file(
+        bio,
+        as_attachment=True,
+        download_name="test_score_analysis_report.docx",
+        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    )
+
+def _item_table(item_rows):
+    """Header and text rows of the item gains table (one gain column per group)."""
+    groups = list(item_rows[0].get("groups", {})) if item_rows else []
+    header = ["Item", "N", "Mean Pre", "Mean Post", "Gain", "% Improved"] + [f"Gain ({g})" for g in groups]
+    rows = [
+        [r["metric"], str(r["n"]), f"{r['mean_pre']:.2f}", f"{r['mean_post']:.2f}", f"{r['gain']:.2f}",
+         f"{r['improved_pct']:.1f}%"] + [f"{r['groups'][g]:.2f}" for g in groups]
+        for r in item_rows
+    ]
+    return header, rows
+
+def _breakdown_table(table):
+    """Title, header and text rows of one breakdown table."""
+    title = " × ".join(d.title() for d in table["dims"])
+    header = [d.title() for d in table["dims"]] + ["N", "Mean Pre", "Mean Post", "Gain", "% Improvement"]
+    rows = [
+        r["labels"] + [str(r["n"]), f"{r['mean_pre']:.2f}", f"{r['mean_post']:.2f}", f"{r['gain']:.2f}",
+                       f"{r['pct_gain']:.1f}%"]
+        for r in table["rows"]
+    ]
+    return f"By {title}", header, rows
+
+def _write_word_report(overall: dict, narrative: str, gender_rows, fileobj, item_rows=None, breakdowns=None,
+                       charts=None):
     from docx import Document
+    from docx.shared import Inches
+    from services.docx_tables import add_table
 
     doc = Document()
     doc.add_heading("Test Score Analysis Report", level=1)
@@ -216,33 +751,50 @@ def export_word():
             row[3].text = f"{float(r.get('mean_post', 0)):.2f}"
             row[4].text = f"{float(r.get('gain', 0)):.2f}"
 
+    if item_rows:
+        doc.add_heading("Item Gains", level=2)
+        add_table(doc, *_item_table(item_rows))
+
+    for table in breakdowns or []:
+        title, header, rows = _breakdown_table(table)
+        doc.add_heading(title, level=2)
+        add_table(doc, header, rows)
+
+    for title, path in _export_charts(charts):
+        doc.add_heading(title, level=2)
+        doc.add_picture(path, width=Inches(6))
+
     doc.add_heading("Narrative Interpretation", level=2)
     for line in (narrative or "").split("\n"):
         doc.add_paragraph(line)
 
+    doc.save(fileobj)
+
+@bp_testscore.post("/export/pdf")
+def export_pdf():
+    run = _current_run()
+    if run is None:
+        flash("Nothing to export yet. Run an analysis first.", "error")
+        return redirect(url_for("testscore.index"))
+    overall, gender_rows, narrative = _run_results(run)
+
     bio = BytesIO()
-    doc.save(bio)
+    _write_pdf_report(overall, narrative, gender_rows, bio, **_report_extras(run))
     bio.seek(0)
+
     return send_file(
         bio,
         as_attachment=True,
-        download_name="test_score_analysis_report.docx",
-        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        download_name="test_score_analysis_report.pdf",
+        mimetype="application/pdf",
     )
 
-@bp_testscore.post("/export/pdf")
-def export_pdf():
-    overall = session.get("testscore_overall")
-    narrative = session.get("testscore_narrative", "")
-    gender_rows = session.get("testscore_gender")
-
-    if not overall:
-        flash("Nothing to export yet. Run an analysis first.", "error")
-        return redirect(url_for("testscore.index"))
-
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+def _write_pdf_report(overall: dict, narrative: str, gender_rows, fileobj, item_rows=None, breakdowns=None,
+                      charts=None):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
     from reportlab.lib.styles import getSampleStyleSheet
     from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
     from reportlab.lib import colors
 
     styles = getSampleStyleSheet()
@@ -280,22 +832,71 @@ def export_pdf():
         story.append(tbl)
         story.append(Spacer(1, 10))
 
+    if item_rows:
+        story.append(Paragraph("Item Gains", styles["Heading2"]))
+        header, rows = _item_table(item_rows)
+        tbl = Table([header] + rows, hAlign="LEFT", repeatRows=1)
+        tbl.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("FONTSIZE", (0,0), (-1,-1), 8),
+            ("PADDING", (0,0), (-1,-1), 4),
+        ]))
+        story.append(tbl)
+        story.append(Spacer(1, 10))
+
+    for table in breakdowns or []:
+        title, header, rows = _breakdown_table(table)
+        story.append(Paragraph(title, styles["Heading2"]))
+        tbl = Table([header] + rows, hAlign="LEFT", repeatRows=1)
+        tbl.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+            ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("PADDING", (0,0), (-1,-1), 6),
+        ]))
+        story.append(tbl)
+        story.append(Spacer(1, 10))
+
+    for title, path in _export_charts(charts):
+        story.append(Paragraph(title, styles["Heading2"]))
+        story.append(Image(path, width=6 * inch, height=6 * inch * 3.4 / 6.2))
+        story.append(Spacer(1, 10))
+
     story.append(Paragraph("Narrative Interpretation", styles["Heading2"]))
     for line in (narrative or "").split("\n"):
         story.append(Paragraph(line, styles["Normal"]))
         story.append(Spacer(1, 4))
 
-    bio = BytesIO()
-    doc = SimpleDocTemplate(bio, pagesize=A4)
+    doc = SimpleDocTemplate(fileobj, pagesize=A4)
     doc.build(story)
-    bio.seek(0)
 
-    return send_file(
-        bio,
-        as_attachment=True,
-        download_name="test_score_analysis_report.pdf",
-        mimetype="application/pdf",
-    )
+@export_job("testscore_docx", "docx")
+def _word_report_job(params, fileobj):
+    run = db.get_or_404(AnalysisRun, params["run_id"])
+    overall, gender_rows, narrative = _run_results(run)
+    _write_word_report(overall, narrative, gender_rows, fileobj, **_report_extras(run))
+    return "test_score_analysis_report.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+@export_job("testscore_pdf", "pdf")
+def _pdf_report_job(params, fileobj):
+    run = db.get_or_404(AnalysisRun, params["run_id"])
+    overall, gender_rows, narrative = _run_results(run)
+    _write_pdf_report(overall, narrative, gender_rows, fileobj, **_report_extras(run))
+    return "test_score_analysis_report.pdf", "application/pdf"
+
+@bp_testscore.post("/export/<fmt>/job")
+def queue_export(fmt):
+    if fmt not in ("docx", "pdf"):
+        abort(404)
+    run = _current_run()
+    if run is None:
+        flash("Nothing to export yet. Run an analysis first.", "error")
+        return redirect(url_for("testscore.index"))
+
+    job = submit(f"testscore_{fmt}", {"run_id": run.id})
+    return redirect(url_for("jobs.view_job", job_id=job.id))
 
 @bp_testscore.get("/help")
 def help_page():
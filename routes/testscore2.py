@@ -12,6 +12,7 @@ from flask import render_template, request, redirect, url_for, flash, session, s
 
 from flask import current_app
 from routes import bp_testscore
+from services.chart_render import render_png
 
 # File handling
 # ALLOWED_EXTENSIONS = {"csv", "xlsx"}
@@ -135,44 +136,34 @@ def analyze_data(df, disaggregate=False):
 # ===============================
 # GENERATE CHART
 # ===============================
-def generate_chart(mean_pre, mean_post):
+def _save_png(kind, spec):
     filename = f"{uuid.uuid4()}.png"
     filepath = os.path.join(CHART_FOLDER, filename)
-
-    plt.figure()
-    plt.bar(["Pre-Test", "Post-Test"], [mean_pre, mean_post])
-    plt.title("Pre vs Post Test Mean Scores")
-    plt.ylabel("Mean Score")
-    plt.savefig(filepath)
-    plt.close()
-
+    with open(filepath, "wb") as fh:
+        fh.write(render_png(kind, {"figsize": (6.4, 4.8), "dpi": 100, **spec}))
     return filepath
 
+def generate_chart(mean_pre, mean_post):
+    return _save_png("bars", {
+        "labels": ["Pre-Test", "Post-Test"], "values": [mean_pre, mean_post],
+        "title": "Pre vs Post Test Mean Scores", "ylabel": "Mean Score",
+    })
+
 def generate_slopegraph(df):
     # Requires participant_id OR name
     id_col = "participant_id" if "participant_id" in df.columns else ("name" if "name" in df.columns else None)
     if not id_col:
         raise ValueError("Slopegraph requires 'participant_id' or 'name' column.")
 
-    tmp = df[[id_col, "pre_test", "post_test"]].copy()
-    tmp["pre_test"] = pd.to_numeric(tmp["pre_test"], errors="coerce")
-    tmp["post_test"] = pd.to_numeric(tmp["post_test"], errors="coerce")
-    tmp = tmp.dropna(subset=["pre_test", "post_test"]).head(40)
-
-    filename = f"{uuid.uuid4()}.png"
-    filepath = os.path.join(CHART_FOLDER, filename)
+    # Every participant is drawn; the renderer thins and fades large cohorts
+    pre = pd.to_numeric(df["pre_test"], errors="coerce").to_numpy(dtype=float)
+    post = pd.to_numeric(df["post_test"], errors="coerce").to_numpy(dtype=float)
+    ok = ~(np.isnan(pre) | np.isnan(post))
 
-    plt.figure()
-    x0, x1 = 0, 1
-    for _, r in tmp.iterrows():
-        plt.plot([x0, x1], [r["pre_test"], r["post_test"]])
-    plt.xticks([0, 1], ["Pre-Test", "Post-Test"])
-    plt.ylabel("Score")
-    plt.title("Individual Student Journeys (Slopegraph)")
-    plt.tight_layout()
-    plt.savefig(filepath)
-    plt.close()
-    return filepath
+    return _save_png("slopegraph", {
+        "pre": pre[ok], "post": post[ok],
+        "title": "Individual Student Journeys (Slopegraph)", "ylabel": "Score",
+    })
 
 
 def generate_grouped_bar_by_class(df):
@@ -190,23 +181,12 @@ def generate_grouped_bar_by_class(df):
     g["gain_mean"] = g["post_mean"] - g["pre_mean"]
     g = g.reset_index()
 
-    filename = f"{uuid.uuid4()}.png"
-    filepath = os.path.join(CHART_FOLDER, filename)
-
-    x = np.arange(len(g[class_col]))
-    width = 0.35
-
-    plt.figure()
-    plt.bar(x - width/2, g["pre_mean"], width, label="Pre")
-    plt.bar(x + width/2, g["post_mean"], width, label="Post")
-    plt.xticks(x, g[class_col], rotation=45, ha="right")
-    plt.ylabel("Mean Score")
-    plt.title("Pre vs Post Mean Scores by Class (Grouped Bar)")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(filepath)
-    plt.close()
-    return filepath
+    return _save_png("grouped_bars", {
+        "labels": g[class_col].astype(str).tolist(),
+        "series": [["Pre", g["pre_mean"].tolist()], ["Post", g["post_mean"].tolist()]],
+        "rotation": 45,
+        "title": "Pre vs Post Mean Scores by Class (Grouped Bar)", "ylabel": "Mean Score",
+    })
 
 
 def generate_dumbbell_plot(df):
@@ -336,22 +316,10 @@ def generate_gender_chart(gender_df):
     Returns the saved image path.
     """
 
-    filename = f"{uuid.uuid4()}.png"
-    filepath = os.path.join(CHART_FOLDER, filename)
-
-    plt.figure()
-
-    plt.bar(gender_df["gender"], gender_df["gain"])
-
-    plt.xlabel("Gender")
-    plt.ylabel("Average Knowledge Gain")
-    plt.title("Average Knowledge Gain by Gender")
-
-    plt.tight_layout()
-    plt.savefig(filepath)
-    plt.close()
-
-    return filepath
+    return _save_png("bars", {
+        "labels": gender_df["gender"].tolist(), "values": gender_df["gain"].tolist(),
+        "title": "Average Knowledge Gain by Gender", "xlabel": "Gender", "ylabel": "Average Knowledge Gain",
+    })
 
 # ===============================
 # EXPORT WORD
@@ -0,0 +1,146 @@
+"""Bulk attendance import from CSV / XLSX sheets.
+
+A sheet has one row per activity with ``activity_code``, ``male_count`` and
+``female_count`` columns (headers are matched case-insensitively). All codes
+are resolved with one query. Every valid row is then written with batched
+``INSERT ... ON CONFLICT (activity_id) DO UPDATE`` statements against
+``uq_attendance_activity``, in a single transaction. Invalid rows are
+reported with their sheet line number and skipped; they never abort the
+rest of the import.
+
+The upserts bypass the ORM, so the reach rollups are updated from
+before/after snapshots of the touched activities and the report cache is
+cleared explicitly.
+"""
+import math
+from io import BytesIO
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models import Activity, ActivityAttendance, StrategicObjective
+from services import rollups
+from services.cache import mark_dirty
+
+REQUIRED_COLUMNS = ("activity_code", "male_count", "female_count")
+
+# Rows per executemany() call
+BATCH_SIZE = 500
+
+# Largest accepted count per row; far above any real attendance, well inside a 32-bit INTEGER
+MAX_COUNT = 1_000_000
+
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class ImportResult:
+    def __init__(self, inserted: int = 0, updated: int = 0, errors=None):
+        self.inserted = inserted
+        self.updated = updated
+        self.errors = errors or []  # (line, activity code, message)
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.updated
+
+
+def read_sheet(filename: str, data: bytes) -> pd.DataFrame:
+    """The sheet as text columns, with stripped lower-case headers."""
+    if filename.lower().endswith(".csv"):
+        df = pd.read_csv(BytesIO(data), dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(BytesIO(data), dtype=str).fillna("")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Sheet must contain the columns: {', '.join(missing)}.")
+    return df
+
+
+def _count(value: str, column: str) -> int:
+    value = value.strip()
+    if not value:
+        return 0
+    try:
+        n = float(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number, not '{value}'.")
+    if not math.isfinite(n) or n < 0 or n != int(n):
+        raise ValueError(f"{column} must be a whole number of 0 or more, not '{value}'.")
+    if n > MAX_COUNT:
+        raise ValueError(f"{column} must be at most {MAX_COUNT:,}, not '{value}'.")
+    return int(n)
+
+
+def import_attendance(df: pd.DataFrame, project_id: int = None) -> ImportResult:
+    """Upsert attendance for the rows of ``df``; codes are looked up within ``project_id`` if given."""
+    result = ImportResult()
+    parsed = {}  # activity code -> (line, male, female)
+
+    # Line 1 is the header row
+    for line, code, male, female in zip(range(2, len(df) + 2), df["activity_code"], df["male_count"],
+                                        df["female_count"]):
+        code = code.strip()
+        if not code:
+            result.errors.append((line, "", "activity_code is empty."))
+            continue
+        try:
+            counts = _count(male, "male_count"), _count(female, "female_count")
+        except ValueError as e:
+            result.errors.append((line, code, str(e)))
+            continue
+        if code in parsed:
+            result.errors.append((line, code, f"Duplicate of line {parsed[code][0]}."))
+            continue
+        parsed[code] = (line, *counts)
+
+    if not parsed:
+        return result
+
+    q = select(Activity.activity_code, Activity.id).where(Activity.activity_code.in_(list(parsed)))
+    if project_id:
+        q = q.join(StrategicObjective, Activity.strategic_objective_id == StrategicObjective.id).where(
+            StrategicObjective.project_id == project_id
+        )
+    matches = {}
+    for code, activity_id in db.session.execute(q):
+        matches.setdefault(code, []).append(activity_id)
+
+    rows = []
+    for code, (line, male, female) in parsed.items():
+        ids = matches.get(code, [])
+        if not ids:
+            result.errors.append((line, code, "No activity has this code."))
+        elif len(ids) > 1:
+            result.errors.append((line, code, f"{len(ids)} activities share this code; choose a project."))
+        else:
+            rows.append({"activity_id": ids[0], "male_count": male, "female_count": female})
+    result.errors.sort()
+
+    if rows:
+        before = rollups.activity_states(db.session, {r["activity_id"] for r in rows})
+        result.updated = sum(1 for r in rows if before[r["activity_id"]]["attendance_count"])
+        result.inserted = len(rows) - result.updated
+
+        conn = db.session.connection()
+        stmt = _upsert_statement(conn.dialect.name)
+        for i in range(0, len(rows), BATCH_SIZE):
+            conn.execute(stmt, rows[i:i + BATCH_SIZE])
+
+        rollups.apply_state_changes(db.session, before)
+        mark_dirty(db.session)
+        db.session.commit()
+    return result
+
+
+def _upsert_statement(dialect: str):
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        raise RuntimeError(f"Bulk attendance import is not supported on {dialect}.")
+    stmt = insert(ActivityAttendance.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=[ActivityAttendance.activity_id],
+        set_={"male_count": stmt.excluded.male_count, "female_count": stmt.excluded.female_count},
+    )
@@ -0,0 +1,101 @@
+"""Small in-process LRU/TTL cache for dashboard and report payloads.
+
+Entries are plain dicts/lists (never ORM instances) and must be treated as
+read-only by callers. The whole cache is cleared after any commit that wrote
+projects, SOs, indicators, activities or attendance, so a stale payload can
+only be served by *another* worker process, and then for at most ``ttl``
+seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Project, StrategicObjective, Indicator, Activity, ActivityAttendance
+
+_MISSING = object()
+_SESSION_KEY = "report_cache_dirty"
+
+_WATCHED = (Project, StrategicObjective, Indicator, Activity, ActivityAttendance)
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by clear(); a payload computed across a clear() may predate the write that caused it
+        self._generation = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self._generation
+            value = factory()
+            with self._lock:
+                if generation == self._generation:
+                    self._put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+report_cache = TTLCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session, flush_context):
+    if any(isinstance(o, _WATCHED) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_SESSION_KEY] = True
+
+
+def mark_dirty(session):
+    """Clear the cache when ``session`` commits, for writes the ORM does not see (bulk Core statements)."""
+    session.info[_SESSION_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_SESSION_KEY, False):
+        report_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def init_app(app):
+    report_cache.maxsize = app.config.get("REPORT_CACHE_SIZE", 256)
+    report_cache.ttl = app.config.get("REPORT_CACHE_TTL", 300)
@@ -0,0 +1,66 @@
+"""Content-addressed PNG cache for generated charts.
+
+A chart's file name is derived from a hash of everything that determines its
+pixels (chart type, plotted values, figure parameters), so analysing the same
+data twice reuses the existing PNG instead of re-rendering it. Hits refresh the
+file's mtime; when the directory grows past ``max_bytes`` the least recently
+used PNGs are deleted.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from services.reaper import sweep_dir
+
+_evict_lock = threading.Lock()
+
+
+def _json_default(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, np.ndarray):
+        return v.tolist()
+    raise TypeError(f"Unhashable chart parameter: {type(v).__name__}")
+
+
+def chart_digest(prefix: str, spec: dict) -> str:
+    payload = json.dumps([prefix, spec], sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def cached_png(directory: str, prefix: str, spec: dict, render, max_bytes: int = 0) -> str:
+    """Return the file name of the PNG for ``spec``, rendering it if needed.
+
+    ``render(path)`` must write the PNG to ``path``. ``max_bytes`` <= 0
+    disables eviction.
+    """
+    name = f"{prefix}_{chart_digest(prefix, spec)}.png"
+    out = os.path.join(directory, name)
+
+    if os.path.exists(out):
+        os.utime(out, None)
+        return name
+
+    # Render to a private temp name and rename, so a concurrent request for
+    # the same chart never serves a half-written file.
+    tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        render(tmp)
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    if max_bytes > 0:
+        evict(directory, max_bytes, keep=name)
+    return name
+
+
+def evict(directory: str, max_bytes: int, keep: str = None) -> int:
+    """Delete least recently used PNGs until the directory is under max_bytes."""
+    with _evict_lock:
+        removed, _ = sweep_dir(directory, "*.png", max_bytes=max_bytes, keep=keep)
+        return removed
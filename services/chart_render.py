@@ -0,0 +1,274 @@
+"""Chart rendering with reusable figure templates.
+
+Charts are drawn on ``matplotlib.figure.Figure`` objects with their own Agg
+canvas, never through pyplot, so there is no global figure state to share.
+Each process keeps one template per chart kind and shape (e.g. a grouped bar
+chart with 3 groups of 2 series); a render updates the template's artists
+(bar heights, tick labels, titles) instead of building a new figure, then
+returns the PNG bytes.
+
+``render_png(kind, spec, workers)`` renders in a pool of ``workers`` spawned
+processes, each with its own templates, so request threads do not queue on
+one figure. With ``workers`` <= 0 it renders in the calling process, one
+chart at a time.
+"""
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import numpy as np
+from matplotlib import image as mpimage
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+# Templates kept per process, least recently used dropped first
+MAX_TEMPLATES = 32
+
+_TEMPLATE_TYPES = {}
+_templates = OrderedDict()
+_render_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def chart_template(kind: str):
+    """Register a template class for ``kind``.
+
+    The class is built with ``cls(spec)`` and must provide ``shape(spec)`` (a
+    classmethod giving the hashable part of ``spec`` that fixes the artists)
+    and ``update(spec)``; ``fig`` is the Figure it draws on.
+    """
+    def decorator(cls):
+        _TEMPLATE_TYPES[kind] = cls
+        return cls
+    return decorator
+
+
+def chart_kinds():
+    return set(_TEMPLATE_TYPES)
+
+
+def _values(values):
+    # Specs use None (JSON null) for missing values
+    return np.asarray(values, dtype=np.float64)
+
+
+def _new_figure(spec):
+    # "tight" lays the figure out as part of each draw
+    fig = Figure(figsize=tuple(spec["figsize"]), layout="tight")
+    FigureCanvasAgg(fig)
+    return fig
+
+
+@chart_template("bars")
+class BarTemplate:
+    """One series of bars: ``labels``, ``values``, ``title``, ``xlabel``, ``ylabel``."""
+
+    def __init__(self, spec):
+        self.fig = _new_figure(spec)
+        self.ax = self.fig.add_subplot(111)
+        n = len(spec["labels"])
+        self.bars = self.ax.bar(np.arange(n), np.zeros(n))
+        self.ax.set_xticks(np.arange(n))
+
+    @classmethod
+    def shape(cls, spec):
+        return tuple(spec["figsize"]), len(spec["labels"])
+
+    def update(self, spec):
+        for bar, v in zip(self.bars, _values(spec["values"])):
+            bar.set_height(v)
+        self.ax.set_xticklabels(spec["labels"])
+        self.ax.set_title(spec.get("title", ""))
+        self.ax.set_xlabel(spec.get("xlabel", ""))
+        self.ax.set_ylabel(spec.get("ylabel", ""))
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+@chart_template("grouped_bars")
+class GroupedBarTemplate:
+    """Side-by-side bars per label: ``labels``, ``series`` ([name, values] pairs), ``title``, ``ylabel``."""
+
+    def __init__(self, spec):
+        self.fig = _new_figure(spec)
+        self.ax = self.fig.add_subplot(111)
+        n, k = len(spec["labels"]), len(spec["series"])
+        x = np.arange(n)
+        w = 0.7 / k
+        self.groups = [
+            self.ax.bar(x + (i - (k - 1) / 2) * w, np.zeros(n), width=w) for i in range(k)
+        ]
+        self.ax.set_xticks(x)
+
+    @classmethod
+    def shape(cls, spec):
+        return tuple(spec["figsize"]), len(spec["labels"]), len(spec["series"])
+
+    def update(self, spec):
+        for bars, (name, values) in zip(self.groups, spec["series"]):
+            for bar, v in zip(bars, _values(values)):
+                bar.set_height(v)
+            bars.set_label(name)
+        self.ax.set_xticklabels(spec["labels"], rotation=spec.get("rotation", 0),
+                                ha="right" if spec.get("rotation") else "center")
+        self.ax.set_title(spec.get("title", ""))
+        self.ax.set_ylabel(spec.get("ylabel", ""))
+        self.ax.legend()
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+@chart_template("dumbbell")
+class DumbbellTemplate:
+    """Pre and post means joined by a line, one row per label: ``labels``, ``pre``, ``post``, ``title``, ``xlabel``."""
+
+    def __init__(self, spec):
+        self.fig = _new_figure(spec)
+        self.ax = self.fig.add_subplot(111)
+        n = len(spec["labels"])
+        y = np.arange(n)
+        self.lines = self.ax.hlines(y, np.zeros(n), np.zeros(n), color="#9ca3af", linewidth=2)
+        self.pre = self.ax.scatter(np.zeros(n), y, zorder=3, label="Pre-test")
+        self.post = self.ax.scatter(np.zeros(n), y, zorder=3, label="Post-test")
+        self.ax.set_yticks(y)
+        self.ax.invert_yaxis()
+
+    @classmethod
+    def shape(cls, spec):
+        return tuple(spec["figsize"]), len(spec["labels"])
+
+    def update(self, spec):
+        pre, post = _values(spec["pre"]), _values(spec["post"])
+        y = np.arange(len(pre))
+        self.lines.set_segments([[(a, i), (b, i)] for i, a, b in zip(y, pre, post)])
+        self.pre.set_offsets(np.column_stack([pre, y]))
+        self.post.set_offsets(np.column_stack([post, y]))
+        self.ax.set_yticklabels(spec["labels"])
+        self.ax.set_title(spec.get("title", ""))
+        self.ax.set_xlabel(spec.get("xlabel", ""))
+        self.ax.legend()
+        finite = np.concatenate([pre, post])
+        finite = finite[np.isfinite(finite)]
+        if finite.size:
+            lo, hi = finite.min(), finite.max()
+            pad = (hi - lo) * 0.1 or 1.0
+            self.ax.set_xlim(lo - pad, hi + pad)
+
+
+@chart_template("slopegraph")
+class SlopegraphTemplate:
+    """One line per participant from pre to post score: ``pre``, ``post``, ``title``, ``ylabel``.
+
+    All lines are one ``LineCollection`` whose alpha falls as the cohort grows,
+    so dense bands show darker instead of merging into a solid block. Cohorts
+    larger than ``MAX_LINES`` are drawn from a uniform sample.
+    """
+
+    MAX_LINES = 5000
+
+    def __init__(self, spec):
+        self.fig = _new_figure(spec)
+        self.ax = self.fig.add_subplot(111)
+        self.lines = LineCollection([], colors="#2563eb", linewidths=0.8)
+        self.ax.add_collection(self.lines)
+        (self.mean,) = self.ax.plot([0, 1], [0, 0], color="#111827", linewidth=2.5, label="Mean")
+        self.ax.set_xticks([0, 1])
+        self.ax.set_xticklabels(["Pre-test", "Post-test"])
+        self.ax.set_xlim(-0.1, 1.1)
+
+    @classmethod
+    def shape(cls, spec):
+        return (tuple(spec["figsize"]),)
+
+    def update(self, spec):
+        pre, post = _values(spec["pre"]), _values(spec["post"])
+        ok = np.isfinite(pre) & np.isfinite(post)
+        pre, post = pre[ok], post[ok]
+        if pre.size > self.MAX_LINES:
+            idx = np.random.default_rng(0).choice(pre.size, self.MAX_LINES, replace=False)
+            shown_pre, shown_post = pre[idx], post[idx]
+        else:
+            shown_pre, shown_post = pre, post
+
+        segments = np.empty((shown_pre.size, 2, 2))
+        segments[:, 0, 0] = 0
+        segments[:, 1, 0] = 1
+        segments[:, 0, 1] = shown_pre
+        segments[:, 1, 1] = shown_post
+        self.lines.set_segments(segments)
+        self.lines.set_alpha(float(np.clip(20 / max(shown_pre.size, 1), 0.02, 0.8)))
+
+        if pre.size:
+            self.mean.set_data([0, 1], [pre.mean(), post.mean()])
+            lo, hi = min(pre.min(), post.min()), max(pre.max(), post.max())
+            pad = (hi - lo) * 0.05 or 1.0
+            self.ax.set_ylim(lo - pad, hi + pad)
+        self.mean.set_visible(bool(pre.size))
+        self.ax.set_title(spec.get("title", ""))
+        self.ax.set_ylabel(spec.get("ylabel", ""))
+        self.ax.legend(loc="upper left")
+
+
+def _template(kind: str, spec):
+    cls = _TEMPLATE_TYPES[kind]
+    key = (kind, cls.shape(spec))
+    tpl = _templates.get(key)
+    if tpl is None:
+        tpl = _templates[key] = cls(spec)
+        if len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    else:
+        _templates.move_to_end(key)
+    return tpl
+
+
+def render_local(kind: str, spec: dict) -> bytes:
+    """PNG bytes of ``spec`` drawn on this process's ``kind`` template."""
+    with _render_lock:
+        tpl = _template(kind, spec)
+        tpl.update(spec)
+        # One draw straight into the Agg buffer; savefig() would draw twice
+        tpl.fig.set_dpi(spec.get("dpi", 100))
+        canvas = tpl.fig.canvas
+        canvas.draw()
+        out = BytesIO()
+        mpimage.imsave(out, np.asarray(canvas.buffer_rgba()), format="png")
+        return out.getvalue()
+
+
+def render_png(kind: str, spec: dict, workers: int = 0) -> bytes:
+    if kind not in _TEMPLATE_TYPES:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    if workers <= 0:
+        return render_local(kind, spec)
+    try:
+        return _get_executor(workers).submit(render_local, kind, spec).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        _reset_executor()
+        return render_local(kind, spec)
+
+
+def _get_executor(workers: int):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
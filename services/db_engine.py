@@ -0,0 +1,93 @@
+"""SQLite connection tuning.
+
+SQLite's defaults (rollback journal, ``synchronous=FULL``, 2 MB page cache)
+serialize readers and writers: a long report query holds a shared lock
+that makes data-entry commits wait, and vice versa, until one side gives
+up with ``database is locked``. ``init_app`` registers a ``connect`` hook on
+every SQLite engine of the app that sets:
+
+* ``journal_mode`` (WAL): readers see a snapshot and never block the
+  writer, nor the writer them;
+* ``synchronous`` (NORMAL): no fsync per commit in WAL mode, only at
+  checkpoints;
+* ``mmap_size``, ``cache_size``: larger page cache, memory-mapped reads;
+* ``busy_timeout``: how long a writer waits for another writer;
+* ``temp_store`` (MEMORY): sort/GROUP BY temp tables in RAM.
+
+Values come from the ``SQLITE_*`` settings; an empty value skips that
+pragma. Other databases are left alone. Pool sizing and pre-ping are plain
+``SQLALCHEMY_ENGINE_OPTIONS``.
+
+Read-only work (dashboard, period reports) runs inside ``read_only()``: its
+queries go to the ``read`` bind when ``READ_DATABASE_URL`` configures one
+(a replica, or a ``mode=ro`` SQLite URI), so it does not hold locks or
+connections on the primary that data entry needs. Without a read bind it
+is a no-op. Anything flushed inside it still goes to the primary, but may
+not be visible to the read engine until committed (and replicated).
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+
+# (config key, pragma)
+_PRAGMAS = (
+    ("SQLITE_JOURNAL_MODE", "journal_mode"),
+    ("SQLITE_SYNCHRONOUS", "synchronous"),
+    ("SQLITE_MMAP_SIZE", "mmap_size"),
+    ("SQLITE_CACHE_SIZE", "cache_size"),
+    ("SQLITE_BUSY_TIMEOUT", "busy_timeout"),
+    ("SQLITE_TEMP_STORE", "temp_store"),
+)
+
+
+def sqlite_pragmas(config) -> dict:
+    """``{pragma: value}`` for the ``SQLITE_*`` settings in ``config`` that are set."""
+    return {
+        pragma: config[key]
+        for key, pragma in _PRAGMAS
+        if config.get(key) not in (None, "")
+    }
+
+
+def install_pragmas(engine, pragmas: dict):
+    """Run ``PRAGMA name = value`` for each of ``pragmas`` on every new connection of ``engine``."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+    statements = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+@contextmanager
+def read_only():
+    """Route ``db.session`` queries to the read engine for the duration (decorator or ``with``)."""
+    previous = db.session.info.get("read_only", False)
+    db.session.info["read_only"] = True
+    try:
+        yield
+    finally:
+        db.session.info["read_only"] = previous
+
+
+def _read_only_url(url) -> bool:
+    return url.query.get("mode") == "ro" or url.query.get("immutable") == "1"
+
+
+def init_app(app):
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        for engine in db.engines.values():
+            if _read_only_url(engine.url):
+                # The journal mode can only be changed by a writer
+                install_pragmas(engine, {k: v for k, v in pragmas.items() if k != "journal_mode"})
+            else:
+                install_pragmas(engine, pragmas)
@@ -0,0 +1,73 @@
+"""Bulk table writer for python-docx documents.
+
+``Table.add_row().cells`` recomputes the cell grid of the whole table on every
+call, so filling a table row by row is quadratic in the row count. ``add_table``
+instead renders every ``<w:tr>`` as XML text in one pass and parses them in a
+single lxml call. The resulting XML is the same as
+``doc.add_table(rows=1, cols=n)`` + ``add_row()`` + ``cell.text = ...``.
+"""
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+
+def _run_xml(text: str) -> str:
+    # Same mapping as python-docx's run text setter: \t -> <w:tab/>,
+    # \r / \n -> <w:br/>, everything else in <w:t> runs.
+    if not text:
+        return "<w:r/>"
+    parts, buf = [], []
+
+    def flush():
+        if buf:
+            s = "".join(buf)
+            space = ' xml:space="preserve"' if len(s.strip()) < len(s) else ""
+            parts.append(f"<w:t{space}>{escape(s)}</w:t>")
+            buf.clear()
+
+    for ch in text:
+        if ch == "\t":
+            flush()
+            parts.append("<w:tab/>")
+        elif ch in "\r\n":
+            flush()
+            parts.append("<w:br/>")
+        else:
+            buf.append(ch)
+    flush()
+    return "<w:r>" + "".join(parts) + "</w:r>"
+
+
+def add_table(doc, header, rows, style=None):
+    """Append a table with a header row and ``rows`` (iterables of text).
+
+    Values are converted with ``str()``; ``None`` becomes an empty cell.
+    """
+    table = doc.add_table(rows=0, cols=len(header))
+    if style is not None:
+        table.style = style
+    tbl = table._tbl
+
+    widths = [gc.get(qn("w:w")) for gc in tbl.tblGrid.gridCol_lst]
+    cell_open = [
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{w}"/></w:tcPr><w:p>' for w in widths
+    ]
+
+    out = [f"<w:tbl {nsdecls('w')}>"]
+    for row in _with_header(header, rows):
+        out.append("<w:tr>")
+        for i, v in enumerate(row):
+            out.append(cell_open[i])
+            out.append(_run_xml("" if v is None else str(v)))
+            out.append("</w:p></w:tc>")
+        out.append("</w:tr>")
+    out.append("</w:tbl>")
+
+    tbl.extend(list(parse_xml("".join(out))))
+    return table
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
@@ -0,0 +1,217 @@
+"""Background export jobs.
+
+Exports register a renderer with ``@export_job(kind, ext)``; a renderer takes
+the job params and a binary file object, writes the document into it and
+returns ``(download_name, mimetype)``.
+
+``submit()`` persists an ``ExportJob`` row and hands its id to a thread pool
+(or, with ``EXPORT_JOB_EXECUTOR = "process"``, a pool of spawned worker
+processes, each with its own app). The worker renders into
+``EXPORT_JOB_DIR/<job id>.<ext>`` and records the outcome on the row, which
+the /jobs endpoints poll.
+
+Jobs only live in the pool of the process that submitted them. Each job
+records that process as its ``owner``, and a heartbeat thread in the owner
+refreshes ``heartbeat_at`` on its queued and running jobs every
+``EXPORT_JOB_HEARTBEAT`` seconds. When a process starts its pool, queued and
+running jobs whose heartbeat has not been refreshed for three intervals are
+marked failed: their owner is gone (restarted or killed). Jobs of live
+sibling processes (other workers of the same server) are left alone.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, url_for
+from sqlalchemy import or_, update
+from werkzeug.exceptions import HTTPException
+
+from extensions import db
+from models import ExportJob
+
+_RENDERERS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Set in pool worker processes by _init_worker()
+_worker_app = None
+
+# This process as the owner of the jobs it submits; set with the executor,
+# after any fork of a preloading server
+_owner = None
+
+_ACTIVE = ("queued", "running")
+# Heartbeat intervals without a refresh after which a job's owner is presumed gone
+STALE_HEARTBEATS = 3
+
+INTERRUPTED_ERROR = "Interrupted by restart"
+
+
+def export_job(kind: str, ext: str):
+    def decorator(fn):
+        _RENDERERS[kind] = (fn, ext)
+        return fn
+    return decorator
+
+
+def exports_dir(app=None) -> str:
+    app = app or current_app
+    path = app.config.get("EXPORT_JOB_DIR") or os.path.join(app.root_path, "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def submit(kind: str, params: dict) -> ExportJob:
+    if kind not in _RENDERERS:
+        raise ValueError(f"Unknown export job kind: {kind}")
+
+    app = current_app._get_current_object()
+    executor = _get_executor(app)
+
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        params=json.dumps(params, default=str),
+        status="queued",
+        owner=_owner,
+        heartbeat_at=datetime.utcnow(),
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    if isinstance(executor, ProcessPoolExecutor):
+        executor.submit(_run_in_worker, job.id)
+    else:
+        executor.submit(_run_in_app, app, job.id)
+    return job
+
+
+def job_status(job: ExportJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "download_url": url_for("jobs.download_job", job_id=job.id) if job.status == "done" else None,
+    }
+
+
+def _get_executor(app):
+    global _executor, _owner
+    with _executor_lock:
+        if _executor is None:
+            _owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            workers = app.config.get("EXPORT_JOB_WORKERS", 2)
+            if app.config.get("EXPORT_JOB_EXECUTOR") == "process":
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(app.config["SQLALCHEMY_DATABASE_URI"], exports_dir(app)),
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export-job")
+            interval = app.config.get("EXPORT_JOB_HEARTBEAT", 30)
+            threading.Thread(target=_heartbeat_loop, args=(app, _owner, interval),
+                             name="export-job-heartbeat", daemon=True).start()
+            fail_interrupted_jobs(interval)
+        return _executor
+
+
+def _heartbeat(owner: str):
+    db.session.execute(
+        update(ExportJob)
+        .where(ExportJob.owner == owner, ExportJob.status.in_(_ACTIVE))
+        .values(heartbeat_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+
+def _heartbeat_loop(app, owner: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                _heartbeat(owner)
+        except Exception:
+            app.logger.exception("Export job heartbeat failed")
+
+
+def fail_interrupted_jobs(interval: float) -> int:
+    """Mark queued/running jobs without a heartbeat for ``STALE_HEARTBEATS`` intervals failed; returns how many."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=STALE_HEARTBEATS * interval)
+    result = db.session.execute(
+        update(ExportJob)
+        .where(ExportJob.status.in_(_ACTIVE),
+               or_(ExportJob.heartbeat_at.is_(None), ExportJob.heartbeat_at < cutoff))
+        .values(status="failed", error=INTERRUPTED_ERROR, finished_at=now)
+    )
+    db.session.commit()
+    if result.rowcount:
+        current_app.logger.warning("Marked %d interrupted export jobs as failed", result.rowcount)
+    return result.rowcount
+
+
+def _init_worker(database_uri: str, export_dir: str):
+    global _worker_app
+    from app import create_app
+
+    _worker_app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "EXPORT_JOB_DIR": export_dir,
+    })
+
+
+def _run_in_worker(job_id: str):
+    with _worker_app.app_context():
+        _run_job(job_id)
+
+
+def _run_in_app(app, job_id: str):
+    with app.app_context():
+        _run_job(job_id)
+
+
+def _run_job(job_id: str):
+    job = db.session.get(ExportJob, job_id)
+    if job is None or job.status != "queued":
+        return
+
+    job.status = "running"
+    job.started_at = job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+
+    renderer, ext = _RENDERERS[job.kind]
+    path = os.path.join(exports_dir(), f"{job.id}.{ext}")
+    try:
+        with open(path, "wb") as fh:
+            download_name, mimetype = renderer(json.loads(job.params), fh)
+    except Exception as e:
+        current_app.logger.exception("Export job %s (%s) failed", job_id, job.kind)
+        db.session.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        job = db.session.get(ExportJob, job_id)
+        job.status = "failed"
+        if isinstance(e, HTTPException):  # e.g. get_or_404 on a deleted project
+            job.error = f"{e.code} {e.name}"
+        else:
+            job.error = str(e) or e.__class__.__name__
+    else:
+        job.status = "done"
+        job.result_path = path
+        job.download_name = download_name
+        job.mimetype = mimetype
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
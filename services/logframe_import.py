@@ -0,0 +1,332 @@
+"""Bulk logframe import from an XLSX workbook.
+
+A workbook describes one project's logframe on up to four sheets (sheet
+names and headers are matched case-insensitively):
+
+* ``project``: one row with ``name``, ``goal`` and optionally ``donor``,
+  ``location``, ``start_date``, ``end_date``. Only read when the import
+  creates a new project; ignored when importing into an existing one.
+* ``strategic_objectives``: ``so_code``, ``title``, ``description``
+* ``indicators``: ``so_code``, ``indicator_code``, ``statement``,
+  ``indicator_type``, ``unit``, ``gender_disaggregation``, ``baseline``,
+  ``target``
+* ``activities``: ``so_code``, ``indicator_code``, ``activity_code``,
+  ``title``, ``description``, ``activity_date``, ``location``, ``status``
+
+``so_code`` / ``indicator_code`` references are resolved in memory against
+the workbook and, for an existing project, its current SOs and indicators.
+The whole workbook is checked first (required values, lengths, references
+and the ``uq_project_so_code`` / ``uq_so_indicator_code`` constraints); any
+error rejects the import before anything is written. Otherwise each sheet
+is written with one executemany ``INSERT ... RETURNING id`` and the import
+commits once.
+
+The inserts bypass the ORM, so the reach rollups are updated for the new
+activities and the report cache is cleared explicitly.
+"""
+from datetime import datetime
+from io import BytesIO
+
+import click
+import pandas as pd
+from flask.cli import AppGroup
+from sqlalchemy import insert, select
+
+from extensions import db
+from models import Activity, Indicator, Project, StrategicObjective
+from services import rollups
+from services.cache import mark_dirty
+
+SHEETS = {
+    "project": ("name", "goal"),
+    "strategic_objectives": ("so_code", "title"),
+    "indicators": ("so_code", "indicator_code", "statement"),
+    "activities": ("so_code", "title", "activity_date"),
+}
+
+STATUSES = ("planned", "ongoing", "completed")
+
+_TRUE = {"yes", "y", "true", "1"}
+_FALSE = {"no", "n", "false", "0"}
+
+
+class LogframeError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors  # (sheet, line, message)
+        super().__init__(f"{len(errors)} problem(s) in the workbook.")
+
+
+class LogframeResult:
+    def __init__(self, project_id: int, sos: int = 0, indicators: int = 0, activities: int = 0):
+        self.project_id = project_id
+        self.sos = sos
+        self.indicators = indicators
+        self.activities = activities
+
+
+def read_workbook(data: bytes) -> dict:
+    """Known sheets of the workbook as lists of ``(line, row)``; row values are stripped text."""
+    book = pd.read_excel(BytesIO(data), sheet_name=None, dtype=str)
+    sheets = {}
+    for name, df in book.items():
+        name = str(name).strip().lower()
+        if name not in SHEETS:
+            continue
+        df = df.fillna("")
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        missing = [c for c in SHEETS[name] if c not in df.columns]
+        if missing:
+            raise LogframeError([(name, 1, f"Missing column(s): {', '.join(missing)}.")])
+        records = df.to_dict("records")
+        # Line 1 is the header row; fully blank rows are skipped
+        sheets[name] = [
+            (line, {k: str(v).strip() for k, v in r.items()})
+            for line, r in enumerate(records, start=2)
+            if any(str(v).strip() for v in r.values())
+        ]
+    return sheets
+
+
+class _Checker:
+    """Collects row errors while converting sheet values."""
+
+    def __init__(self):
+        self.errors = []
+
+    def error(self, sheet, line, message):
+        self.errors.append((sheet, line, message))
+
+    def text(self, sheet, line, row, column, max_len, required=False):
+        value = row.get(column, "")
+        if required and not value:
+            self.error(sheet, line, f"{column} is required.")
+        elif max_len and len(value) > max_len:
+            self.error(sheet, line, f"{column} is longer than {max_len} characters.")
+        return value or None
+
+    def date(self, sheet, line, row, column, required=False):
+        value = row.get(column, "")
+        if not value:
+            if required:
+                self.error(sheet, line, f"{column} is required.")
+            return None
+        try:
+            # Excel dates come through as "YYYY-MM-DD 00:00:00"
+            return datetime.fromisoformat(value).date()
+        except ValueError:
+            self.error(sheet, line, f"{column} must be a date (YYYY-MM-DD), not '{value}'.")
+            return None
+
+    def number(self, sheet, line, row, column, default=None):
+        value = row.get(column, "")
+        if not value:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            self.error(sheet, line, f"{column} must be a number, not '{value}'.")
+            return default
+
+    def flag(self, sheet, line, row, column, default=True):
+        value = row.get(column, "").lower()
+        if not value:
+            return default
+        if value in _TRUE:
+            return True
+        if value in _FALSE:
+            return False
+        self.error(sheet, line, f"{column} must be yes or no, not '{value}'.")
+        return default
+
+
+def _length(column) -> int:
+    return column.type.length
+
+
+def import_logframe(sheets: dict, project_id: int = None) -> LogframeResult:
+    """Insert the logframe in ``sheets`` (from ``read_workbook``) into ``project_id`` or a new project.
+
+    Raises ``LogframeError`` listing every problem if the workbook is not valid.
+    """
+    check = _Checker()
+    project_row = None
+    existing_sos, existing_indicators = {}, {}
+
+    if project_id:
+        if db.session.get(Project, project_id) is None:
+            raise LogframeError([("project", 0, f"Project {project_id} does not exist.")])
+        existing_sos = dict(db.session.execute(
+            select(StrategicObjective.so_code, StrategicObjective.id)
+            .where(StrategicObjective.project_id == project_id)
+        ).all())
+        existing_indicators = {
+            (so_code, code): ind_id
+            for so_code, code, ind_id in db.session.execute(
+                select(StrategicObjective.so_code, Indicator.indicator_code, Indicator.id)
+                .join(StrategicObjective, Indicator.strategic_objective_id == StrategicObjective.id)
+                .where(StrategicObjective.project_id == project_id)
+            )
+        }
+    else:
+        rows = sheets.get("project", [])
+        if len(rows) != 1:
+            check.error("project", 0, "The project sheet must have exactly one row when creating a project.")
+        else:
+            line, row = rows[0]
+            project_row = {
+                "name": check.text("project", line, row, "name", _length(Project.name), required=True),
+                "goal": check.text("project", line, row, "goal", None, required=True),
+                "donor": check.text("project", line, row, "donor", _length(Project.donor)),
+                "location": check.text("project", line, row, "location", _length(Project.location)),
+                "start_date": check.date("project", line, row, "start_date"),
+                "end_date": check.date("project", line, row, "end_date"),
+            }
+
+    # so_code -> row to insert, in sheet order
+    new_sos = {}
+    for line, row in sheets.get("strategic_objectives", []):
+        code = row["so_code"] = row["so_code"].upper()
+        values = {
+            "so_code": check.text("strategic_objectives", line, row, "so_code",
+                                  _length(StrategicObjective.so_code), required=True),
+            "title": check.text("strategic_objectives", line, row, "title",
+                                _length(StrategicObjective.title), required=True),
+            "description": check.text("strategic_objectives", line, row, "description", None),
+        }
+        if not code:
+            continue
+        if code in existing_sos:
+            check.error("strategic_objectives", line, f"{code} already exists in the project.")
+        elif code in new_sos:
+            check.error("strategic_objectives", line, f"Duplicate of line {new_sos[code][0]}.")
+        else:
+            new_sos[code] = (line, values)
+    so_codes = set(existing_sos) | set(new_sos)
+
+    # (so_code, indicator_code) -> row to insert
+    new_indicators = {}
+    for line, row in sheets.get("indicators", []):
+        so_code = row["so_code"].upper()
+        code = row["indicator_code"] = row["indicator_code"].upper()
+        values = {
+            "indicator_code": check.text("indicators", line, row, "indicator_code",
+                                         _length(Indicator.indicator_code), required=True),
+            "statement": check.text("indicators", line, row, "statement", None, required=True),
+            "indicator_type": check.text("indicators", line, row, "indicator_type",
+                                         _length(Indicator.indicator_type)),
+            "unit": check.text("indicators", line, row, "unit", _length(Indicator.unit)),
+            "gender_disaggregation": check.flag("indicators", line, row, "gender_disaggregation"),
+            "baseline": check.number("indicators", line, row, "baseline", default=0),
+            "target": check.number("indicators", line, row, "target"),
+        }
+        if not so_code:
+            check.error("indicators", line, "so_code is required.")
+            continue
+        if so_code not in so_codes:
+            check.error("indicators", line, f"Unknown SO {so_code}.")
+            continue
+        if not code:
+            continue
+        key = (so_code, code)
+        if key in existing_indicators:
+            check.error("indicators", line, f"{code} already exists under {so_code}.")
+        elif key in new_indicators:
+            check.error("indicators", line, f"Duplicate of line {new_indicators[key][0]}.")
+        else:
+            new_indicators[key] = (line, values)
+    indicator_keys = set(existing_indicators) | set(new_indicators)
+
+    new_activities = []  # (so_code, indicator key or None, row to insert)
+    for line, row in sheets.get("activities", []):
+        so_code = row["so_code"].upper()
+        indicator_code = row.get("indicator_code", "").upper()
+        status = row.get("status", "").lower() or "planned"
+        values = {
+            "activity_code": check.text("activities", line, row, "activity_code", _length(Activity.activity_code)),
+            "title": check.text("activities", line, row, "title", _length(Activity.title), required=True),
+            "description": check.text("activities", line, row, "description", None),
+            "activity_date": check.date("activities", line, row, "activity_date", required=True),
+            "location": check.text("activities", line, row, "location", _length(Activity.location)),
+            "status": status,
+        }
+        if status not in STATUSES:
+            check.error("activities", line, f"status must be one of {', '.join(STATUSES)}, not '{status}'.")
+        if not so_code:
+            check.error("activities", line, "so_code is required.")
+            continue
+        if so_code not in so_codes:
+            check.error("activities", line, f"Unknown SO {so_code}.")
+            continue
+        key = (so_code, indicator_code) if indicator_code else None
+        if key and key not in indicator_keys:
+            check.error("activities", line, f"Unknown indicator {indicator_code} under {so_code}.")
+            continue
+        new_activities.append((so_code, key, values))
+
+    if check.errors:
+        raise LogframeError(sorted(check.errors, key=lambda e: (list(SHEETS).index(e[0]), e[1])))
+
+    if project_row is not None:
+        project = Project(**project_row)
+        db.session.add(project)
+        db.session.flush()
+        project_id = project.id
+
+    conn = db.session.connection()
+    so_ids = dict(existing_sos)
+    so_ids.update(zip(new_sos, _insert_many(conn, StrategicObjective, [
+        {"project_id": project_id, **values} for _, values in new_sos.values()
+    ])))
+    indicator_ids = dict(existing_indicators)
+    indicator_ids.update(zip(new_indicators, _insert_many(conn, Indicator, [
+        {"strategic_objective_id": so_ids[so_code], **values}
+        for (so_code, _), (_, values) in new_indicators.items()
+    ])))
+    activity_ids = _insert_many(conn, Activity, [
+        {
+            "strategic_objective_id": so_ids[so_code],
+            "indicator_id": indicator_ids[key] if key else None,
+            **values,
+        }
+        for so_code, key, values in new_activities
+    ])
+
+    rollups.apply_state_changes(db.session, {}, new_ids=activity_ids)
+    mark_dirty(db.session)
+    db.session.commit()
+    return LogframeResult(project_id, len(new_sos), len(new_indicators), len(activity_ids))
+
+
+def _insert_many(conn, model, rows):
+    """Insert ``rows`` with one executemany; their new ids in the same order."""
+    if not rows:
+        return []
+    table = model.__table__
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    return list(conn.execute(stmt, rows).scalars())
+
+
+logframe_cli = AppGroup("logframe", help="Import project logframes.")
+
+
+@logframe_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--project-id", type=int, help="Add to this project instead of creating one from the project sheet.")
+def import_command(path, project_id):
+    """Load the SOs, indicators and activities of an XLSX logframe workbook."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        result = import_logframe(read_workbook(data), project_id=project_id)
+    except LogframeError as e:
+        for sheet, line, message in e.errors:
+            click.echo(f"{sheet} line {line}: {message}", err=True)
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Project {result.project_id}: {result.sos} SOs, {result.indicators} indicators, "
+        f"{result.activities} activities imported."
+    )
+
+
+def init_app(app):
+    app.cli.add_command(logframe_cli)
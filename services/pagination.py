@@ -0,0 +1,73 @@
+"""Keyset (seek) pagination for list pages.
+
+Lists are ordered newest first by ``(sort column, id)``. A page is the next
+``per_page`` rows strictly after the last row of the previous page, found
+through the index on the sort column, so the cost of a page does not grow
+with its position in the table (unlike OFFSET).
+
+The position is passed between pages as an opaque ``after`` cursor: the
+urlsafe-base64 JSON of the last row's ``[sort value, id]``.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+
+class Page:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(value, row_id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, value_type):
+    """``(sort value, id)`` of a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        if value is not None and value_type in (date, datetime):
+            value = value_type.fromisoformat(value)
+        return value, int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def keyset_page(query, sort_col, id_col, after: str = None, per_page: int = 50) -> Page:
+    """The page of ``query`` (newest first by ``sort_col``, ``id_col``) following cursor ``after``.
+
+    ``sort_col`` must be NOT NULL: a NULL never compares less than the
+    cursor, so such rows would only ever appear on the first page. A
+    malformed cursor starts from the first page.
+    """
+    value_type = sort_col.type.python_type
+    position = decode_cursor(after, value_type) if after else None
+    if position is not None:
+        value, row_id = position
+        query = query.filter(or_(sort_col < value, and_(sort_col == value, id_col < row_id)))
+
+    rows = query.order_by(sort_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return Page(items, next_cursor)
+
+
+def page_size(args, default: int = 50, maximum: int = 500) -> int:
+    """``per_page`` from request args, clamped to 1..maximum."""
+    n = args.get("per_page", type=int) or default
+    return max(1, min(n, maximum))
@@ -0,0 +1,137 @@
+"""Columnar cache of parsed test score uploads.
+
+Parsing an .xlsx with openpyxl is slow, so each upload is parsed once and
+stored, keyed by the sha256 of its bytes, as three files:
+
+    <hash>.json     column names, kinds and category labels
+    <hash>.num.npy  float64 block of the numeric columns (column-major)
+    <hash>.cat.npy  int32 category codes of the other columns (-1 = missing)
+
+Headers are stripped and lower-cased and ``pre_*`` / ``post_*`` columns are
+coerced to numbers. Later analyses memory-map the ``.npy`` blocks
+(``np.load(mmap_mode="r")``) instead of re-reading the workbook; a column is
+only copied when it is turned into a pandas object.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+class ParsedUpload:
+    def __init__(self, meta: dict, num: np.ndarray, cat: np.ndarray):
+        self.rows = meta["rows"]
+        self._meta = {c["name"]: c for c in meta["columns"]}
+        self._num = num
+        self._cat = cat
+
+    @property
+    def columns(self):
+        return list(self._meta)
+
+    def is_numeric(self, name: str) -> bool:
+        return self._meta[name]["kind"] == "num"
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Read-only float64 view of a numeric column."""
+        return self._num[:, self._meta[name]["index"]]
+
+    def numeric_block(self, names) -> np.ndarray:
+        """(rows x len(names)) float64 copy of numeric columns, in one indexing pass."""
+        return self._num[:, [self._meta[n]["index"] for n in names]]
+
+    def series(self, name: str) -> pd.Series:
+        col = self._meta[name]
+        if col["kind"] == "num":
+            values = np.array(self.numeric(name))
+            if col.get("int"):
+                values = values.astype(np.int64)
+            return pd.Series(values, name=name)
+        codes = self._cat[:, col["index"]]
+        return pd.Series(pd.Categorical.from_codes(codes, categories=col["categories"]), name=name)
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        return pd.DataFrame({c: self.series(c) for c in (columns or self.columns)})
+
+
+def normalize(df: pd.DataFrame):
+    """``(meta, numeric block, code block)`` for a freshly parsed upload."""
+    # Later duplicates win, as in analyze_data's column lookup
+    named = {str(c).strip().lower(): df[c] for c in df.columns}
+
+    columns, num_cols, cat_cols = [], [], []
+    for name, s in named.items():
+        if name.startswith(("pre_", "post_")):
+            s = pd.to_numeric(s, errors="coerce")
+        if s.dtype.kind in "iuf":
+            columns.append({"name": name, "kind": "num", "index": len(num_cols),
+                            "int": s.dtype.kind in "iu"})
+            num_cols.append(s.to_numpy(dtype=np.float64))
+        else:
+            # Labels are the str() of each value, as astype(str) would give
+            cat = pd.Categorical(s.map(str, na_action="ignore"))
+            columns.append({"name": name, "kind": "cat", "index": len(cat_cols),
+                            "categories": [str(c) for c in cat.categories]})
+            cat_cols.append(cat.codes.astype(np.int32))
+
+    rows = len(df)
+    num = np.asfortranarray(np.column_stack(num_cols) if num_cols else np.empty((rows, 0)))
+    cat = np.asfortranarray(np.column_stack(cat_cols) if cat_cols else np.empty((rows, 0), np.int32))
+    return {"version": FORMAT_VERSION, "rows": rows, "columns": columns}, num, cat
+
+
+def _paths(directory: str, content_hash: str):
+    base = os.path.join(directory, content_hash)
+    return f"{base}.json", f"{base}.num.npy", f"{base}.cat.npy"
+
+
+def load(directory: str, content_hash: str):
+    """The cached upload, or None if it is missing, incomplete or outdated."""
+    paths = _paths(directory, content_hash)
+    try:
+        with open(paths[0], encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            return None
+        num = np.load(paths[1], mmap_mode="r")
+        cat = np.load(paths[2], mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+
+    # Keep recently used entries ahead of the reaper's size quota
+    for p in paths:
+        try:
+            os.utime(p, None)
+        except FileNotFoundError:
+            pass
+    return ParsedUpload(meta, num, cat)
+
+
+def store(directory: str, content_hash: str, df: pd.DataFrame) -> ParsedUpload:
+    meta, num, cat = normalize(df)
+    os.makedirs(directory, exist_ok=True)
+    meta_path, num_path, cat_path = _paths(directory, content_hash)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    # Blocks first, metadata last: load() treats a missing .json as a miss
+    for path, block in ((num_path, num), (cat_path, cat)):
+        with open(path + suffix, "wb") as fh:
+            np.save(fh, block)
+        os.replace(path + suffix, path)
+    with open(meta_path + suffix, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    os.replace(meta_path + suffix, meta_path)
+
+    return ParsedUpload(meta, num, cat)
+
+
+def parsed_upload(directory: str, content_hash: str, filepath: str, read) -> ParsedUpload:
+    """Load the cached parse of ``filepath``, parsing it with ``read(filepath)`` on a miss."""
+    parsed = load(directory, content_hash)
+    if parsed is None:
+        parsed = store(directory, content_hash, read(filepath))
+    return parsed
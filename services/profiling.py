@@ -0,0 +1,175 @@
+"""Opt-in per-request SQL profiling (``QUERY_PROFILING=1``).
+
+Every statement a request runs is timed with ``before_cursor_execute`` /
+``after_cursor_execute`` hooks on the app's engines. After the request:
+
+* a ``Server-Timing`` header reports the SQL time and query count next to
+  the total request time (visible in the browser's network panel);
+* one JSON line is logged with the query count, SQL time, the slowest
+  statements and any statement repeated ``QUERY_PROFILING_REPEAT`` or more
+  times, which is usually a lazy load in a loop (N+1); such requests are
+  logged as warnings;
+* the profile is kept in memory (the last ``QUERY_PROFILING_HISTORY``
+  requests) for ``/_debug/perf``, which also shows the plan (``EXPLAIN``)
+  of each request's slowest SELECTs.
+
+Queries outside a request (CLI, background jobs) are not recorded. The
+debug page shows SQL and parameters, so only enable this where that is
+acceptable.
+"""
+import json
+import threading
+import time
+from collections import Counter, deque
+
+from flask import abort, current_app, g, has_request_context, jsonify, render_template, request
+from sqlalchemy import event
+
+from extensions import db
+
+# Slowest statements kept per request
+TOP_STATEMENTS = 5
+# Query plans cached for the debug page
+MAX_PLANS = 500
+
+_history = deque()
+_history_lock = threading.Lock()
+_plans = {}  # (engine url, statement) -> plan rows
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.id = f"{time.time_ns():x}"
+        self.method = method
+        self.path = path
+        self.status = None
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.queries = []  # (statement, parameters, ms, engine)
+
+    @property
+    def sql_ms(self) -> float:
+        return sum(q[2] for q in self.queries)
+
+    def slowest(self, n: int = TOP_STATEMENTS):
+        return sorted(self.queries, key=lambda q: q[2], reverse=True)[:n]
+
+    def repeated(self, threshold: int):
+        counts = Counter(q[0] for q in self.queries)
+        return [(statement, n) for statement, n in counts.most_common() if n >= threshold]
+
+    def to_dict(self, repeat_threshold: int) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 2),
+            "query_count": len(self.queries),
+            "sql_ms": round(self.sql_ms, 2),
+            "slowest": [{"sql": s, "ms": round(ms, 2)} for s, _, ms, _ in self.slowest()],
+            "repeated": [{"sql": s, "count": n} for s, n in self.repeated(repeat_threshold)],
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is discarded with the statement even if it raises
+    if has_request_context() and "perf_profile" in g:
+        context._perf_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_perf_started", None)
+    if started is None or not (has_request_context() and "perf_profile" in g):
+        return
+    ms = (time.perf_counter() - started) * 1000
+    g.perf_profile.queries.append((statement, None if executemany else parameters, ms, conn.engine))
+
+
+def _start_profile():
+    g.perf_profile = RequestProfile(request.method, request.path)
+
+
+def _finish_profile(response):
+    profile = g.pop("perf_profile", None)
+    if profile is None:
+        return response
+
+    profile.status = response.status_code
+    profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={profile.sql_ms:.1f};desc="{len(profile.queries)} queries", '
+        f"total;dur={profile.duration_ms:.1f}",
+    )
+
+    threshold = current_app.config["QUERY_PROFILING_REPEAT"]
+    record = profile.to_dict(threshold)
+    log = current_app.logger.warning if record["repeated"] else current_app.logger.info
+    log("query profile %s", json.dumps(record))
+
+    if request.endpoint != "perf_debug":
+        with _history_lock:
+            _history.append(profile)
+            while len(_history) > current_app.config["QUERY_PROFILING_HISTORY"]:
+                _history.popleft()
+    return response
+
+
+def explain(engine, statement: str, parameters):
+    """Query plan rows of a SELECT, or None for other statements."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    key = (str(engine.url), statement)
+    if key not in _plans:
+        if len(_plans) >= MAX_PLANS:
+            _plans.clear()
+        prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters or ()).all()
+            _plans[key] = [" | ".join(str(v) for v in row) for row in rows]
+        except Exception as e:
+            _plans[key] = [f"EXPLAIN failed: {e}"]
+    return _plans[key]
+
+
+def perf_debug():
+    with _history_lock:
+        profiles = list(reversed(_history))
+    threshold = current_app.config["QUERY_PROFILING_REPEAT"]
+    if request.args.get("format") == "json":
+        return jsonify([p.to_dict(threshold) for p in profiles])
+
+    selected = None
+    if request.args.get("id"):
+        selected = next((p for p in profiles if p.id == request.args["id"]), None)
+        if selected is None:
+            abort(404)
+    elif profiles:
+        selected = profiles[0]
+
+    slowest = []
+    if selected is not None:
+        slowest = [
+            {"sql": s, "params": params, "ms": ms, "plan": explain(engine, s, params)}
+            for s, params, ms, engine in selected.slowest()
+        ]
+    return render_template(
+        "debug/perf.html",
+        profiles=profiles,
+        selected=selected,
+        slowest=slowest,
+        repeated=selected.repeated(threshold) if selected is not None else [],
+    )
+
+
+def init_app(app):
+    if not app.config.get("QUERY_PROFILING"):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.add_url_rule("/_debug/perf", "perf_debug", perf_debug)
@@ -0,0 +1,155 @@
+"""Garbage collection for uploads and generated artefacts.
+
+Each reaper target is a directory + glob pattern with an age quota and a size
+quota. A sweep first deletes files older than ``max_age`` seconds, then, if
+the remaining files still exceed ``max_bytes``, deletes the least recently
+modified ones until they fit. A quota of 0 disables that check.
+
+Run a sweep with ``flask reaper sweep`` (``--dry-run`` to only report). To
+sweep every ``REAPER_INTERVAL`` seconds, run ``flask reaper run`` as its own
+process, or start the development server with ``python app.py``, which
+sweeps from a background thread. ``create_app()`` itself never starts the
+sweeper, so job and batch worker processes that build an app do not each
+run one.
+"""
+import fnmatch
+import os
+import threading
+import time
+from collections import namedtuple
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+Target = namedtuple("Target", "name directory pattern max_age max_bytes")
+
+_DAY = 24 * 3600
+
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+
+
+def reaper_targets(app=None):
+    app = app or current_app
+    cfg = app.config
+    root = app.root_path
+    return [
+        Target("uploads", os.path.join(root, "uploads", "testscore"), "*",
+               cfg.get("REAPER_UPLOAD_MAX_AGE", 7 * _DAY), cfg.get("REAPER_UPLOAD_MAX_BYTES", 0)),
+        Target("parsed", os.path.join(root, "uploads", "testscore_parsed"), "*",
+               cfg.get("REAPER_UPLOAD_MAX_AGE", 7 * _DAY), cfg.get("REAPER_PARSED_MAX_BYTES", 0)),
+        Target("charts", os.path.join(root, "static", "charts", "testscore"), "*.png",
+               cfg.get("REAPER_CHART_MAX_AGE", 30 * _DAY), cfg.get("CHART_CACHE_MAX_BYTES", 0)),
+        # report_<uuid>.docx / .pdf written by the standalone analyzer exports
+        Target("reports", os.path.join(root, "static"), "report_*",
+               cfg.get("REAPER_REPORT_MAX_AGE", _DAY), 0),
+        Target("exports", cfg.get("EXPORT_JOB_DIR") or os.path.join(root, "exports"), "*",
+               cfg.get("REAPER_EXPORT_MAX_AGE", _DAY), 0),
+    ]
+
+
+def sweep_dir(directory: str, pattern: str = "*", max_age: float = 0, max_bytes: int = 0,
+              keep: str = None, dry_run: bool = False, now: float = None):
+    """Apply the age and size quotas to one directory; returns (files, bytes) removed."""
+    if not os.path.isdir(directory):
+        return 0, 0
+    now = time.time() if now is None else now
+
+    entries = []
+    with os.scandir(directory) as it:
+        for e in it:
+            if not e.is_file(follow_symlinks=False) or not fnmatch.fnmatch(e.name, pattern):
+                continue
+            st = e.stat(follow_symlinks=False)
+            entries.append((st.st_mtime, st.st_size, e.path, e.name))
+    entries.sort()
+
+    doomed = []
+    kept_bytes = 0
+    for mtime, size, path, name in entries:
+        if max_age > 0 and now - mtime > max_age and name != keep:
+            doomed.append((path, size))
+        else:
+            kept_bytes += size
+
+    if max_bytes > 0 and kept_bytes > max_bytes:
+        aged = {p for p, _ in doomed}
+        for mtime, size, path, name in entries:
+            if kept_bytes <= max_bytes:
+                break
+            if path in aged or name == keep:
+                continue
+            doomed.append((path, size))
+            kept_bytes -= size
+
+    removed = freed = 0
+    for path, size in doomed:
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def sweep(app=None, dry_run: bool = False):
+    """Sweep every target; returns {target name: (files, bytes) removed}."""
+    now = time.time()
+    return {
+        t.name: sweep_dir(t.directory, t.pattern, t.max_age, t.max_bytes, dry_run=dry_run, now=now)
+        for t in reaper_targets(app)
+    }
+
+
+def _sweeper_loop(app, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            results = sweep(app)
+            removed = sum(n for n, _ in results.values())
+            if removed:
+                app.logger.info("Reaper removed %d files: %s", removed, results)
+        except Exception:
+            app.logger.exception("Reaper sweep failed")
+
+
+def start_sweeper(app):
+    global _sweeper_started
+    interval = app.config.get("REAPER_INTERVAL", 0)
+    if interval <= 0:
+        return
+    with _sweeper_lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+    threading.Thread(target=_sweeper_loop, args=(app, interval), name="reaper", daemon=True).start()
+
+
+reaper_cli = AppGroup("reaper", help="Delete old uploads, charts and generated reports.")
+
+
+@reaper_cli.command("sweep")
+@click.option("--dry-run", is_flag=True, help="Only report what would be deleted.")
+def sweep_command(dry_run):
+    """Apply the age and size quotas to every artefact directory."""
+    for name, (files, size) in sweep(dry_run=dry_run).items():
+        verb = "would remove" if dry_run else "removed"
+        click.echo(f"{name}: {verb} {files} files ({size / 1024 / 1024:.1f} MB)")
+
+
+@reaper_cli.command("run")
+def run_command():
+    """Sweep every REAPER_INTERVAL seconds until interrupted."""
+    app = current_app._get_current_object()
+    interval = app.config.get("REAPER_INTERVAL", 0)
+    if interval <= 0:
+        raise click.UsageError("Set REAPER_INTERVAL to the number of seconds between sweeps.")
+    click.echo(f"Sweeping every {interval}s")
+    _sweeper_loop(app, interval)
+
+
+def init_app(app):
+    app.cli.add_command(reaper_cli)
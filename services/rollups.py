@@ -0,0 +1,212 @@
+"""Materialized reach rollups for the dashboard.
+
+Three small tables hold per-SO, per-status and per-month totals
+(activity count, attendance rows, male, female). They are kept in step with
+``activities`` / ``activity_attendance`` by two session hooks:
+
+* ``before_flush`` snapshots the persisted state of every activity touched by
+  the flush (its SO, status, month and attendance counts);
+* ``after_flush`` reads the same activities again and applies
+  ``new - old`` to the rollup rows, inside the same transaction.
+
+Writes that bypass the ORM unit of work (bulk imports, raw SQL) must call
+``rebuild_reach_rollups()`` afterwards, or use ``flask rollups rebuild``.
+When the touched activities are known, snapshotting them with
+``activity_states()`` before the write and passing that to
+``apply_state_changes()`` after it does the same incrementally.
+"""
+from collections import defaultdict
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, select, insert, update, delete
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import (
+    Activity,
+    ActivityAttendance,
+    SOReachRollup,
+    StatusReachRollup,
+    MonthlyReachRollup,
+)
+
+_SESSION_KEY = "reach_rollup_before"
+
+_ROLLUPS = (
+    # (model, key column, key of an activity state)
+    (SOReachRollup, SOReachRollup.strategic_objective_id, lambda s: s["so_id"]),
+    (StatusReachRollup, StatusReachRollup.status, lambda s: s["status"]),
+    (MonthlyReachRollup, MonthlyReachRollup.month, lambda s: s["month"]),
+)
+
+_COUNTERS = ("activity_count", "attendance_count", "male_count", "female_count")
+
+
+def _month_key(d) -> str:
+    return d.strftime("%Y-%m") if d else ""
+
+
+def _activity_ids(objects):
+    ids = set()
+    for obj in objects:
+        if isinstance(obj, Activity):
+            if obj.id is not None:
+                ids.add(obj.id)
+        elif isinstance(obj, ActivityAttendance):
+            if obj.activity_id is not None:
+                ids.add(obj.activity_id)
+            elif obj.activity is not None and obj.activity.id is not None:
+                ids.add(obj.activity.id)
+            # activity_id may have been re-pointed: keep the old parent too
+            hist = inspect(obj).attrs.activity_id.history
+            ids.update(v for v in hist.deleted if v is not None)
+    return ids
+
+
+def _load_states(session, ids):
+    """Current DB state of the given activities, keyed by activity id."""
+    if not ids:
+        return {}
+    rows = session.execute(
+        select(
+            Activity.id,
+            Activity.strategic_objective_id,
+            Activity.status,
+            Activity.activity_date,
+            ActivityAttendance.id.label("attendance_id"),
+            ActivityAttendance.male_count,
+            ActivityAttendance.female_count,
+        )
+        .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
+        .where(Activity.id.in_(ids))
+    ).all()
+
+    states = {}
+    for r in rows:
+        st = states.setdefault(r.id, {
+            "so_id": r.strategic_objective_id,
+            "status": r.status or "",
+            "month": _month_key(r.activity_date),
+            "activity_count": 1,
+            "attendance_count": 0,
+            "male_count": 0,
+            "female_count": 0,
+        })
+        if r.attendance_id is not None:
+            st["attendance_count"] += 1
+            st["male_count"] += int(r.male_count or 0)
+            st["female_count"] += int(r.female_count or 0)
+    return states
+
+
+def _touched(session):
+    return [
+        o for o in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(o, (Activity, ActivityAttendance))
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _snapshot_before_flush(session, flush_context, instances):
+    objects = _touched(session)
+    if not objects:
+        return
+    ids = _activity_ids(objects)
+    session.info[_SESSION_KEY] = (objects, _load_states(session, ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_after_flush(session, flush_context):
+    pending = session.info.pop(_SESSION_KEY, None)
+    if pending is None:
+        return
+    objects, before = pending
+    ids = set(before) | _activity_ids(objects)
+    after = _load_states(session, ids)
+    _apply_deltas(session.connection(), _deltas(before, after))
+
+
+def activity_states(session, ids):
+    """Snapshot of the given activities for ``apply_state_changes()``."""
+    return _load_states(session, ids)
+
+
+def apply_state_changes(session, before, new_ids=()):
+    """Update the rollups for changes to the activities snapshotted in ``before``.
+
+    ``new_ids`` are activities created since the snapshot (they have no before state).
+    """
+    after = _load_states(session, set(before) | set(new_ids))
+    _apply_deltas(session.connection(), _deltas(before, after))
+
+
+def _deltas(before, after):
+    deltas = [defaultdict(lambda: dict.fromkeys(_COUNTERS, 0)) for _ in _ROLLUPS]
+    for sign, states in ((-1, before), (1, after)):
+        for st in states.values():
+            for (_, _, key_of), bucket in zip(_ROLLUPS, deltas):
+                d = bucket[key_of(st)]
+                for c in _COUNTERS:
+                    d[c] += sign * st[c]
+    return deltas
+
+
+def _apply_deltas(conn, deltas):
+    for (model, key_col, _), bucket in zip(_ROLLUPS, deltas):
+        table = model.__table__
+        for key, d in bucket.items():
+            if not any(d.values()):
+                continue
+            res = conn.execute(
+                update(table)
+                .where(key_col == key)
+                .values({c: table.c[c] + d[c] for c in _COUNTERS})
+            )
+            if res.rowcount == 0:
+                conn.execute(insert(table).values({key_col.key: key, **d}))
+            else:
+                conn.execute(
+                    delete(table).where(key_col == key, table.c.activity_count <= 0)
+                )
+
+
+def rebuild_reach_rollups(conn=None):
+    """Recompute every rollup row from the base tables (one GROUP BY each)."""
+    conn = conn if conn is not None else db.session.connection()
+    keys = (
+        Activity.strategic_objective_id,
+        func.coalesce(Activity.status, ""),
+        func.strftime("%Y-%m", Activity.activity_date),
+    )
+    for (model, key_col, _), key_expr in zip(_ROLLUPS, keys):
+        table = model.__table__
+        conn.execute(delete(table))
+        agg = (
+            select(
+                key_expr,
+                func.count(Activity.id),
+                func.count(ActivityAttendance.id),
+                func.coalesce(func.sum(ActivityAttendance.male_count), 0),
+                func.coalesce(func.sum(ActivityAttendance.female_count), 0),
+            )
+            .select_from(Activity)
+            .outerjoin(ActivityAttendance, ActivityAttendance.activity_id == Activity.id)
+            .group_by(key_expr)
+        )
+        conn.execute(insert(table).from_select([key_col.key, *_COUNTERS], agg))
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the dashboard reach rollup tables.")
+
+
+@rollups_cli.command("rebuild")
+def rebuild_command():
+    """Recompute the reach rollups from activities and attendance."""
+    rebuild_reach_rollups()
+    db.session.commit()
+    click.echo("Reach rollups rebuilt.")
+
+
+def init_app(app):
+    app.cli.add_command(rollups_cli)
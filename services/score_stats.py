@@ -0,0 +1,418 @@
+"""Mergeable statistics for test score columns.
+
+``Moments`` holds count / mean / M2 (sum of squared deviations) of the
+non-NaN values seen so far. Two ``Moments`` combine in O(1) with the
+parallel-variance formula (Chan et al.), so partial results from file chunks,
+worker processes or stored analysis runs can be merged without revisiting the
+data. NaNs are skipped, matching ``np.nanmean`` and pandas' ``mean``.
+
+``ScoreSummary`` is the pre/post pair for one group of participants, plus the
+row count reported as N and, when the dataset has ``pre_x`` / ``post_x``
+column pairs, their ``GainSums``. With breakdowns requested, the overall
+summary also carries ``CellSummaries`` for every combination of the
+breakdown columns, and a ``PairSample`` of individual pre/post pairs for
+charts.
+"""
+import json
+
+import numpy as np
+
+NAN = float("nan")
+
+
+class Moments:
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = NAN, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def of(cls, values) -> "Moments":
+        v = np.asarray(values, dtype=np.float64)
+        v = v[~np.isnan(v)]
+        if not v.size:
+            return cls()
+        mean = float(v.mean())
+        d = v - mean
+        return cls(int(v.size), mean, float(np.dot(d, d)))
+
+    def merge(self, other: "Moments") -> "Moments":
+        """Fold ``other`` into this accumulator (in place) and return it."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        return self
+
+    def __add__(self, other: "Moments") -> "Moments":
+        return Moments(self.count, self.mean, self.m2).merge(other)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (ddof=1)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else NAN
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def to_list(self):
+        return [self.count, self.mean, self.m2]
+
+    @classmethod
+    def from_list(cls, data) -> "Moments":
+        count, mean, m2 = data
+        return cls(int(count), float(mean), float(m2))
+
+    def __repr__(self):
+        return f"Moments(count={self.count}, mean={self.mean!r}, m2={self.m2!r})"
+
+
+def grouped_moments(codes: np.ndarray, values, ngroups: int):
+    """One ``Moments`` per group for the non-NaN ``values``.
+
+    ``codes`` are group indexes in ``range(ngroups)``.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(v)
+    v0 = np.where(valid, v, 0.0)
+    counts = np.bincount(codes, weights=valid, minlength=ngroups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.bincount(codes, weights=v0, minlength=ngroups) / counts
+    d = np.where(valid, v0 - means[codes], 0.0)
+    m2 = np.bincount(codes, weights=d * d, minlength=ngroups)
+    return [
+        Moments(int(c), float(m), float(s)) if c else Moments()
+        for c, m, s in zip(counts, means, m2)
+    ]
+
+
+class GainSums:
+    """Additive per-metric sums for ``pre_x`` / ``post_x`` column pairs.
+
+    Only rows where both scores are present count towards a metric, as in
+    ``(post - pre).mean()``. Every field is a sum, so merging is addition.
+    """
+
+    __slots__ = ("labels", "pairs", "pre", "post", "improved")
+
+    def __init__(self, labels, pairs=None, pre=None, post=None, improved=None):
+        k = len(labels)
+        self.labels = list(labels)
+        self.pairs = np.zeros(k, np.int64) if pairs is None else np.asarray(pairs, np.int64)
+        self.pre = np.zeros(k) if pre is None else np.asarray(pre, np.float64)
+        self.post = np.zeros(k) if post is None else np.asarray(post, np.float64)
+        self.improved = np.zeros(k, np.int64) if improved is None else np.asarray(improved, np.int64)
+
+    @classmethod
+    def of(cls, labels, pre_block, post_block) -> "GainSums":
+        """From (rows x metrics) score blocks, column i belonging to ``labels[i]``."""
+        pre_block = np.asarray(pre_block, np.float64)
+        post_block = np.asarray(post_block, np.float64)
+        paired = ~(np.isnan(pre_block) | np.isnan(post_block))
+        return cls(
+            labels,
+            paired.sum(axis=0),
+            np.where(paired, pre_block, 0.0).sum(axis=0),
+            np.where(paired, post_block, 0.0).sum(axis=0),
+            (paired & (post_block > pre_block)).sum(axis=0),
+        )
+
+    def merge(self, other: "GainSums") -> "GainSums":
+        if other.labels != self.labels:
+            # Different files can carry different items: align on the union
+            index = {label: i for i, label in enumerate(self.labels)}
+            new = [label for label in other.labels if label not in index]
+            if new:
+                self.labels += new
+                grow = len(new)
+                self.pairs = np.concatenate([self.pairs, np.zeros(grow, np.int64)])
+                self.pre = np.concatenate([self.pre, np.zeros(grow)])
+                self.post = np.concatenate([self.post, np.zeros(grow)])
+                self.improved = np.concatenate([self.improved, np.zeros(grow, np.int64)])
+                index = {label: i for i, label in enumerate(self.labels)}
+            at = np.array([index[label] for label in other.labels], np.intp)
+        else:
+            at = slice(None)
+        self.pairs[at] += other.pairs
+        self.pre[at] += other.pre
+        self.post[at] += other.post
+        self.improved[at] += other.improved
+        return self
+
+    def copy(self) -> "GainSums":
+        return GainSums(self.labels, self.pairs.copy(), self.pre.copy(), self.post.copy(), self.improved.copy())
+
+    def metrics(self):
+        """One row per metric: n, mean_pre, mean_post, gain, pct_gain, improved_pct."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_pre = self.pre / self.pairs
+            mean_post = self.post / self.pairs
+            improved_pct = self.improved / self.pairs * 100
+        gain = mean_post - mean_pre
+        rows = []
+        for i, label in enumerate(self.labels):
+            mp = float(mean_pre[i])
+            rows.append({
+                "metric": label,
+                "n": int(self.pairs[i]),
+                "mean_pre": mp,
+                "mean_post": float(mean_post[i]),
+                "gain": float(gain[i]),
+                "pct_gain": float(gain[i] / mp * 100) if mp != 0 else 0.0,
+                "improved_pct": float(improved_pct[i]),
+            })
+        return rows
+
+    def to_dict(self) -> dict:
+        return {
+            "labels": self.labels,
+            "pairs": self.pairs.tolist(),
+            "pre": self.pre.tolist(),
+            "post": self.post.tolist(),
+            "improved": self.improved.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "GainSums":
+        return cls(data["labels"], data["pairs"], data["pre"], data["post"], data["improved"])
+
+
+_ONEHOT_CELLS = 4_000_000
+
+
+def grouped_gain_sums(codes: np.ndarray, ngroups: int, labels, pre_block, post_block):
+    """One ``GainSums`` per group, with all metrics reduced per group at once.
+
+    Each per-group sum is a (groups x rows) one-hot matrix times a
+    (rows x metrics) block, i.e. one BLAS call per field. Rows are taken in
+    slices so the one-hot matrix stays around ``_ONEHOT_CELLS`` entries.
+    """
+    pre_block = np.asarray(pre_block, np.float64)
+    post_block = np.asarray(post_block, np.float64)
+    k = len(labels)
+    pairs, pre, post, improved = (np.zeros((ngroups, k)) for _ in range(4))
+
+    step = max(1, _ONEHOT_CELLS // max(ngroups, 1))
+    for start in range(0, len(codes), step):
+        rows = slice(start, start + step)
+        c, a, b = codes[rows], pre_block[rows], post_block[rows]
+        paired = ~(np.isnan(a) | np.isnan(b))
+        onehot = np.zeros((ngroups, len(c)))
+        onehot[c, np.arange(len(c))] = 1.0
+        pairs += onehot @ paired
+        pre += onehot @ np.where(paired, a, 0.0)
+        post += onehot @ np.where(paired, b, 0.0)
+        improved += onehot @ (paired & (b > a))
+    return [
+        GainSums(labels, pairs[g].round(), pre[g], post[g], improved[g].round())
+        for g in range(ngroups)
+    ]
+
+
+class PairSample:
+    """Uniform sample of at most ``size`` (pre, post) pairs, for slopegraphs.
+
+    Each complete pair gets a random key and the ``size`` smallest keys are
+    kept (bottom-k sampling), so the samples of two chunks merge into a
+    uniform sample of both.
+    """
+
+    __slots__ = ("size", "keys", "pre", "post")
+
+    def __init__(self, size: int, keys=None, pre=None, post=None):
+        self.size = size
+        self.keys = np.empty(0) if keys is None else np.asarray(keys, dtype=np.float64)
+        self.pre = np.empty(0) if pre is None else np.asarray(pre, dtype=np.float64)
+        self.post = np.empty(0) if post is None else np.asarray(post, dtype=np.float64)
+
+    @classmethod
+    def of(cls, pre, post, size: int, rng=None) -> "PairSample":
+        pre = np.asarray(pre, dtype=np.float64)
+        post = np.asarray(post, dtype=np.float64)
+        ok = ~(np.isnan(pre) | np.isnan(post))
+        pre, post = pre[ok], post[ok]
+        keys = (rng or np.random.default_rng()).random(pre.size)
+        return cls(size)._keep(keys, pre, post)
+
+    def _keep(self, keys, pre, post) -> "PairSample":
+        if keys.size > self.size:
+            idx = np.argpartition(keys, self.size)[:self.size]
+            keys, pre, post = keys[idx], pre[idx], post[idx]
+        self.keys, self.pre, self.post = keys, pre, post
+        return self
+
+    def merge(self, other: "PairSample") -> "PairSample":
+        self.size = max(self.size, other.size)
+        return self._keep(
+            np.concatenate([self.keys, other.keys]),
+            np.concatenate([self.pre, other.pre]),
+            np.concatenate([self.post, other.post]),
+        )
+
+    def copy(self) -> "PairSample":
+        return PairSample(self.size, self.keys.copy(), self.pre.copy(), self.post.copy())
+
+    def to_dict(self) -> dict:
+        return {"size": self.size, "keys": self.keys.tolist(), "pre": self.pre.tolist(), "post": self.post.tolist()}
+
+    @classmethod
+    def from_dict(cls, data) -> "PairSample":
+        return cls(data["size"], data["keys"], data["pre"], data["post"])
+
+
+class ScoreSummary:
+    __slots__ = ("rows", "pre", "post", "items", "cells", "sample")
+
+    def __init__(self, rows: int = 0, pre: Moments = None, post: Moments = None, items: GainSums = None,
+                 cells: "CellSummaries" = None, sample: PairSample = None):
+        self.rows = rows
+        self.pre = pre or Moments()
+        self.post = post or Moments()
+        self.items = items
+        self.cells = cells
+        self.sample = sample
+
+    @classmethod
+    def of(cls, pre, post, items: GainSums = None) -> "ScoreSummary":
+        return cls(len(pre), Moments.of(pre), Moments.of(post), items)
+
+    def merge(self, other: "ScoreSummary") -> "ScoreSummary":
+        self.rows += other.rows
+        self.pre.merge(other.pre)
+        self.post.merge(other.post)
+        if other.items is not None:
+            self.items = other.items.copy() if self.items is None else self.items.merge(other.items)
+        if other.cells is not None:
+            self.cells = other.cells.copy() if self.cells is None else self.cells.merge(other.cells)
+        if other.sample is not None:
+            self.sample = other.sample.copy() if self.sample is None else self.sample.merge(other.sample)
+        return self
+
+    def metrics(self) -> dict:
+        mean_pre, mean_post = self.pre.mean, self.post.mean
+        return {
+            "n": int(self.rows),
+            "mean_pre": float(mean_pre),
+            "mean_post": float(mean_post),
+            "gain": float(mean_post - mean_pre),
+            "pct_gain": float(((mean_post - mean_pre) / mean_pre) * 100) if mean_pre != 0 else 0.0,
+        }
+
+    def to_dict(self) -> dict:
+        data = {"rows": self.rows, "pre": self.pre.to_list(), "post": self.post.to_list()}
+        if self.items is not None:
+            data["items"] = self.items.to_dict()
+        if self.cells is not None:
+            data["cells"] = self.cells.to_dict()
+        if self.sample is not None:
+            data["sample"] = self.sample.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data) -> "ScoreSummary":
+        items = GainSums.from_dict(data["items"]) if data.get("items") else None
+        cells = CellSummaries.from_dict(data["cells"]) if data.get("cells") else None
+        sample = PairSample.from_dict(data["sample"]) if data.get("sample") else None
+        return cls(int(data["rows"]), Moments.from_list(data["pre"]), Moments.from_list(data["post"]), items, cells,
+                   sample)
+
+
+def summarize_groups(codes: np.ndarray, labels, pre, post, item_labels=None, pre_block=None, post_block=None):
+    """``{label: ScoreSummary}`` for rows grouped by ``codes`` (indexes into ``labels``)."""
+    n = len(labels)
+    rows = np.bincount(codes, minlength=n)
+    pre_m = grouped_moments(codes, pre, n)
+    post_m = grouped_moments(codes, post, n)
+    items = [None] * n
+    if item_labels:
+        items = grouped_gain_sums(codes, n, item_labels, pre_block, post_block)
+    return {
+        labels[i]: ScoreSummary(int(rows[i]), pre_m[i], post_m[i], items[i])
+        for i in range(n) if rows[i]
+    }
+
+
+def merge_groups(into: dict, other: dict) -> dict:
+    for label, s in other.items():
+        if label in into:
+            into[label].merge(s)
+        else:
+            into[label] = ScoreSummary(s.rows, s.pre + Moments(), s.post + Moments(),
+                                       s.items.copy() if s.items is not None else None)
+    return into
+
+
+class CellSummaries:
+    """``ScoreSummary`` per combination of labels of several dimension columns.
+
+    Rows are summarised once at the finest grain (all dimensions together).
+    Any marginal or cross-tab of a subset of the dimensions is then a roll-up
+    of these cells, as with SQL ``GROUPING SETS``, without another pass over
+    the rows.
+    """
+
+    __slots__ = ("dims", "cells")
+
+    def __init__(self, dims, cells: dict = None):
+        self.dims = list(dims)
+        self.cells = cells if cells is not None else {}
+
+    @classmethod
+    def of(cls, dims, codes, labels, pre, post) -> "CellSummaries":
+        """``codes[i]`` are per-row indexes into ``labels[i]``, the labels of ``dims[i]``."""
+        sizes = [len(lab) for lab in labels]
+        combined = np.ravel_multi_index(tuple(codes), sizes)
+        cell_ids, cell_codes = np.unique(combined, return_inverse=True)
+        keys = [
+            tuple(labels[d][i] for d, i in enumerate(idx))
+            for idx in zip(*np.unravel_index(cell_ids, sizes))
+        ]
+        return cls(dims, summarize_groups(cell_codes, keys, pre, post))
+
+    def merge(self, other: "CellSummaries") -> "CellSummaries":
+        if other.dims != self.dims:
+            raise ValueError("Cannot merge breakdowns over different columns.")
+        merge_groups(self.cells, other.cells)
+        return self
+
+    def copy(self) -> "CellSummaries":
+        return CellSummaries(self.dims, merge_groups({}, self.cells))
+
+    def rollup(self, dims) -> dict:
+        """``{label tuple: ScoreSummary}`` over ``dims`` (a subset of ``self.dims``)."""
+        idx = [self.dims.index(d) for d in dims]
+        out = {}
+        for key, s in self.cells.items():
+            merge_groups(out, {tuple(key[i] for i in idx): s})
+        return out
+
+    def to_dict(self) -> dict:
+        return {"dims": self.dims, "cells": [[list(k), s.to_dict()] for k, s in self.cells.items()]}
+
+    @classmethod
+    def from_dict(cls, data) -> "CellSummaries":
+        return cls(data["dims"], {tuple(k): ScoreSummary.from_dict(v) for k, v in data["cells"]})
+
+
+def dump_summary(overall: ScoreSummary, groups) -> str:
+    return json.dumps({
+        "overall": overall.to_dict(),
+        "groups": {k: s.to_dict() for k, s in groups.items()} if groups is not None else None,
+    })
+
+
+def load_summary(text: str):
+    data = json.loads(text)
+    groups = data.get("groups")
+    if groups is not None:
+        groups = {k: ScoreSummary.from_dict(v) for k, v in groups.items()}
+    return ScoreSummary.from_dict(data["overall"]), groups
@@ -0,0 +1,119 @@
+"""Batch test score analysis in a process pool.
+
+Parsing and summarising a score sheet (pandas) is CPU-bound and holds the
+GIL, so a batch of files is spread over spawned worker processes, each with
+its own app (for the streaming and chunking config). Workers only read the
+saved files and return each one's analysis result (summary, tables and narrative); the
+caller stores them as runs. No chart is drawn here: the browser renders the
+chart specs built from a stored run.
+"""
+import multiprocessing
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from flask import current_app
+
+# Config copied into worker apps
+_WORKER_CONFIG_KEYS = ("TESTSCORE_STREAM_MIN_BYTES", "TESTSCORE_CHUNK_ROWS", "CHART_CACHE_MAX_BYTES")
+
+# Set in pool worker processes by _init_worker()
+_worker_app = None
+
+
+def expand_uploads(files, allowed, max_files: int = 0, max_file_bytes: int = 0, max_total_bytes: int = 0):
+    """Flatten uploads (``(filename, bytes)``) into dataset files, unpacking zips.
+
+    Returns ``(datasets, skipped)``: datasets as ``(filename, bytes)`` pairs and
+    the names rejected by ``allowed(filename)``. Raises ValueError past
+    ``max_files`` datasets, a dataset over ``max_file_bytes`` or datasets
+    totalling over ``max_total_bytes`` (0 = no limit). Zip members are checked
+    against their declared size before they are decompressed; zipfile never
+    inflates a member past that size.
+    """
+    datasets, skipped = [], []
+    total = 0
+
+    def add(name, size, read):
+        nonlocal total
+        if max_files and len(datasets) >= max_files:
+            raise ValueError(f"A batch can contain at most {max_files} files.")
+        if max_file_bytes and size > max_file_bytes:
+            raise ValueError(f"{name} is larger than {max_file_bytes // (1024 * 1024)} MB.")
+        total += size
+        if max_total_bytes and total > max_total_bytes:
+            raise ValueError(f"A batch can contain at most {max_total_bytes // (1024 * 1024)} MB of data.")
+        datasets.append((os.path.basename(name), read()))
+
+    for filename, data in files:
+        if filename.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(BytesIO(data)) as zf:
+                    for info in zf.infolist():
+                        name = os.path.basename(info.filename)
+                        if info.is_dir() or info.filename.startswith("__MACOSX/") or not name:
+                            continue
+                        if not allowed(name):
+                            skipped.append(f"{filename}/{info.filename}")
+                            continue
+                        add(f"{filename}/{info.filename}", info.file_size, lambda: zf.read(info))
+            except zipfile.BadZipFile:
+                skipped.append(filename)
+        elif allowed(filename):
+            add(filename, len(data), lambda: data)
+        else:
+            skipped.append(filename)
+    return datasets, skipped
+
+
+def save_upload(directory: str, filename: str, data: bytes) -> str:
+    path = os.path.join(directory, f"{uuid.uuid4().hex}_{os.path.basename(filename)}")
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return path
+
+
+def analyze_paths(paths, disaggregate: bool, workers: int = None, breakdowns=()):
+    """Analyse each file; returns ``(result, error)`` per path, in order.
+
+    ``result`` is ``routes.testscore.analyze_upload()``'s dict; ``error`` is the
+    message of the exception that made the file fail.
+    """
+    app = current_app._get_current_object()
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [_analyze(p, disaggregate, breakdowns) for p in paths]
+
+    config = {k: app.config[k] for k in _WORKER_CONFIG_KEYS if k in app.config}
+    config["SQLALCHEMY_DATABASE_URI"] = app.config["SQLALCHEMY_DATABASE_URI"]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(config,),
+    ) as pool:
+        n = len(paths)
+        return list(pool.map(_analyze_in_worker, paths, [disaggregate] * n, [breakdowns] * n))
+
+
+def _init_worker(config: dict):
+    global _worker_app
+    from app import create_app
+
+    _worker_app = create_app(config)
+
+
+def _analyze_in_worker(path: str, disaggregate: bool, breakdowns=()):
+    with _worker_app.app_context():
+        return _analyze(path, disaggregate, breakdowns)
+
+
+def _analyze(path: str, disaggregate: bool, breakdowns=()):
+    from routes.testscore import analyze_upload
+
+    try:
+        return analyze_upload(path, disaggregate, breakdowns), None
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__
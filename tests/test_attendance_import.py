@@ -0,0 +1,14 @@
+import pytest
+
+from services.attendance_import import MAX_COUNT, _count
+
+
+@pytest.mark.parametrize("value, expected", [("", 0), (" 12 ", 12), ("3.0", 3), (str(MAX_COUNT), MAX_COUNT)])
+def test_count_accepts_whole_numbers(value, expected):
+    assert _count(value, "male_count") == expected
+
+
+@pytest.mark.parametrize("value", ["abc", "-1", "2.5", "inf", "-inf", "nan", "1e400", str(MAX_COUNT + 1), "1e18"])
+def test_count_rejects_invalid_values_as_row_errors(value):
+    with pytest.raises(ValueError, match="male_count"):
+        _count(value, "male_count")
@@ -0,0 +1,23 @@
+from services.cache import TTLCache
+
+
+def test_get_or_set_caches_factory_result():
+    cache = TTLCache()
+    calls = []
+    assert cache.get_or_set("k", lambda: calls.append(1) or "v") == "v"
+    assert cache.get_or_set("k", lambda: calls.append(1) or "w") == "v"
+    assert len(calls) == 1
+
+
+def test_get_or_set_does_not_store_payload_computed_across_clear():
+    cache = TTLCache()
+
+    def factory():
+        # A commit invalidates the cache while the payload is being built
+        cache.clear()
+        return "stale"
+
+    assert cache.get_or_set("k", factory) == "stale"
+    assert cache.get("k") is None
+    assert cache.get_or_set("k", lambda: "fresh") == "fresh"
+    assert cache.get("k") == "fresh"
@@ -0,0 +1,12 @@
+from services.chart_render import render_local
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_local_returns_png_of_figure_size():
+    spec = {"figsize": [4, 3], "dpi": 50, "labels": ["a", "b"], "values": [1, 2], "title": "t"}
+    png = render_local("bars", spec)
+    assert png.startswith(PNG_SIGNATURE)
+    # IHDR width and height
+    assert int.from_bytes(png[16:20], "big") == 200
+    assert int.from_bytes(png[20:24], "big") == 150
@@ -0,0 +1,90 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from extensions import db
+from models import ExportJob
+from services import jobs
+
+_release = threading.Event()
+
+
+@jobs.export_job("test_blocking", "txt")
+def _blocking_renderer(params, fh):
+    _release.wait(10)
+    fh.write(b"ok")
+    return "test.txt", "text/plain"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_executor", None)
+    monkeypatch.setattr(jobs, "_owner", None)
+    _release.clear()
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'jobs.db'}",
+        "SQLALCHEMY_BINDS": {},
+        "EXPORT_JOB_DIR": str(tmp_path / "exports"),
+        "EXPORT_JOB_WORKERS": 1,
+        "EXPORT_JOB_HEARTBEAT": 3600,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+    _release.set()
+
+
+def _statuses():
+    db.session.expire_all()
+    return {j.id: (j.status, j.error) for j in db.session.scalars(db.select(ExportJob))}
+
+
+def test_new_process_leaves_live_siblings_jobs_and_fails_dead_owners(app):
+    # Process A: one job running (blocked in the renderer), one queued behind it
+    running = jobs.submit("test_blocking", {})
+    queued = jobs.submit("test_blocking", {})
+    executor_a, owner_a = jobs._executor, jobs._owner
+
+    # Jobs of a process that died long ago, and of a version without heartbeats
+    stale = datetime.utcnow() - timedelta(hours=4)
+    db.session.add(ExportJob(id="dead", kind="test_blocking", params="{}", status="running",
+                             owner="gone:1:x", heartbeat_at=stale))
+    db.session.add(ExportJob(id="legacy", kind="test_blocking", params="{}", status="queued"))
+    db.session.commit()
+
+    # Process B starts its pool on the same database
+    jobs._executor = None
+    executor_b = jobs._get_executor(app)
+    assert jobs._owner != owner_a
+
+    statuses = _statuses()
+    assert statuses["dead"] == ("failed", jobs.INTERRUPTED_ERROR)
+    assert statuses["legacy"] == ("failed", jobs.INTERRUPTED_ERROR)
+    assert statuses[running.id][0] in ("queued", "running")
+    assert statuses[queued.id] == ("queued", None)
+
+    # A's jobs are neither lost nor flipped
+    _release.set()
+    executor_a.shutdown()
+    executor_b.shutdown()
+    statuses = _statuses()
+    assert statuses[running.id] == ("done", None)
+    assert statuses[queued.id] == ("done", None)
+
+
+def test_heartbeat_keeps_owners_unfinished_jobs_alive(app):
+    stale = datetime.utcnow() - timedelta(hours=4)
+    for job_id, owner, status in (("mine", "a", "queued"), ("theirs", "b", "queued"), ("finished", "a", "done")):
+        db.session.add(ExportJob(id=job_id, kind="test_blocking", params="{}", status=status,
+                                 owner=owner, heartbeat_at=stale))
+    db.session.commit()
+
+    jobs._heartbeat("a")
+    assert jobs.fail_interrupted_jobs(3600) == 1
+
+    statuses = _statuses()
+    assert statuses["mine"] == ("queued", None)
+    assert statuses["theirs"] == ("failed", jobs.INTERRUPTED_ERROR)
+    assert statuses["finished"] == ("done", None)
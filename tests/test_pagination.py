@@ -0,0 +1,41 @@
+import os
+from datetime import datetime
+
+from flask_migrate import upgrade
+from sqlalchemy import inspect, text
+
+from app import create_app
+from extensions import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def test_rows_without_created_at_are_backfilled_and_reachable_by_paging(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pages.db'}", "SQLALCHEMY_BINDS": {}})
+    with app.app_context():
+        upgrade(directory=MIGRATIONS, revision="5c3e81f0a9d2")
+        db.session.execute(text("INSERT INTO projects (id, name, goal) VALUES (1, 'P', 'g')"))
+        for i in range(1, 8):
+            # Rows 2, 4 and 6 predate created_at defaults
+            created = None if i % 2 == 0 else f"{datetime(2025, 1, i):%Y-%m-%d %H:%M:%S.%f}"
+            db.session.execute(text(
+                "INSERT INTO strategic_objectives (id, project_id, so_code, title, created_at) "
+                "VALUES (:id, 1, :code, 't', :created)"
+            ), {"id": i, "code": f"SO{i}", "created": created})
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS)
+        assert not db.session.execute(text(
+            "SELECT COUNT(*) FROM strategic_objectives WHERE created_at IS NULL"
+        )).scalar()
+        columns = {c["name"]: c for c in inspect(db.engine).get_columns("strategic_objectives")}
+        assert columns["created_at"]["nullable"] is False
+        assert "ix_sos_created_at" in {i["name"] for i in inspect(db.engine).get_indexes("strategic_objectives")}
+
+    client = app.test_client()
+    ids, url = [], "/sos/?format=json&per_page=2"
+    while url:
+        data = client.get(url).get_json()
+        ids += [item["id"] for item in data["items"]]
+        url = data["next_url"]
+    assert ids == [7, 5, 3, 1, 6, 4, 2]
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from extensions import db
+
+
+@pytest.fixture
+def app():
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "SQLALCHEMY_BINDS": {}, "QUERY_PROFILING": True})
+
+    @app.get("/_test/sql")
+    def run_sql():
+        try:
+            db.session.execute(db.text("SELECT * FROM missing_table"))
+        except OperationalError:
+            db.session.rollback()
+        db.session.execute(db.text("SELECT 1"))
+        return {"connection_info": sorted(db.session.connection().info)}
+
+    return app
+
+
+def test_failed_statement_leaves_no_timing_state_and_next_query_is_profiled(app):
+    response = app.test_client().get("/_test/sql")
+    assert response.status_code == 200
+    assert "perf_started" not in response.json["connection_info"]
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
@@ -0,0 +1,113 @@
+"""EXPLAIN QUERY PLAN checks: the period, list and dashboard queries on
+``activities`` seek the composite indexes from migration 890b69950b15
+instead of scanning the table or the all-projects date index.
+
+The schema is built by running the migrations, so the indexes checked are
+the ones a deployed database has.
+"""
+import os
+from datetime import date, timedelta
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import event, insert
+
+from app import create_app
+from extensions import db
+from models import Activity, ActivityAttendance, Indicator, Project, StrategicObjective
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+PROJECTS, SOS, INDICATORS, ACTIVITIES_PER_SO = 10, 4, 3, 50
+START, END = date(2024, 1, 1), date(2025, 12, 31)
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "SQLALCHEMY_BINDS": {}, "TESTING": True})
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        conn = db.session.connection()
+        conn.execute(insert(Project), [{"id": p, "name": f"P{p}", "goal": "g"} for p in range(1, PROJECTS + 1)])
+        so_ids = range(1, PROJECTS * SOS + 1)
+        conn.execute(insert(StrategicObjective), [
+            {"id": s, "project_id": (s - 1) // SOS + 1, "so_code": f"SO{(s - 1) % SOS + 1}", "title": "so"}
+            for s in so_ids
+        ])
+        conn.execute(insert(Indicator), [
+            {"id": i, "strategic_objective_id": (i - 1) // INDICATORS + 1,
+             "indicator_code": f"IND{(i - 1) % INDICATORS + 1}", "statement": "st"}
+            for i in range(1, len(so_ids) * INDICATORS + 1)
+        ])
+        activities = [
+            {"strategic_objective_id": s, "indicator_id": (s - 1) * INDICATORS + k % INDICATORS + 1,
+             "title": "a", "activity_date": START + timedelta(days=(s * 7 + k * 13) % 730)}
+            for s in so_ids for k in range(ACTIVITIES_PER_SO)
+        ]
+        conn.execute(insert(Activity), activities)
+        conn.execute(insert(ActivityAttendance), [
+            {"activity_id": a, "male_count": 1, "female_count": 2} for a in range(1, len(activities) + 1)
+        ])
+        db.session.commit()
+    return app
+
+
+def _activity_plans(app, url):
+    """``[(statement, plan text)]`` of the statements on ``activities`` that GET ``url`` runs."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM activities" in statement:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = app.test_client().get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert response.status_code == 200
+        assert statements, f"{url} ran no query on activities"
+        with engine.connect() as conn:
+            return [
+                (s, "\n".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + s, p)))
+                for s, p in statements
+            ]
+
+
+def _plan_of(plans, marker):
+    matches = [plan for statement, plan in plans if marker in statement]
+    assert matches, f"no statement containing {marker!r}"
+    return matches[0]
+
+
+def test_period_report_seeks_so_and_indicator_indexes(app):
+    plans = _activity_plans(app, f"/reports/period?project_id=3&start={START}&end={END}")
+    plan = _plan_of(plans, "UNION ALL")
+    assert "SEARCH activities USING INDEX ix_activities_so_date (strategic_objective_id=? AND activity_date>? " \
+           "AND activity_date<?)" in plan
+    assert "SEARCH activities USING INDEX ix_activities_indicator_date (indicator_id=? AND activity_date>? " \
+           "AND activity_date<?)" in plan
+    assert "ix_activities_activity_date" not in plan
+    assert "SCAN activities" not in plan
+
+
+def test_activity_list_for_one_so_seeks_so_date_index(app):
+    plan = _plan_of(_activity_plans(app, "/activities/?so_id=5&per_page=20"), "ORDER BY activities.activity_date DESC")
+    assert "ix_activities_so_date (strategic_objective_id=?)" in plan
+    assert "SCAN activities" not in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_activity_list_reads_newest_first_from_date_index(app):
+    plan = _plan_of(_activity_plans(app, "/activities/?per_page=20"), "ORDER BY activities.activity_date DESC")
+    assert "USING INDEX ix_activities_activity_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_dashboard_recent_activities_read_from_date_index(app):
+    plan = _plan_of(_activity_plans(app, "/dashboard/"), "ORDER BY activities.activity_date DESC")
+    assert "SCAN activities USING INDEX ix_activities_activity_date" in plan
+    assert "TEMP B-TREE" not in plan
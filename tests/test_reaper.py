@@ -0,0 +1,17 @@
+from app import create_app
+from services import reaper
+
+
+def test_create_app_does_not_start_sweeper(monkeypatch):
+    started = []
+    monkeypatch.setattr(reaper, "start_sweeper", started.append)
+    create_app({"REAPER_INTERVAL": 60, "SQLALCHEMY_DATABASE_URI": "sqlite://", "SQLALCHEMY_BINDS": {}})
+    assert started == []
+    assert reaper._sweeper_started is False
+
+
+def test_reaper_run_requires_interval():
+    app = create_app({"REAPER_INTERVAL": 0, "SQLALCHEMY_DATABASE_URI": "sqlite://", "SQLALCHEMY_BINDS": {}})
+    result = app.test_cli_runner().invoke(args=["reaper", "run"])
+    assert result.exit_code != 0
+    assert "REAPER_INTERVAL" in result.output
@@ -0,0 +1,63 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from services import testscore_batch
+from services.testscore_batch import expand_uploads
+
+
+def _allowed(name):
+    return name.endswith(".csv")
+
+
+def _zip(members):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Names of the zip members that were decompressed."""
+    names = []
+    real_read = zipfile.ZipFile.read
+
+    def read(self, info, *args):
+        names.append(info.filename if isinstance(info, zipfile.ZipInfo) else info)
+        return real_read(self, info, *args)
+
+    monkeypatch.setattr(testscore_batch.zipfile.ZipFile, "read", read)
+    return names
+
+
+def test_expands_zips_and_skips_other_files(reads):
+    data = _zip([("a.csv", b"x"), ("dir/b.csv", b"y"), ("notes.txt", b"z")])
+    datasets, skipped = expand_uploads([("batch.zip", data), ("c.csv", b"w"), ("d.pdf", b"v")], _allowed)
+    assert datasets == [("a.csv", b"x"), ("b.csv", b"y"), ("c.csv", b"w")]
+    assert skipped == ["batch.zip/notes.txt", "d.pdf"]
+
+
+def test_oversized_member_is_rejected_before_it_is_decompressed(reads):
+    # 50 MB of zeros compresses to ~50 KB
+    data = _zip([("small.csv", b"x"), ("bomb.csv", bytes(50 * 1024 * 1024))])
+    assert len(data) < 1024 * 1024
+    with pytest.raises(ValueError, match="bomb.csv is larger than 10 MB"):
+        expand_uploads([("batch.zip", data)], _allowed, max_file_bytes=10 * 1024 * 1024)
+    assert reads == ["small.csv"]
+
+
+def test_total_size_limit_counts_uncompressed_members(reads):
+    data = _zip([(f"{i}.csv", bytes(600 * 1024)) for i in range(4)])
+    with pytest.raises(ValueError, match="at most 2 MB"):
+        expand_uploads([("batch.zip", data)], _allowed, max_total_bytes=2 * 1024 * 1024)
+    assert reads == ["0.csv", "1.csv", "2.csv"]
+
+
+def test_file_count_is_checked_before_reading(reads):
+    data = _zip([(f"{i}.csv", b"x") for i in range(5)])
+    with pytest.raises(ValueError, match="at most 3 files"):
+        expand_uploads([("batch.zip", data)], _allowed, max_files=3)
+    assert reads == ["0.csv", "1.csv", "2.csv"]
@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app import create_app
+from extensions import db
+from routes import testscore
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'runs.db'}", "SQLALCHEMY_BINDS": {}})
+    # Uploads and parsed copies are written under the app root
+    app.root_path = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _sheet(path, **extra):
+    pd.DataFrame({
+        "pre_test": [40.0, 50.0, 60.0, 70.0],
+        "post_test": [45.0, 55.0, 66.0, 71.0],
+        "gender": ["M", "F", "F", "M"],
+        **extra,
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def _chart_ids(result):
+    return [spec["id"] for spec in testscore.chart_specs(result["overall"], result["gender_rows"], result["breakdowns"])]
+
+
+def test_class_column_gets_class_chart_without_requested_breakdown(app, tmp_path):
+    path = _sheet(tmp_path / "s.csv", Class=["7A", "7A", "7B", "7B"])
+    result = testscore.analyze_upload(path, disaggregate=True)
+    assert result["breakdowns"][0]["dims"] == ["class"]
+    assert [r["labels"] for r in result["breakdowns"][0]["rows"]] == [["7A"], ["7B"]]
+    assert "by_class" in _chart_ids(result)
+
+
+def test_requested_class_breakdown_is_not_duplicated(app, tmp_path):
+    path = _sheet(tmp_path / "s.csv", school=["A", "B", "A", "B"], **{"class": ["7A", "7A", "7B", "7B"]})
+    result = testscore.analyze_upload(path, breakdowns=testscore.parse_breakdowns("school, class"))
+    assert [t["dims"] for t in result["breakdowns"]] == [["school"], ["class"]]
+
+
+def test_sheet_without_class_column_has_no_breakdowns(app, tmp_path):
+    result = testscore.analyze_upload(_sheet(tmp_path / "s.csv"))
+    assert result["breakdowns"] is None
+    assert "by_class" not in _chart_ids(result)
+
+
+def test_combined_run_keeps_class_table_only_if_every_file_has_it(app, tmp_path):
+    with_class = _sheet(tmp_path / "a.csv", school=["A", "A", "B", "B"], **{"class": ["7A", "7B", "7A", "7B"]})
+    without_class = _sheet(tmp_path / "b.csv", school=["A", "B", "B", "B"])
+    datasets = []
+    for path in (with_class, without_class):
+        with open(path, "rb") as fh:
+            datasets.append((os.path.basename(path), fh.read()))
+
+    rows, combined = testscore.run_batch(datasets, False, workers=1, breakdowns=testscore.parse_breakdowns("school"))
+    assert [error for _, _, error in rows] == [None, None]
+    tables = testscore._run_breakdowns(combined)
+    assert [t["dims"] for t in tables] == [["school"]]
+    assert {tuple(r["labels"]): r["n"] for r in tables[0]["rows"]} == {("A",): 3, ("B",): 5}
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from routes.testscore import read_dataset, summarize_csv_chunked, summarize_data, summary_results
+
+
+def test_chunked_csv_summary_equals_loaded_summary(tmp_path):
+    path = tmp_path / "scores.csv"
+    pd.DataFrame({
+        "gender": ["M", "F", "F", "M"],
+        "school": ["A", "A", "B", "B"],
+        "pre_test": [40.1, 43.3, 38.7, 51.9],
+        "post_test": [44.3, 41.7, 47.2, 46.5],
+        "pre_q1": [3, 4, 5, 6],
+        "post_q1": [4, 4, 7, 6],
+    }).to_csv(path, index=False)
+
+    loaded = summarize_data(read_dataset(str(path)), disaggregate=True, breakdowns=[("school",)])
+    chunked = summarize_csv_chunked(str(path), disaggregate=True, chunksize=3, breakdowns=[("school",)])
+
+    overall, gender = summary_results(*loaded)
+    chunked_overall, chunked_gender = summary_results(*chunked)
+    assert chunked_overall == overall
+    assert overall["mean_post"] == 44.925
+    pd.testing.assert_frame_equal(chunked_gender, gender)